@@ -0,0 +1,36 @@
+"""
+Backfill denormalized snapshots for confirmed bookings made before
+snapshots were written at confirmation time.
+"""
+
+import asyncio
+from motor.motor_asyncio import AsyncIOMotorClient
+import os
+from dotenv import load_dotenv
+from pathlib import Path
+
+from utils.booking_views import backfill_snapshots
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+# MongoDB connection
+mongo_url = os.environ['MONGO_URL']
+client = AsyncIOMotorClient(mongo_url)
+db = client[os.environ['DB_NAME']]
+
+async def main():
+    """Main backfill function"""
+    print("Backfilling booking snapshots...")
+    
+    try:
+        await backfill_snapshots(db)
+        missing = await db.bookings.count_documents({"payment_status": "success", "snapshot": {"$exists": False}})
+        print(f"✓ Backfill complete, {missing} confirmed bookings still without a snapshot")
+    except Exception as e:
+        print(f"\n✗ Error backfilling snapshots: {e}")
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
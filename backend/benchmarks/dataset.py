@@ -0,0 +1,228 @@
+"""
+Synthetic, reproducible dataset for load tests and seed_db.py --generate.
+
+Generates cities x theaters x days of shows plus historical confirmed
+bookings, each with its sold seat markers, so seat maps, available_seats
+and the seat_reservations arbiter agree before the run starts, and the
+analytics counters are rebuilt from those bookings once they are loaded.
+Everything derives from one random seed and the start date, so two runs
+with the same arguments produce the same documents.
+
+Documents are streamed into fixed-size unordered insert_many batches with
+at most `concurrency` batches in flight, so memory stays bounded by the
+catalogue (theaters and shows), not by the number of bookings. Secondary
+indexes are built once the collections are loaded, which is much faster
+than maintaining them insert by insert.
+"""
+
+import asyncio
+import random
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Set
+
+from utils.analytics import rebuild_analytics
+from utils.catalogue_cache import catalogue_changed
+from utils.indexes import ensure_indexes
+from utils.seat_holds import hold_key
+
+CITY_NAMES = [
+    "Mumbai", "Delhi", "Bengaluru", "Hyderabad", "Chennai", "Kolkata", "Pune", "Ahmedabad",
+    "Jaipur", "Lucknow", "Kochi", "Chandigarh", "Indore", "Bhopal", "Nagpur", "Surat",
+]
+GENRES = ["Action", "Drama", "Thriller", "Comedy", "Horror", "Sci-Fi", "Romance", "Adventure"]
+LANGUAGES = ["Hindi", "English", "Telugu", "Tamil", "Malayalam", "Kannada"]
+TIMES = ["10:30 AM", "02:15 PM", "06:45 PM", "09:30 PM"]
+FORMATS = ["2D", "3D", "IMAX", "2D"]
+PRICES = [220, 350, 450, 220]
+ROWS = ["A", "B", "C", "D", "E", "F", "G", "H", "I", "J"]
+SEATS_PER_ROW = 20
+
+
+def _today() -> datetime:
+    return datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+@dataclass
+class DatasetConfig:
+    cities: int = 4
+    theaters_per_city: int = 5
+    movies: int = 50
+    days: int = 10
+    shows_per_day: int = len(TIMES)
+    bookings: int = 10000
+    seed: int = 42
+    # First show date; also the clock for created_at, so output depends only on the config
+    start_date: datetime = field(default_factory=_today)
+    batch_size: int = 5000
+    concurrency: int = 8
+
+
+class BatchWriter:
+    """Buffers documents per collection and keeps at most `concurrency` insert_many calls in flight"""
+
+    def __init__(self, db, batch_size: int, concurrency: int,
+                 progress: Optional[Callable[[Dict[str, int]], None]] = None):
+        self.db = db
+        self.batch_size = batch_size
+        self.progress = progress
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._buffers: Dict[str, List[Dict]] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self.inserted: Dict[str, int] = {}
+
+    async def _insert(self, collection: str, docs: List[Dict]):
+        try:
+            await self.db[collection].insert_many(docs, ordered=False)
+        finally:
+            self._semaphore.release()
+        self.inserted[collection] = self.inserted.get(collection, 0) + len(docs)
+        if self.progress is not None:
+            self.progress(self.inserted)
+
+    async def _submit(self, collection: str, docs: List[Dict]):
+        # Backpressure: generation waits here while every writer is busy
+        await self._semaphore.acquire()
+        task = asyncio.create_task(self._insert(collection, docs))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def add(self, collection: str, doc: Dict):
+        buffer = self._buffers.setdefault(collection, [])
+        buffer.append(doc)
+        if len(buffer) >= self.batch_size:
+            self._buffers[collection] = []
+            await self._submit(collection, buffer)
+
+    async def flush(self):
+        for collection, buffer in self._buffers.items():
+            if buffer:
+                await self._submit(collection, buffer)
+        self._buffers = {}
+        # Raises the first insert error, if any
+        await asyncio.gather(*self._tasks)
+
+
+def _movie(rng: random.Random, i: int, created_at: datetime) -> Dict:
+    return {
+        "_id": str(i + 1),
+        "title": f"{rng.choice(['The', 'Return of', 'Rise of', 'Legend of'])} {rng.choice(GENRES)} {i + 1}",
+        "poster": f"https://images.unsplash.com/photo-{1594908900000 + i}?w=300&h=450&fit=crop",
+        "rating": round(rng.uniform(5.5, 9.5), 1),
+        "votes": f"{rng.randint(1, 400)}K",
+        "genres": rng.sample(GENRES, 2),
+        "languages": rng.sample(LANGUAGES, 2),
+        "format": ["2D", "3D", "IMAX"][:rng.randint(1, 3)],
+        "duration": f"{rng.randint(1, 3)}h {rng.randint(0, 59)}m",
+        "release_date": "2024-12-05",
+        "trailer": "BhQTkdZFOyo",
+        "description": "A synthetic movie generated for load testing.",
+        "created_at": created_at
+    }
+
+
+async def generate(db, config: DatasetConfig, progress: Optional[Callable[[Dict[str, int]], None]] = None,
+                   build_indexes: bool = True) -> Dict[str, int]:
+    """
+    Drop and regenerate the dataset, then build indexes unless the caller
+    will. Returns document counts per collection.
+    """
+    rng = random.Random(config.seed)
+    for collection in ["movies", "theaters", "shows", "bookings", "seat_reservations", "analytics", "email_outbox"]:
+        await db[collection].drop()
+
+    writer = BatchWriter(db, config.batch_size, config.concurrency, progress)
+    today = config.start_date
+    movies = [_movie(rng, i, today) for i in range(config.movies)]
+    for movie in movies:
+        await writer.add("movies", movie)
+
+    capacity = len(ROWS) * SEATS_PER_ROW
+    seat_labels = [f"{row}{n}" for row in ROWS for n in range(1, SEATS_PER_ROW + 1)]
+    theaters, shows = [], []
+    for c in range(config.cities):
+        city = CITY_NAMES[c % len(CITY_NAMES)] + ("" if c < len(CITY_NAMES) else f" {c // len(CITY_NAMES)}")
+        for t in range(config.theaters_per_city):
+            theater = {
+                "_id": f"theater{c}-{t}",
+                "name": f"Cinema {t + 1}, {city}",
+                "location": f"Area {t + 1}, {city}",
+                "city": city,
+                "total_seats": capacity,
+                "seat_layout": {"rows": ROWS, "seats_per_row": SEATS_PER_ROW},
+                "created_at": today
+            }
+            theaters.append(theater)
+            await writer.add("theaters", theater)
+            for s in range(config.days * config.shows_per_day):
+                slot = s % config.shows_per_day % len(TIMES)
+                shows.append({
+                    "_id": f"show{c}-{t}-{s}",
+                    "movie_id": rng.choice(movies)["_id"],
+                    "theater_id": theater["_id"],
+                    "show_date": (today + timedelta(days=s // config.shows_per_day)).strftime("%Y-%m-%d"),
+                    "show_time": TIMES[slot],
+                    "format": FORMATS[slot],
+                    "price": PRICES[slot],
+                    "available_seats": capacity,
+                    "created_at": today
+                })
+
+    # Historical bookings fill shows from the front row back, never overlapping
+    movies_by_id = {movie["_id"]: movie for movie in movies}
+    theaters_by_id = {theater["_id"]: theater for theater in theaters}
+    next_seat = {show["_id"]: 0 for show in shows}
+    for n in range(config.bookings):
+        show = rng.choice(shows)
+        count = rng.randint(1, 4)
+        start = next_seat[show["_id"]]
+        if start + count > capacity:
+            continue
+        next_seat[show["_id"]] = start + count
+        seats = seat_labels[start:start + count]
+        movie, theater = movies_by_id[show["movie_id"]], theaters_by_id[show["theater_id"]]
+        booking_id = f"HIST{n:010d}"
+        created_at = today - timedelta(minutes=rng.randint(0, 60 * 24 * 30))
+        await writer.add("bookings", {
+            "_id": booking_id,
+            "booking_id": booking_id,
+            "show_id": show["_id"],
+            "seats": seats,
+            "email": f"user{n}@example.com",
+            "phone": "9876543210",
+            "session_id": f"hist-{n}",
+            "total_amount": show["price"] * count + 20 * count,
+            "payment_status": "success",
+            "payment_id": f"pay_hist_{n}",
+            "razorpay_order_id": f"order_hist_{n}",
+            "created_at": created_at,
+            "snapshot": {
+                "movie": {"id": movie["_id"], "title": movie["title"], "poster": movie["poster"],
+                          "genres": movie["genres"]},
+                "showtime": {"id": show["_id"], "date": show["show_date"], "time": show["show_time"],
+                             "format": show["format"]},
+                "theater": {"id": theater["_id"], "name": theater["name"], "location": theater["location"]}
+            }
+        })
+        for seat in seats:
+            await writer.add("seat_reservations", {
+                "_id": hold_key(show["_id"], seat),
+                "show_id": show["_id"],
+                "seat": seat,
+                "session_id": f"hist-{n}",
+                "status": "sold",
+                "booking_id": booking_id,
+                "created_at": created_at
+            })
+
+    for show in shows:
+        show["available_seats"] = capacity - next_seat[show["_id"]]
+        await writer.add("shows", show)
+
+    await writer.flush()
+    # The dashboard reads pre-aggregated counters, which bulk inserts do not maintain
+    await rebuild_analytics(db)
+    if build_indexes:
+        await ensure_indexes(db)
+    await catalogue_changed(db)
+    return writer.inserted
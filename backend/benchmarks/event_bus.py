@@ -0,0 +1,130 @@
+"""
+Event bus propagation latency between worker processes.
+
+    cd backend && python -m benchmarks.event_bus [--backend unix|mongo] [--workers 4] [--json]
+
+Starts --workers listener processes and publishes --events events from
+this one at --rate per second, the way a busy worker would publish seat
+holds. Each listener records publish-to-delivery time for every event it
+receives. The report gives p50 / p99 / max latency and how many events
+each listener missed. The mongo backend needs a replica set (MONGO_URL,
+default mongodb://localhost:27017) and uses its own database (--db).
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from benchmarks.funnel import percentile
+
+
+def make_backend(args):
+    from utils.event_bus import MongoChangeStreamBackend, UnixSocketBackend
+    if args.backend == "mongo":
+        from motor.motor_asyncio import AsyncIOMotorClient
+        return MongoChangeStreamBackend(AsyncIOMotorClient(args.mongo_url)[args.db])
+    return UnixSocketBackend(args.socket)
+
+
+async def listen(args, ready, results):
+    from utils.event_bus import EventBus
+    bus = EventBus()
+    latencies = []
+    done = asyncio.Event()
+
+    def received(data):
+        latencies.append((time.time() - data["sent"]) * 1000)
+        if len(latencies) == args.events:
+            done.set()
+
+    bus.subscribe("benchmark_ping", received)
+    await bus.start(make_backend(args))
+    # Give a change stream time to open before the publisher starts
+    await asyncio.sleep(0.5)
+    ready.set()
+    try:
+        await asyncio.wait_for(done.wait(), args.events / args.rate + 10)
+    except asyncio.TimeoutError:
+        pass
+    await bus.stop()
+    results.put(latencies)
+
+
+def listener_process(args, ready, results):
+    asyncio.run(listen(args, ready, results))
+
+
+async def publish(args):
+    from utils.event_bus import EventBus
+    bus = EventBus()
+    await bus.start(make_backend(args))
+    try:
+        interval = 1 / args.rate
+        start = time.perf_counter()
+        for i in range(args.events):
+            delay = start + i * interval - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            bus.publish("benchmark_ping", n=i, sent=time.time())
+        # Leave the publisher running while the listeners drain
+        await asyncio.sleep(1)
+    finally:
+        await bus.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Event bus propagation latency")
+    parser.add_argument("--backend", choices=["unix", "mongo"], default="unix")
+    parser.add_argument("--socket", default="/tmp/tickethub-events-bench.sock")
+    parser.add_argument("--mongo-url", default=os.getenv("MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--db", default="tickethub_bench")
+    parser.add_argument("--workers", type=int, default=4, help="listener processes")
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--rate", type=float, default=1000, help="events published per second")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = multiprocessing.Queue()
+    readies = []
+    listeners = []
+    for _ in range(args.workers):
+        ready = multiprocessing.Event()
+        process = multiprocessing.Process(target=listener_process, args=(args, ready, results))
+        process.start()
+        readies.append(ready)
+        listeners.append(process)
+        if args.backend == "unix" and len(listeners) == 1:
+            # Let the first listener bind the socket and act as the relay
+            ready.wait(10)
+    for ready in readies:
+        ready.wait(30)
+
+    asyncio.run(publish(args))
+    per_worker = [results.get(timeout=args.events / args.rate + 30) for _ in listeners]
+    for process in listeners:
+        process.join()
+
+    latencies = sorted(latency for worker in per_worker for latency in worker)
+    result = {
+        "config": vars(args),
+        "delivered": len(latencies),
+        "missed": args.events * args.workers - len(latencies),
+        "p50_ms": round(percentile(latencies, 0.5), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        "max_ms": round(latencies[-1], 2) if latencies else None,
+    }
+    if args.json:
+        json.dump(result, sys.stdout, indent=2)
+        print()
+        return
+    print(f"{args.backend}: {args.events} events at {args.rate:.0f}/s to {args.workers} workers, "
+          f"{result['delivered']} deliveries, {result['missed']} missed")
+    print(f"latency p50 {result['p50_ms']} ms, p99 {result['p99_ms']} ms, max {result['max_ms']} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+"""
+Opening-night load test for the booking funnel.
+
+    cd backend
+    python -m benchmarks.funnel --bookings 1000000 --sessions 5000 --concurrency 200 \\
+        --json results/$(git rev-parse --short HEAD).json
+    python -m benchmarks.funnel --skip-seed --sessions 5000 --compare results/<baseline>.json
+
+Needs a local mongod (MONGO_URL, default mongodb://localhost:27017); start
+it as a one-node replica set (mongod --replSet rs0, then rs.initiate()) to
+exercise the transactional confirmation path. The harness uses its own
+database (--db), seeds it with benchmarks.dataset, and drives the API
+in-process over httpx's ASGI transport. The payment gateway is
+stub_gateway.py mounted the same way, so no network is involved.
+
+Each virtual user browses /api/movies, opens a movie's shows, polls the
+seat map, reserves seats, creates a booking and (unless it abandons) pays.
+Users concentrate on --hot-shows shows with probability --hot-share, so
+seat contention looks like an opening night.
+
+Reported per endpoint: request count, errors, p50/p95/p99 latency,
+throughput, and Mongo round trips per request. Round trips are counted by
+a pymongo command listener during a short serial probe run, because
+commands issued concurrently cannot be attributed to one request. After
+the run the touched shows are checked for double-booked seats and for
+available_seats drifting from the sold seat count.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from pymongo import monitoring
+
+
+class CommandCounter(monitoring.CommandListener):
+    def __init__(self):
+        self.count = 0
+
+    def started(self, event):
+        self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+# Must be registered before server.connect_db() creates the MongoClient
+commands = CommandCounter()
+monitoring.register(commands)
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.round_trips: Dict[str, List[int]] = defaultdict(list)
+        self.outcomes: Dict[str, int] = defaultdict(int)
+        self.shows = set()
+        self.count_round_trips = False
+
+    async def call(self, http, endpoint: str, method: str, url: str, **kwargs):
+        before = commands.count
+        start = time.perf_counter()
+        response = await http.request(method, url, **kwargs)
+        self.latencies[endpoint].append((time.perf_counter() - start) * 1000)
+        if self.count_round_trips:
+            self.round_trips[endpoint].append(commands.count - before)
+        if response.status_code >= 500:
+            self.errors[endpoint] += 1
+        return response
+
+
+def sign(order_id: str, payment_id: str) -> str:
+    from utils.payment import RAZORPAY_KEY_SECRET
+    return hmac.new(RAZORPAY_KEY_SECRET.encode(), f"{order_id}|{payment_id}".encode(), hashlib.sha256).hexdigest()
+
+
+async def user_session(http, recorder: Recorder, rng: random.Random, shows: List[Dict], hot: List[Dict], args):
+    """One visitor walking the funnel"""
+    await recorder.call(http, "GET /api/movies", "GET", "/api/movies")
+    show = rng.choice(hot) if hot and rng.random() < args.hot_share else rng.choice(shows)
+    await recorder.call(
+        http, "GET /api/movies/{id}/shows", "GET", f"/api/movies/{show['movie_id']}/shows",
+        params={"date": show["show_date"], "city": show["city"]}
+    )
+
+    session_id = uuid.uuid4().hex
+    for attempt in range(args.reserve_attempts):
+        seat_map, etag = None, None
+        for _ in range(args.seat_polls):
+            # Poll like a browser would, revalidating the copy it already has
+            response = await recorder.call(http, "GET /api/shows/{id}/seats", "GET", f"/api/shows/{show['_id']}/seats",
+                                           headers={"If-None-Match": etag} if etag else None)
+            if response.status_code == 200:
+                seat_map, etag = response.json(), response.headers.get("etag")
+        if seat_map is None:
+            recorder.outcomes["seat_map_failed"] += 1
+            return
+        taken = set(seat_map["booked_seats"]) | set(seat_map["reserved_seats"])
+        free = [f"{row}{n}" for row in seat_map["rows"] for n in range(1, seat_map["seats_per_row"] + 1)
+                if f"{row}{n}" not in taken]
+        if not free:
+            recorder.outcomes["sold_out"] += 1
+            return
+        seats = rng.sample(free, min(len(free), rng.randint(1, 4)))
+        response = await recorder.call(
+            http, "POST /api/seats/reserve", "POST", "/api/seats/reserve",
+            json={"show_id": show["_id"], "seats": seats, "session_id": session_id}
+        )
+        if response.status_code == 200:
+            recorder.shows.add(show["_id"])
+            break
+        recorder.outcomes["reserve_conflicts"] += 1
+    else:
+        recorder.outcomes["gave_up"] += 1
+        return
+
+    response = await recorder.call(
+        http, "POST /api/bookings/create", "POST", "/api/bookings/create",
+        json={"show_id": show["_id"], "seats": seats, "email": f"{session_id[:12]}@example.com",
+              "phone": "9876543210", "session_id": session_id}
+    )
+    if response.status_code != 200:
+        recorder.outcomes["create_failed"] += 1
+        return
+    created = response.json()
+
+    if rng.random() < args.abandon_rate:
+        recorder.outcomes["abandoned"] += 1
+        return
+    payment_id = f"pay_{uuid.uuid4().hex[:14]}"
+    response = await recorder.call(
+        http, "POST /api/payment/verify", "POST", "/api/payment/verify",
+        json={"booking_id": created["booking_id"], "razorpay_order_id": created["payment_order_id"],
+              "razorpay_payment_id": payment_id,
+              "razorpay_signature": sign(created["payment_order_id"], payment_id)}
+    )
+    recorder.outcomes["paid" if response.status_code == 200 else f"verify_{response.status_code}"] += 1
+
+
+async def run_sessions(http, recorder: Recorder, shows, hot, args, sessions: int, concurrency: int, seed: int):
+    remaining = iter(range(sessions))
+
+    async def worker(n: int):
+        rng = random.Random(seed * 1000003 + n)
+        for _ in remaining:
+            try:
+                await user_session(http, recorder, rng, shows, hot, args)
+            except Exception as e:
+                recorder.outcomes[f"exception_{type(e).__name__}"] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(n) for n in range(concurrency)))
+    return time.perf_counter() - start
+
+
+async def check_integrity(db, show_ids: List[str]) -> Dict:
+    """Seats sold twice, and available_seats that disagree with what was sold"""
+    duplicates = await db.bookings.aggregate([
+        {"$match": {"show_id": {"$in": show_ids}, "payment_status": "success"}},
+        {"$unwind": "$seats"},
+        {"$group": {"_id": {"show_id": "$show_id", "seat": "$seats"}, "bookings": {"$sum": 1}}},
+        {"$match": {"bookings": {"$gt": 1}}},
+        {"$count": "seats"}
+    ]).to_list(length=1)
+    sold = await db.bookings.aggregate([
+        {"$match": {"show_id": {"$in": show_ids}, "payment_status": "success"}},
+        {"$group": {"_id": "$show_id", "sold": {"$sum": {"$size": "$seats"}}}}
+    ]).to_list(length=None)
+    sold_by_show = {doc["_id"]: doc["sold"] for doc in sold}
+    capacity = {t["_id"]: t["total_seats"] for t in await db.theaters.find({}, {"total_seats": 1}).to_list(length=None)}
+    mismatches = 0
+    async for show in db.shows.find({"_id": {"$in": show_ids}}, {"available_seats": 1, "theater_id": 1}):
+        if capacity[show["theater_id"]] - sold_by_show.get(show["_id"], 0) != show["available_seats"]:
+            mismatches += 1
+    return {
+        "double_booked_seats": duplicates[0]["seats"] if duplicates else 0,
+        "available_seats_mismatches": mismatches,
+        "shows_checked": len(show_ids)
+    }
+
+
+def summarize(recorder: Recorder, elapsed: float, probe: Recorder) -> Dict:
+    endpoints = {}
+    for endpoint, latencies in sorted(recorder.latencies.items()):
+        ordered = sorted(latencies)
+        trips = probe.round_trips.get(endpoint, [])
+        endpoints[endpoint] = {
+            "requests": len(ordered),
+            "errors": recorder.errors.get(endpoint, 0),
+            "throughput_rps": round(len(ordered) / elapsed, 1),
+            "p50_ms": round(percentile(ordered, 0.50), 2),
+            "p95_ms": round(percentile(ordered, 0.95), 2),
+            "p99_ms": round(percentile(ordered, 0.99), 2),
+            "mongo_round_trips": round(sum(trips) / len(trips), 2) if trips else None,
+        }
+    return endpoints
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(result: Dict, baseline: Optional[Dict]):
+    print(f"\n{result['sessions']} sessions in {result['elapsed_seconds']} s "
+          f"({result['requests_per_second']} req/s, commit {result['commit']})")
+    header = f"{'endpoint':30} {'reqs':>7} {'err':>5} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'trips':>6}"
+    print(header)
+    for endpoint, stats in result["endpoints"].items():
+        line = (f"{endpoint:30} {stats['requests']:>7} {stats['errors']:>5} {stats['throughput_rps']:>8} "
+                f"{stats['p50_ms']:>8} {stats['p95_ms']:>8} {stats['p99_ms']:>8} "
+                f"{stats['mongo_round_trips'] if stats['mongo_round_trips'] is not None else '-':>6}")
+        previous = (baseline or {}).get("endpoints", {}).get(endpoint)
+        if previous and previous["p95_ms"]:
+            line += f"   p95 {(stats['p95_ms'] / previous['p95_ms'] - 1) * 100:+.0f}% vs {baseline.get('commit')}"
+        print(line)
+    print(f"outcomes: {result['outcomes']}")
+    print(f"integrity: {result['integrity']}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Booking funnel load test")
+    parser.add_argument("--mongo-url", default=os.getenv("MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--db", default="tickethub_bench")
+    parser.add_argument("--cities", type=int, default=4)
+    parser.add_argument("--theaters-per-city", type=int, default=5)
+    parser.add_argument("--movies", type=int, default=50)
+    parser.add_argument("--days", type=int, default=10, help="days of shows, four per theater per day")
+    parser.add_argument("--bookings", type=int, default=10000, help="historical confirmed bookings to seed")
+    parser.add_argument("--skip-seed", action="store_true", help="reuse the dataset from a previous run")
+    parser.add_argument("--sessions", type=int, default=2000, help="virtual user sessions to run")
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--probe-sessions", type=int, default=20, help="serial sessions used to count round trips")
+    parser.add_argument("--hot-shows", type=int, default=10)
+    parser.add_argument("--hot-share", type=float, default=0.8)
+    parser.add_argument("--seat-polls", type=int, default=2)
+    parser.add_argument("--reserve-attempts", type=int, default=3)
+    parser.add_argument("--abandon-rate", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--compare", help="baseline results file to compare p95 latency against")
+    args = parser.parse_args()
+
+    # server.py reads its configuration at import time
+    os.environ["MONGO_URL"] = args.mongo_url
+    os.environ["DB_NAME"] = args.db
+    # Every virtual user shares the harness' client address, per-IP limits would throttle the run
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    import httpx
+    import server
+    import stub_gateway
+    from benchmarks.dataset import DatasetConfig, generate
+    from utils.payment import payment_client
+
+    # The same client server.startup() goes on to use
+    db = server.connect_db()
+    if not args.skip_seed:
+        print("Seeding dataset...")
+        start = time.perf_counter()
+        counts = await generate(db, DatasetConfig(
+            cities=args.cities, theaters_per_city=args.theaters_per_city, movies=args.movies,
+            days=args.days, bookings=args.bookings, seed=args.seed
+        ))
+        print(f"✓ Seeded {counts} in {time.perf_counter() - start:.1f} s")
+
+    cities = {t["_id"]: t["city"] for t in await db.theaters.find({}, {"city": 1}).to_list(length=None)}
+    shows = await db.shows.find(
+        {"available_seats": {"$gt": 0}}, {"movie_id": 1, "theater_id": 1, "show_date": 1}
+    ).to_list(length=None)
+    for show in shows:
+        show["city"] = cities[show["theater_id"]]
+    rng = random.Random(args.seed)
+    hot = rng.sample(shows, min(args.hot_shows, len(shows)))
+
+    payment_client._client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=stub_gateway.app), base_url="http://gateway/v1"
+    )
+    await server.startup()
+    # Unhandled app errors come back as 500s and are counted per endpoint
+    http = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=server.app, raise_app_exceptions=False),
+        base_url="http://tickethub", timeout=60
+    )
+    try:
+        probe = Recorder()
+        probe.count_round_trips = True
+        await run_sessions(http, probe, shows, hot, args, args.probe_sessions, 1, args.seed + 1)
+
+        recorder = Recorder()
+        before = commands.count
+        elapsed = await run_sessions(http, recorder, shows, hot, args, args.sessions, args.concurrency, args.seed)
+        total_commands = commands.count - before
+
+        touched = sorted(probe.shows | recorder.shows)
+        integrity = await check_integrity(db, touched)
+    finally:
+        await http.aclose()
+        await server.shutdown_db_client()
+
+    requests = sum(len(latencies) for latencies in recorder.latencies.values())
+    result = {
+        "commit": git_commit(),
+        "config": vars(args),
+        "sessions": args.sessions,
+        "elapsed_seconds": round(elapsed, 2),
+        "requests_per_second": round(requests / elapsed, 1),
+        "mongo_commands_per_request": round(total_commands / max(requests, 1), 2),
+        "endpoints": summarize(recorder, elapsed, probe),
+        "outcomes": dict(recorder.outcomes),
+        "integrity": integrity,
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"✓ Results written to {args.json}")
+    if integrity["double_booked_seats"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
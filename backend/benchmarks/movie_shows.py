@@ -0,0 +1,124 @@
+"""
+Round trips behind GET /api/movies/{id}/shows as theaters per city grow.
+
+    cd backend && python -m benchmarks.movie_shows [--theaters 3,30,300] [--json]
+
+Needs a local mongod (MONGO_URL, default mongodb://localhost:27017). For
+each --theaters value a fresh dataset is generated in its own database
+(--db) with every theater screening the benchmark movie, the worst case
+for per-theater lookups. The endpoint is then called --requests times,
+one at a time so each request's Mongo commands can be counted, next to
+the per-theater find_one loop the endpoint used to run.
+
+The endpoint's round trips should stay at one whatever the theater
+count; the loop's grow with it.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Dict, List
+
+# Registers the command listener before server.connect_db() creates the MongoClient
+from benchmarks.funnel import commands, percentile
+
+
+async def per_theater_lookups(db, movie_id: str, city: str) -> List[Dict]:
+    """The endpoint before the aggregation: shows, then one theater lookup per theater"""
+    shows = await db.shows.find({"movie_id": movie_id}).to_list(length=None)
+    theaters = {}
+    for show in shows:
+        theater_id = show["theater_id"]
+        if theater_id not in theaters:
+            theaters[theater_id] = await db.theaters.find_one({"_id": theater_id, "city": city})
+    return [theater for theater in theaters.values() if theater]
+
+
+async def measure(call, requests: int) -> Dict:
+    latencies, round_trips = [], []
+    for _ in range(requests):
+        before = commands.count
+        start = time.perf_counter()
+        result = await call()
+        latencies.append((time.perf_counter() - start) * 1000)
+        round_trips.append(commands.count - before)
+    latencies.sort()
+    return {
+        "result": result,
+        "round_trips": max(round_trips),
+        "p50_ms": round(percentile(latencies, 0.5), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+    }
+
+
+async def run_size(http, db, theaters_per_city: int, args) -> Dict:
+    from benchmarks.dataset import DatasetConfig, generate
+
+    await generate(db, DatasetConfig(
+        cities=args.cities, theaters_per_city=theaters_per_city, movies=1, days=args.days, bookings=0
+    ))
+    movie = await db.movies.find_one({}, {"_id": 1})
+    city = (await db.theaters.find_one({}, {"city": 1}))["city"]
+
+    async def endpoint():
+        response = await http.get(f"/api/movies/{movie['_id']}/shows", params={"city": city})
+        response.raise_for_status()
+        return response.json()["theaters"]
+
+    aggregated = await measure(endpoint, args.requests)
+    looped = await measure(lambda: per_theater_lookups(db, movie["_id"], city), args.requests)
+    return {
+        "theaters_per_city": theaters_per_city,
+        "theaters_returned": len(aggregated["result"]),
+        "showtimes_returned": sum(len(t["showtimes"]) for t in aggregated["result"]),
+        "endpoint_round_trips": aggregated["round_trips"],
+        "endpoint_p50_ms": aggregated["p50_ms"],
+        "endpoint_p99_ms": aggregated["p99_ms"],
+        "per_theater_round_trips": looped["round_trips"],
+        "per_theater_p50_ms": looped["p50_ms"],
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Movie showtimes round trips vs theaters per city")
+    parser.add_argument("--mongo-url", default=os.getenv("MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--db", default="tickethub_bench")
+    parser.add_argument("--theaters", default="3,30,300", help="comma-separated theaters per city")
+    parser.add_argument("--cities", type=int, default=2)
+    parser.add_argument("--days", type=int, default=3)
+    parser.add_argument("--requests", type=int, default=50, help="serial requests timed per size")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    os.environ["MONGO_URL"] = args.mongo_url
+    os.environ["DB_NAME"] = args.db
+    import httpx
+    import server
+
+    # The endpoint is measured without the lifespan, whose background workers would add commands
+    db = server.connect_db()
+    http = httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://tickethub", timeout=60)
+    try:
+        results = [await run_size(http, db, int(n), args) for n in args.theaters.split(",")]
+    finally:
+        await http.aclose()
+        server.close_db()
+
+    if args.json:
+        json.dump({"config": vars(args), "results": results}, sys.stdout, indent=2)
+        print()
+        return
+    print(f"{'theaters':>9} {'returned':>9} {'showtimes':>10} {'trips':>6} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'loop trips':>11} {'loop p50':>9}")
+    for r in results:
+        print(f"{r['theaters_per_city']:>9} {r['theaters_returned']:>9} {r['showtimes_returned']:>10} "
+              f"{r['endpoint_round_trips']:>6} {r['endpoint_p50_ms']:>8} {r['endpoint_p99_ms']:>8} "
+              f"{r['per_theater_round_trips']:>11} {r['per_theater_p50_ms']:>9}")
+    print("Mongo round trips per request; the endpoint's should stay flat as theaters grow")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,225 @@
+"""
+Live seat-map fan-out: many subscribers on one show.
+
+    cd backend && python -m benchmarks.seat_feed [--subscribers 10000] [--slow 0.05] [--json]
+
+Needs a local mongod (MONGO_URL, default mongodb://localhost:27017). One
+show is seeded in its own database (--db). --subscribers streams are
+opened on GET /api/shows/{id}/seats/stream by calling the ASGI app
+directly, so the numbers are the app's own cost per subscriber, without
+sockets or a network in between. A --slow share of them stop reading
+after the snapshot, as stalled phones would.
+
+Then --deltas seat holds are made through POST /api/seats/reserve, one
+at a time, and for each one the time until every reading subscriber has
+the delta is recorded.
+
+Reported: time for all subscribers to get their snapshot, memory per
+subscriber (process RSS growth), per-subscriber delta latency p50 / p99,
+time until the last subscriber has each delta, and how many stalled
+subscribers were switched to resync instead of buffering without bound.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from benchmarks.funnel import percentile
+
+SHOW_ID = "bench-seat-feed-show"
+THEATER_ID = "bench-seat-feed-theater"
+
+
+def rss_bytes() -> int:
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class Arrivals:
+    """Delivery times of each delta version across the reading subscribers"""
+
+    def __init__(self, readers: int):
+        self.readers = readers
+        self.times: Dict[int, List[float]] = defaultdict(list)
+        self.complete: Dict[int, asyncio.Event] = defaultdict(asyncio.Event)
+
+    def arrived(self, version: int):
+        times = self.times[version]
+        times.append(time.perf_counter())
+        if len(times) == self.readers:
+            self.complete[version].set()
+
+
+class StreamSubscriber:
+    """One SSE client driven straight through the ASGI interface"""
+
+    def __init__(self, n: int, slow: bool, arrivals: Arrivals):
+        self.n = n
+        self.slow = slow
+        self.arrivals = arrivals
+        self.version: Optional[int] = None
+        self.snapshot = asyncio.Event()
+        self.disconnect = asyncio.Event()
+        self.unblock = asyncio.Event()
+        self._buffer = b""
+
+    async def receive(self):
+        await self.disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(self, message):
+        if message["type"] != "http.response.body":
+            return
+        self._buffer += message.get("body", b"")
+        while b"\n\n" in self._buffer:
+            event, self._buffer = self._buffer.split(b"\n\n", 1)
+            self.on_event(event)
+        if self.slow and self.snapshot.is_set():
+            # Stop reading; the app's queue for this client fills up behind us
+            await self.unblock.wait()
+
+    def on_event(self, event: bytes):
+        if not event.startswith(b"id: "):
+            # Heartbeat comment
+            return
+        id_line, event_line, _ = event.split(b"\n", 2)
+        self.version = int(id_line[4:])
+        if event_line == b"event: snapshot":
+            self.snapshot.set()
+        elif not self.slow:
+            self.arrivals.arrived(self.version)
+
+    async def run(self, app, path: str):
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+            "headers": [(b"host", b"tickethub"), (b"accept", b"text/event-stream")],
+            "client": ("127.0.0.1", 10000 + self.n), "server": ("tickethub", 80),
+        }
+        await app(scope, self.receive, self.send)
+
+
+async def seed(db, rows: int, seats_per_row: int):
+    await db.theaters.replace_one({"_id": THEATER_ID}, {
+        "_id": THEATER_ID, "name": "Benchmark Hall", "city": "Bench",
+        "seat_layout": {"rows": [chr(ord("A") + i) for i in range(rows)], "seats_per_row": seats_per_row}
+    }, upsert=True)
+    await db.shows.replace_one({"_id": SHOW_ID}, {
+        "_id": SHOW_ID, "theater_id": THEATER_ID, "movie_id": "bench", "show_date": "2099-01-01",
+        "show_time": "19:00", "price": 250, "available_seats": rows * seats_per_row
+    }, upsert=True)
+    await db.seat_reservations.delete_many({"show_id": SHOW_ID})
+    await db.bookings.delete_many({"show_id": SHOW_ID})
+
+
+async def run(args):
+    import httpx
+    import server
+    from utils.seat_feed import seat_feed
+    from utils.seat_state import seat_state
+
+    async with server.app.router.lifespan_context(server.app):
+        await seed(server.db, args.rows, args.seats_per_row)
+        seat_state.invalidate(SHOW_ID)
+        await seat_state.get(server.db, SHOW_ID)
+        path = f"/api/shows/{SHOW_ID}/seats/stream"
+
+        slow_every = round(1 / args.slow) if args.slow else 0
+        slow = [bool(slow_every) and n % slow_every == 0 for n in range(args.subscribers)]
+        arrivals = Arrivals(slow.count(False))
+        subscribers = [StreamSubscriber(n, slow[n], arrivals) for n in range(args.subscribers)]
+        rss_before = rss_bytes()
+        start = time.perf_counter()
+        tasks = [asyncio.create_task(s.run(server.app, path)) for s in subscribers]
+        await asyncio.wait_for(asyncio.gather(*(s.snapshot.wait() for s in subscribers)), args.timeout)
+        connect_seconds = time.perf_counter() - start
+        rss_per_subscriber = (rss_bytes() - rss_before) / args.subscribers
+
+        http = httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://tickethub")
+        latencies, fan_out, missed = [], [], 0
+        seats = [f"{chr(ord('A') + r)}{n}" for r in range(args.rows) for n in range(1, args.seats_per_row + 1)]
+        try:
+            for i in range(args.deltas):
+                sent = time.perf_counter()
+                response = await http.post("/api/seats/reserve", json={
+                    "show_id": SHOW_ID, "session_id": f"bench-feed-{i}", "seats": [seats[i % len(seats)]]
+                })
+                response.raise_for_status()
+                version = seat_state.peek(SHOW_ID).version
+                try:
+                    await asyncio.wait_for(arrivals.complete[version].wait(), args.timeout)
+                except asyncio.TimeoutError:
+                    missed += 1
+                    continue
+                delays = [(t - sent) * 1000 for t in arrivals.times[version]]
+                latencies.extend(delays)
+                fan_out.append(max(delays))
+            resyncing = sum(1 for c in seat_feed.channels.values() for s in c.subscribers if s.resync)
+        finally:
+            await http.aclose()
+            for s in subscribers:
+                s.unblock.set()
+                s.disconnect.set()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    latencies.sort()
+    fan_out.sort()
+    return {
+        "config": vars(args),
+        "subscribers": args.subscribers,
+        "slow_subscribers": slow.count(True),
+        "connect_seconds": round(connect_seconds, 2),
+        "rss_kb_per_subscriber": round(rss_per_subscriber / 1024, 1),
+        "delta_p50_ms": round(percentile(latencies, 0.5), 2),
+        "delta_p99_ms": round(percentile(latencies, 0.99), 2),
+        "fan_out_p50_ms": round(percentile(fan_out, 0.5), 2),
+        "fan_out_max_ms": round(fan_out[-1], 2) if fan_out else None,
+        "deltas_missed": missed,
+        "slow_subscribers_resyncing": resyncing,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Live seat-map fan-out benchmark")
+    parser.add_argument("--mongo-url", default=os.getenv("MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--db", default="tickethub_bench")
+    parser.add_argument("--subscribers", type=int, default=10000)
+    parser.add_argument("--slow", type=float, default=0.05, help="share of subscribers that stop reading")
+    parser.add_argument("--deltas", type=int, default=100, help="seat holds made while subscribed")
+    parser.add_argument("--rows", type=int, default=26)
+    parser.add_argument("--seats-per-row", type=int, default=40)
+    parser.add_argument("--timeout", type=float, default=60, help="seconds to wait for snapshots or a delta")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    os.environ["MONGO_URL"] = args.mongo_url
+    os.environ["DB_NAME"] = args.db
+    # Every hold comes from the harness' address
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    result = asyncio.run(run(args))
+    if args.json:
+        json.dump(result, sys.stdout, indent=2)
+        print()
+        return
+    print(f"{result['subscribers']} subscribers ({result['slow_subscribers']} stalled), "
+          f"all snapshots in {result['connect_seconds']} s, {result['rss_kb_per_subscriber']} KB each")
+    print(f"delta latency p50 {result['delta_p50_ms']} ms, p99 {result['delta_p99_ms']} ms; "
+          f"last subscriber p50 {result['fan_out_p50_ms']} ms, max {result['fan_out_max_ms']} ms")
+    print(f"{result['deltas_missed']} deltas missed, "
+          f"{result['slow_subscribers_resyncing']} stalled subscribers switched to resync")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Best-available seat finder on large, fragmented halls.
+
+    cd backend && python -m benchmarks.seat_finder [--json]
+
+Builds in-memory seat maps from a small hall up to IMAX-sized and larger
+layouts, books a random share of the seats to fragment them, and times
+best_available for a range of group sizes. No database is needed.
+
+Reported per hall, fill level and group size: microseconds per search,
+microseconds per 1,000 seats (flat if the search is linear in the seats),
+how often the group got one contiguous block, and how often a search
+left a newly stranded single seat.
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from datetime import datetime
+
+from utils.seat_finder import best_available
+from utils.seat_state import ShowSeatMap
+
+HALLS = [("single screen", 12, 20), ("multiplex", 20, 30), ("IMAX", 26, 40), ("arena", 40, 60)]
+
+
+def fragmented_hall(rows: int, seats_per_row: int, fill: float, rng: random.Random) -> ShowSeatMap:
+    labels = [chr(ord("A") + i) if i < 26 else f"A{chr(ord('A') + i - 26)}" for i in range(rows)]
+    seat_map = ShowSeatMap("bench", {}, {"rows": labels, "seats_per_row": seats_per_row})
+    total = rows * seats_per_row
+    seat_map.booked = sum(1 << i for i in rng.sample(range(total), int(total * fill)))
+    return seat_map
+
+
+def free_runs(free: int):
+    """(start, length) of each run of set bits in free, lowest first"""
+    while free:
+        start = (free & -free).bit_length() - 1
+        shifted = free >> start
+        # Trailing ones of shifted
+        length = (shifted ^ (shifted + 1)).bit_length() - 1
+        yield start, length
+        free &= ~(((1 << length) - 1) << start)
+
+
+def single_seats(seat_map: ShowSeatMap, taken: int) -> int:
+    width = seat_map.seats_per_row
+    row_mask = (1 << width) - 1
+    return sum(
+        sum(1 for _, length in free_runs(~(taken >> (r * width)) & row_mask) if length == 1)
+        for r in range(len(seat_map.rows))
+    )
+
+
+def run(args):
+    rng = random.Random(args.seed)
+    now = datetime.utcnow()
+    results = []
+    for name, rows, seats_per_row in HALLS:
+        for fill in args.fills:
+            for group in args.groups:
+                timings, contiguous, orphaned, found = [], 0, 0, 0
+                for _ in range(args.halls):
+                    seat_map = fragmented_hall(rows, seats_per_row, fill, rng)
+                    start = time.perf_counter()
+                    for _ in range(args.repeat):
+                        seats = best_available(seat_map, "bench-session", group, now)
+                    timings.append((time.perf_counter() - start) / args.repeat)
+                    if not seats:
+                        continue
+                    found += 1
+                    indexes = sorted(seat_map.index(seat) for seat in seats)
+                    same_row = indexes[0] // seats_per_row == indexes[-1] // seats_per_row
+                    contiguous += same_row and indexes[-1] - indexes[0] == group - 1
+                    before = single_seats(seat_map, seat_map.booked)
+                    after = single_seats(seat_map, seat_map.booked | seat_map.mask(seats))
+                    orphaned += after > before
+                timings.sort()
+                micros = timings[len(timings) // 2] * 1e6
+                results.append({
+                    "hall": name,
+                    "seats": rows * seats_per_row,
+                    "fill": fill,
+                    "group": group,
+                    "search_us": round(micros, 1),
+                    "us_per_1000_seats": round(micros * 1000 / (rows * seats_per_row), 1),
+                    "found": found,
+                    "contiguous_share": round(contiguous / found, 3) if found else None,
+                    "orphaning_share": round(orphaned / found, 3) if found else None,
+                })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Best-available seat finder benchmark")
+    parser.add_argument("--fills", type=float, nargs="+", default=[0.3, 0.7, 0.9], help="share of seats already sold")
+    parser.add_argument("--groups", type=int, nargs="+", default=[2, 4, 6, 10])
+    parser.add_argument("--halls", type=int, default=50, help="random halls per configuration")
+    parser.add_argument("--repeat", type=int, default=20, help="searches timed per hall")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = run(args)
+    if args.json:
+        json.dump({"config": vars(args), "results": results}, sys.stdout, indent=2)
+        print()
+        return
+    print(f"{'hall':>13} {'seats':>6} {'fill':>5} {'group':>6} {'us':>8} {'us/1k':>7} {'contig':>7} {'orphans':>8}")
+    for r in results:
+        contiguous = "-" if r["contiguous_share"] is None else f"{r['contiguous_share']:.0%}"
+        orphaning = "-" if r["orphaning_share"] is None else f"{r['orphaning_share']:.0%}"
+        print(f"{r['hall']:>13} {r['seats']:>6} {r['fill']:>5} {r['group']:>6} {r['search_us']:>8} "
+              f"{r['us_per_1000_seats']:>7} {contiguous:>7} {orphaning:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Seat-map read fan-in: Mongo load per show as concurrent readers grow.
+
+    cd backend && python -m benchmarks.seat_map_reads [--readers 1,10,100,1000,5000] [--json]
+
+Needs a local mongod (MONGO_URL, default mongodb://localhost:27017). One
+show is seeded in its own database (--db) with a fragmented hall of sold
+and held seats. For every reader count the show is dropped from seat state,
+so each round starts cold, and then:
+
+- per-request load: every reader builds the seat map from Mongo itself,
+  the cost of serving the endpoint without shared state
+- GET /seats: every reader calls the endpoint at once through the app
+- If-None-Match: every reader revalidates with the ETag it already has
+
+Mongo commands are counted by a pymongo command listener. Per-request
+load grows with the readers; the endpoint's stays at one load per show,
+and revalidations are answered with 304s and no body.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+# Registers the command listener before server.connect_db() creates the MongoClient
+from benchmarks.funnel import commands, percentile
+
+SHOW_ID = "bench-seat-map-show"
+THEATER_ID = "bench-seat-map-theater"
+
+
+async def seed(db, args):
+    rows = [chr(ord("A") + i) for i in range(args.rows)]
+    await db.theaters.replace_one({"_id": THEATER_ID}, {
+        "_id": THEATER_ID, "name": "Benchmark Hall", "city": "Bench",
+        "seat_layout": {"rows": rows, "seats_per_row": args.seats_per_row}
+    }, upsert=True)
+    await db.shows.replace_one({"_id": SHOW_ID}, {
+        "_id": SHOW_ID, "theater_id": THEATER_ID, "movie_id": "bench", "show_date": "2099-01-01",
+        "show_time": "19:00", "price": 250, "available_seats": args.rows * args.seats_per_row
+    }, upsert=True)
+    await db.seat_reservations.delete_many({"show_id": SHOW_ID})
+    await db.bookings.delete_many({"show_id": SHOW_ID})
+
+    rng = random.Random(args.seed)
+    seats = [f"{row}{n}" for row in rows for n in range(1, args.seats_per_row + 1)]
+    expires_at = datetime.utcnow() + timedelta(hours=1)
+    reservations = []
+    for i, seat in enumerate(rng.sample(seats, int(len(seats) * args.taken))):
+        held = i % 3 == 0
+        reservations.append({
+            "_id": f"{SHOW_ID}:{seat}", "show_id": SHOW_ID, "seat": seat,
+            "session_id": f"bench-session-{i % 97}" if held else None,
+            "status": "held" if held else "sold",
+            "expires_at": expires_at if held else None,
+            **({} if held else {"booking_id": f"bench-booking-{i}"}),
+        })
+    if reservations:
+        await db.seat_reservations.insert_many(reservations)
+    return len(seats), len(reservations)
+
+
+async def timed(coroutine, latencies: List[float]):
+    start = time.perf_counter()
+    result = await coroutine
+    latencies.append((time.perf_counter() - start) * 1000)
+    return result
+
+
+async def run_round(http, db, seat_state, readers: int) -> Dict:
+    from utils.serialization import dumps
+
+    async def load_and_encode():
+        seat_map = await seat_state._load(db, SHOW_ID)
+        return dumps(seat_map.snapshot(datetime.utcnow()))
+
+    before = commands.count
+    await asyncio.gather(*(load_and_encode() for _ in range(readers)))
+    uncached = commands.count - before
+
+    seat_state.invalidate(SHOW_ID)
+    latencies: List[float] = []
+    before = commands.count
+    responses = await asyncio.gather(*(timed(http.get(f"/api/shows/{SHOW_ID}/seats"), latencies)
+                                       for _ in range(readers)))
+    coalesced = commands.count - before
+    latencies.sort()
+    etag = responses[0].headers["etag"]
+
+    before = commands.count
+    revalidated = await asyncio.gather(*(http.get(f"/api/shows/{SHOW_ID}/seats", headers={"If-None-Match": etag})
+                                         for _ in range(readers)))
+    return {
+        "readers": readers,
+        "per_request_load_commands": uncached,
+        "endpoint_commands": coalesced,
+        "endpoint_errors": sum(r.status_code != 200 for r in responses),
+        "endpoint_p50_ms": round(percentile(latencies, 0.5), 2),
+        "endpoint_p99_ms": round(percentile(latencies, 0.99), 2),
+        "revalidate_commands": commands.count - before,
+        "not_modified": sum(r.status_code == 304 for r in revalidated),
+        "body_bytes": len(responses[0].content),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Seat-map read fan-in benchmark")
+    parser.add_argument("--mongo-url", default=os.getenv("MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--db", default="tickethub_bench")
+    parser.add_argument("--readers", default="1,10,100,1000,5000", help="comma-separated concurrent reader counts")
+    parser.add_argument("--rows", type=int, default=26)
+    parser.add_argument("--seats-per-row", type=int, default=40)
+    parser.add_argument("--taken", type=float, default=0.6, help="share of seats sold or held")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    os.environ["MONGO_URL"] = args.mongo_url
+    os.environ["DB_NAME"] = args.db
+    import httpx
+    import server
+    from utils.seat_state import seat_state
+
+    # The endpoint is measured without the lifespan, whose background workers would add commands
+    db = server.connect_db()
+    seats, taken = await seed(db, args)
+    http = httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://tickethub", timeout=120)
+    try:
+        rounds = [await run_round(http, db, seat_state, int(n)) for n in args.readers.split(",")]
+    finally:
+        await http.aclose()
+        server.close_db()
+
+    if args.json:
+        json.dump({"config": vars(args), "seats": seats, "taken": taken, "rounds": rounds}, sys.stdout, indent=2)
+        print()
+        return
+    print(f"{seats} seats, {taken} sold or held, {rounds[0]['body_bytes']} byte seat map")
+    print(f"{'readers':>8} {'per-request':>12} {'GET /seats':>11} {'p50 ms':>8} {'p99 ms':>8} {'304s':>6} {'304 cmds':>9}")
+    for r in rounds:
+        print(f"{r['readers']:>8} {r['per_request_load_commands']:>12} {r['endpoint_commands']:>11} "
+              f"{r['endpoint_p50_ms']:>8} {r['endpoint_p99_ms']:>8} {r['not_modified']:>6} {r['revalidate_commands']:>9}")
+    print("Mongo commands per round; GET /seats should stay flat as readers grow")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
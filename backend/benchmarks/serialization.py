@@ -0,0 +1,133 @@
+"""
+Response size and encode time, before and after the serialization layer.
+
+    cd backend && python -m benchmarks.serialization [--json]
+
+"before" is the old path: full Mongo documents, a Python loop renaming
+_id, then FastAPI's jsonable_encoder and Starlette's json.dumps.
+"after" is the projected document encoded by utils.serialization.dumps.
+Runs on synthetic payloads, no database needed.
+"""
+
+import argparse
+import json
+import sys
+import time
+from datetime import datetime
+
+from fastapi.encoders import jsonable_encoder
+
+from utils.serialization import MOVIE_LISTING_FIELDS, dumps
+
+
+def movie_documents(count: int = 100):
+    return [
+        {
+            "_id": str(i),
+            "title": f"Movie {i}: The Sequel",
+            "poster": f"https://images.unsplash.com/photo-{1594908900066 + i}?w=300&h=450&fit=crop",
+            "rating": 8.0 + (i % 20) / 10,
+            "votes": f"{100 + i}K",
+            "genres": ["Action", "Drama", "Thriller"],
+            "languages": ["Hindi", "Telugu", "Tamil"],
+            "format": ["2D", "3D", "IMAX"],
+            "duration": "2h 45m",
+            "release_date": "2024-12-05",
+            "trailer": "BhQTkdZFOyo",
+            "description": "The clash is on as rivals return for an epic conclusion. " * 6,
+            "created_at": datetime.utcnow()
+        }
+        for i in range(count)
+    ]
+
+
+def seat_map_snapshot(rows: int = 20, seats_per_row: int = 30):
+    labels = [f"{chr(65 + r)}{c + 1}" for r in range(rows) for c in range(seats_per_row)]
+    return {
+        "version": int(time.time() * 1000),
+        "rows": [chr(65 + r) for r in range(rows)],
+        "seats_per_row": seats_per_row,
+        "booked_seats": labels[::2],
+        "reserved_seats": labels[1::7],
+    }
+
+
+def booking():
+    return {
+        "booking_id": "TH01JB4X8KQ2M9PZ",
+        "movie": {"id": "1", "title": "Pushpa 2: The Rule", "poster": "https://images.unsplash.com/photo-1594908900066",
+                  "genres": ["Action", "Drama", "Thriller"]},
+        "showtime": {"time": "07:30 PM", "format": "IMAX"},
+        "theater": {"name": "PVR Phoenix Palladium", "location": "Lower Parel, Mumbai"},
+        "seats": ["F10", "F11", "F12"],
+        "email": "user@example.com",
+        "phone": "9876543210",
+        "total_amount": 960,
+        "payment_status": "success",
+        "created_at": datetime.utcnow()
+    }
+
+
+def before_listing(documents):
+    movies = [dict(doc) for doc in documents]
+    for movie in movies:
+        movie["id"] = str(movie.pop("_id"))
+    return starlette_dumps({"movies": movies})
+
+
+def after_listing(documents):
+    # Mongo applies the projection server side; included here so both sides start from raw documents
+    movies = [{"id": doc["_id"], **{field: doc[field] for field in MOVIE_LISTING_FIELDS}} for doc in documents]
+    return dumps({"movies": movies})
+
+
+def starlette_dumps(payload):
+    return json.dumps(
+        jsonable_encoder(payload), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def measure(encode, payload, min_seconds: float = 0.5):
+    body = encode(payload)
+    runs, start = 0, time.perf_counter()
+    while True:
+        encode(payload)
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return len(body), elapsed / runs * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serialization benchmark")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    cases = [
+        ("GET /api/movies", before_listing, after_listing, movie_documents()),
+        ("GET /api/shows/{id}/seats", starlette_dumps, dumps, seat_map_snapshot()),
+        ("GET /api/bookings/{id}", starlette_dumps, dumps, booking()),
+    ]
+    results = []
+    for name, before, after, payload in cases:
+        before_bytes, before_us = measure(before, payload)
+        after_bytes, after_us = measure(after, payload)
+        results.append({
+            "endpoint": name,
+            "before": {"bytes": before_bytes, "encode_us": round(before_us, 1)},
+            "after": {"bytes": after_bytes, "encode_us": round(after_us, 1)},
+        })
+
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+        return
+    print(f"{'endpoint':28} {'bytes before':>12} {'bytes after':>12} {'µs before':>10} {'µs after':>10} {'speedup':>8}")
+    for r in results:
+        b, a = r["before"], r["after"]
+        print(f"{r['endpoint']:28} {b['bytes']:>12} {a['bytes']:>12} {b['encode_us']:>10} {a['encode_us']:>10} "
+              f"{b['encode_us'] / a['encode_us']:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Worker startup time and first-request latency, with and without warm-up.
+
+    cd backend && python -m benchmarks.startup [--runs 5] [--skip-seed] [--json]
+
+Needs a local mongod (MONGO_URL, default mongodb://localhost:27017). The
+harness seeds its own database (--db) with benchmarks.dataset, then starts
+fresh worker processes, so every run pays the real import cost. Each
+worker imports server.py, runs the app's lifespan and sends each probe
+request twice over httpx's ASGI transport:
+
+- warm: the lifespan as shipped, pool opened and hot caches filled
+- cold: warm-up skipped and MONGO_MIN_POOL_SIZE=0, so the first requests
+  open connections and load the caches themselves
+
+Reported per mode: import and lifespan startup time, and the first and
+second latency of each probe. With warm-up the first request should cost
+about what the second does, at the price of a longer startup.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+PROBES = ["/api/movies", "/api/shows/{show_id}/seats", "/api/health/ready"]
+
+
+async def child(args):
+    start = time.perf_counter()
+    import server
+    import_ms = (time.perf_counter() - start) * 1000
+    import httpx
+
+    if args.mode == "cold":
+        async def skip_warm_up():
+            pass
+        server.warm_up = skip_warm_up
+
+    result = {"import_ms": round(import_ms, 1), "probes": {}}
+    start = time.perf_counter()
+    async with server.app.router.lifespan_context(server.app):
+        result["startup_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        http = httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://tickethub")
+        try:
+            for probe in PROBES:
+                url = probe.format(show_id=args.show)
+                timings = []
+                for _ in range(2):
+                    start = time.perf_counter()
+                    response = await http.get(url)
+                    timings.append(round((time.perf_counter() - start) * 1000, 2))
+                    response.raise_for_status()
+                result["probes"][probe] = timings
+        finally:
+            await http.aclose()
+    json.dump(result, sys.stdout)
+
+
+async def seed(args) -> str:
+    """Seed unless asked not to, and return one of today's shows"""
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from benchmarks.dataset import DatasetConfig, generate
+
+    client = AsyncIOMotorClient(args.mongo_url)
+    db = client[args.db]
+    try:
+        if not args.skip_seed:
+            print("Seeding dataset...", file=sys.stderr)
+            await generate(db, DatasetConfig(movies=args.movies, days=2, bookings=args.bookings))
+        show = await db.shows.find_one({}, {"_id": 1}, sort=[("show_date", 1), ("show_time", 1)])
+    finally:
+        client.close()
+    if show is None:
+        sys.exit(f"No shows in {args.db}, run without --skip-seed")
+    return show["_id"]
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def run_mode(args, mode: str, show_id: str):
+    env = dict(os.environ, MONGO_URL=args.mongo_url, DB_NAME=args.db, RATE_LIMIT_ENABLED="false")
+    if mode == "cold":
+        env["MONGO_MIN_POOL_SIZE"] = "0"
+    runs = []
+    for _ in range(args.runs):
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.startup", "--child", mode, "--show", show_id],
+            env=env, capture_output=True, text=True, check=True
+        ).stdout
+        runs.append(json.loads(output))
+    return {
+        "mode": mode,
+        "import_ms": median([r["import_ms"] for r in runs]),
+        "startup_ms": median([r["startup_ms"] for r in runs]),
+        "probes": {
+            probe: {
+                "first_ms": median([r["probes"][probe][0] for r in runs]),
+                "second_ms": median([r["probes"][probe][1] for r in runs]),
+            }
+            for probe in PROBES
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup and first-request latency benchmark")
+    parser.add_argument("--mongo-url", default=os.getenv("MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--db", default="tickethub_bench")
+    parser.add_argument("--runs", type=int, default=5, help="worker processes started per mode")
+    parser.add_argument("--movies", type=int, default=50)
+    parser.add_argument("--bookings", type=int, default=2000)
+    parser.add_argument("--skip-seed", action="store_true", help="reuse the data already in --db")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("--child", choices=["warm", "cold"], help=argparse.SUPPRESS)
+    parser.add_argument("--show", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        args.mode = args.child
+        asyncio.run(child(args))
+        return
+
+    show_id = asyncio.run(seed(args))
+    results = [run_mode(args, mode, show_id) for mode in ("warm", "cold")]
+    if args.json:
+        json.dump({"config": vars(args), "results": results}, sys.stdout, indent=2)
+        print()
+        return
+    for r in results:
+        print(f"{r['mode']}: import {r['import_ms']} ms, startup {r['startup_ms']} ms")
+        for probe, timing in r["probes"].items():
+            print(f"  {probe:<28} first {timing['first_ms']:>8} ms   second {timing['second_ms']:>8} ms")
+    print(f"Medians of {args.runs} worker starts per mode")
+
+
+if __name__ == "__main__":
+    main()
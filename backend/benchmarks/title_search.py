@@ -0,0 +1,166 @@
+"""
+Title search: in-memory index against the old $regex query.
+
+    cd backend && python -m benchmarks.title_search [--titles 100000] [--json]
+
+Builds a synthetic catalogue of --titles movies with titles of two to
+four words drawn from a few thousand made-up words, then times each
+query kind as a user would type it:
+
+- prefix: the first letters of a title word
+- word: a whole title word
+- two words: a word and the start of the next
+- typo: a title word with one letter changed
+
+The index side is title_index.search() in process. The regex side is the
+unanchored, case-insensitive find() that /api/movies ran before the index,
+against a local mongod (MONGO_URL, default mongodb://localhost:27017) in
+its own database (--db); --skip-regex times the index alone.
+
+The two do not match the same movies: $regex matches substrings anywhere
+("man" finds "Batman"), the index matches word prefixes plus close
+spellings, capped at 100 movies per prefix. Result counts are reported
+for both.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from typing import Dict, List
+
+from benchmarks.funnel import percentile
+from utils.title_search import TitleIndex
+
+SYLLABLES = ["ka", "ro", "mi", "tan", "el", "dor", "vi", "sha", "qu", "lin", "bar", "os", "ne", "ther", "al", "us"]
+QUERY_KINDS = ["prefix", "word", "two words", "typo"]
+
+
+def vocabulary(rng: random.Random, size: int) -> List[str]:
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def catalogue(rng: random.Random, titles: int, words: List[str]) -> List[Dict]:
+    return [
+        {
+            "id": f"movie{i}",
+            "title": " ".join(rng.choice(words).capitalize() for _ in range(rng.randint(2, 4))),
+            "rating": round(rng.uniform(1, 10), 1),
+            "votes": f"{rng.randint(1, 999)}K",
+        }
+        for i in range(titles)
+    ]
+
+
+def make_query(rng: random.Random, kind: str, movies: List[Dict]) -> str:
+    words = rng.choice(movies)["title"].lower().split()
+    word = rng.choice(words)
+    if kind == "prefix":
+        return word[:rng.randint(2, 4)]
+    if kind == "word":
+        return word
+    if kind == "two words":
+        return f"{words[0]} {words[1][:3]}"
+    i = rng.randrange(len(word))
+    return word[:i] + rng.choice("aeioustr") + word[i + 1:]
+
+
+def summarize(latencies: List[float], counts: List[int]) -> Dict:
+    latencies.sort()
+    return {
+        "p50_us": round(percentile(latencies, 0.5), 1),
+        "p99_us": round(percentile(latencies, 0.99), 1),
+        "mean_results": round(sum(counts) / len(counts), 1),
+    }
+
+
+async def regex_path(args, movies: List[Dict], queries: Dict[str, List[str]]) -> Dict[str, Dict]:
+    import re
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    client = AsyncIOMotorClient(args.mongo_url)
+    db = client[args.db]
+    try:
+        await db.movies.drop()
+        for start in range(0, len(movies), 10000):
+            await db.movies.insert_many([{"_id": m["id"], **{k: v for k, v in m.items() if k != "id"}}
+                                         for m in movies[start:start + 10000]])
+        results = {}
+        for kind, kind_queries in queries.items():
+            latencies, counts = [], []
+            for query in kind_queries:
+                start = time.perf_counter()
+                # As /api/movies ran it, with the input escaped
+                found = await db.movies.find(
+                    {"title": {"$regex": re.escape(query), "$options": "i"}}, {"_id": 1}
+                ).limit(100).to_list(length=100)
+                latencies.append((time.perf_counter() - start) * 1e6)
+                counts.append(len(found))
+            results[kind] = summarize(latencies, counts)
+        return results
+    finally:
+        client.close()
+
+
+def index_path(index: TitleIndex, queries: Dict[str, List[str]], limit: int) -> Dict[str, Dict]:
+    results = {}
+    for kind, kind_queries in queries.items():
+        latencies, counts = [], []
+        for query in kind_queries:
+            start = time.perf_counter()
+            found = index.search(query, limit=limit)
+            latencies.append((time.perf_counter() - start) * 1e6)
+            counts.append(len(found))
+        results[kind] = summarize(latencies, counts)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Title search index vs $regex benchmark")
+    parser.add_argument("--mongo-url", default=os.getenv("MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--db", default="tickethub_bench")
+    parser.add_argument("--titles", type=int, default=100000)
+    parser.add_argument("--words", type=int, default=5000, help="distinct words titles are made of")
+    parser.add_argument("--queries", type=int, default=200, help="queries timed per kind")
+    parser.add_argument("--limit", type=int, default=10, help="results per index search, as the autocomplete")
+    parser.add_argument("--skip-regex", action="store_true", help="time the index only, no mongod needed")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    movies = catalogue(rng, args.titles, vocabulary(rng, args.words))
+    queries = {kind: [make_query(rng, kind, movies) for _ in range(args.queries)] for kind in QUERY_KINDS}
+
+    index = TitleIndex()
+    start = time.perf_counter()
+    index.build(movies)
+    build_seconds = time.perf_counter() - start
+
+    result = {
+        "config": vars(args),
+        "index_build_seconds": round(build_seconds, 2),
+        "index": index_path(index, queries, args.limit),
+        "regex": None if args.skip_regex else asyncio.run(regex_path(args, movies, queries)),
+    }
+    if args.json:
+        json.dump(result, sys.stdout, indent=2)
+        print()
+        return
+    print(f"{args.titles} titles, index built in {result['index_build_seconds']} s")
+    print(f"{'query':>10} {'index p50 us':>13} {'p99 us':>9} {'results':>8} {'regex p50 us':>13} {'p99 us':>9} {'results':>8}")
+    for kind in QUERY_KINDS:
+        i = result["index"][kind]
+        r = result["regex"][kind] if result["regex"] else {"p50_us": "-", "p99_us": "-", "mean_results": "-"}
+        print(f"{kind:>10} {i['p50_us']:>13} {i['p99_us']:>9} {i['mean_results']:>8} "
+              f"{r['p50_us']:>13} {r['p99_us']:>9} {r['mean_results']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Waiting-room simulation: admissions into the booking funnel under a spike.
+
+    cd backend && python -m benchmarks.waiting_room [--spike 100] [--json]
+
+Clients arrive at --base-rate per second, then at --spike times that for
+--spike-seconds. Each one joins the queue and polls at the poll_after the
+server suggests until it is admitted. The clock is simulated, so the run
+takes a few seconds. The report shows, per time window, how many
+clients arrived and how many were admitted. Without the waiting room,
+admissions would equal arrivals. With it they stay at the drain rate,
+apart from the initial burst.
+"""
+
+import argparse
+import heapq
+import json
+import random
+import sys
+import time
+import uuid
+
+from utils.waiting_room import WaitingRoom
+
+
+class SimulatedClock:
+    def __init__(self):
+        # Start at the real time so signed tokens carry sensible expiry times
+        self.now = time.time()
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def simulate(args):
+    clock = SimulatedClock()
+    start = clock.now
+    room = WaitingRoom(rate=args.rate, burst=args.burst, clock=clock)
+    rng = random.Random(args.seed)
+    show_id = "opening-night"
+
+    # (time, sequence, kind, payload)
+    events = []
+    sequence = 0
+    t = 0.0
+    total = args.warmup_seconds + args.spike_seconds + args.cooldown_seconds
+    while t < total:
+        spiking = args.warmup_seconds <= t < args.warmup_seconds + args.spike_seconds
+        rate = args.base_rate * (args.spike if spiking else 1)
+        t += rng.expovariate(rate)
+        events.append((start + t, sequence, "arrive", None))
+        sequence += 1
+    heapq.heapify(events)
+
+    arrivals, admissions, polls, waits = [], [], 0, []
+    while events:
+        at, _, kind, payload = heapq.heappop(events)
+        clock.now = at
+        if kind == "arrive":
+            arrivals.append(at - start)
+            ticket = room.join(show_id, uuid.uuid4().hex)
+            joined_at = at
+        else:
+            polls += 1
+            token, joined_at = payload
+            ticket = room.status(show_id, token)
+        if ticket["status"] == "admitted":
+            admissions.append(at - start)
+            waits.append(at - joined_at)
+        else:
+            heapq.heappush(events, (at + ticket["poll_after_seconds"], sequence, "poll", (ticket["queue_token"], joined_at)))
+            sequence += 1
+
+    window = args.window
+    windows = []
+    end = max(arrivals[-1], admissions[-1]) if admissions else arrivals[-1]
+    for i in range(int(end // window) + 1):
+        lo, hi = i * window, (i + 1) * window
+        windows.append({
+            "from_s": lo,
+            "arrivals_per_s": round(sum(lo <= a < hi for a in arrivals) / window, 1),
+            "admissions_per_s": round(sum(lo <= a < hi for a in admissions) / window, 1),
+        })
+    waits.sort()
+    return {
+        "config": vars(args),
+        "clients": len(arrivals),
+        "admitted": len(admissions),
+        # The tickethub_waiting_room_admissions_total metric, which should match
+        "admitted_counter": room.admitted,
+        "polls": polls,
+        "wait_p50_s": round(waits[len(waits) // 2], 1),
+        "wait_p99_s": round(waits[int(len(waits) * 0.99)], 1),
+        "peak_admissions_per_s": max(w["admissions_per_s"] for w in windows),
+        "windows": windows,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Waiting-room spike simulation")
+    parser.add_argument("--rate", type=float, default=20, help="admissions per second")
+    parser.add_argument("--burst", type=int, default=20)
+    parser.add_argument("--base-rate", type=float, default=2, help="arrivals per second before the spike")
+    parser.add_argument("--spike", type=float, default=100, help="arrival rate multiplier during the spike")
+    parser.add_argument("--warmup-seconds", type=float, default=60)
+    parser.add_argument("--spike-seconds", type=float, default=30)
+    parser.add_argument("--cooldown-seconds", type=float, default=60)
+    parser.add_argument("--window", type=float, default=30, help="report window in seconds")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    result = simulate(args)
+    if args.json:
+        json.dump(result, sys.stdout, indent=2)
+        print()
+        return
+    print(f"{result['clients']} clients, {result['polls']} status polls, "
+          f"wait p50 {result['wait_p50_s']} s, p99 {result['wait_p99_s']} s")
+    print(f"{'from (s)':>9} {'arrivals/s':>11} {'admitted/s':>11}")
+    for w in result["windows"]:
+        print(f"{w['from_s']:>9.0f} {w['arrivals_per_s']:>11} {w['admissions_per_s']:>11}")
+    print(f"peak admissions {result['peak_admissions_per_s']}/s with a drain rate of {args.rate}/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Deliver queued confirmation emails from the email_outbox collection.
+Run one or more alongside the API; workers share the outbox safely.
+Each API process also delivers emails itself unless it is started with
+EMAIL_WORKER_INLINE=false:
+
+    EMAIL_WORKER_INLINE=false uvicorn server:app
+    python email_worker.py
+
+Without SMTP_HOST the emails are only logged. For an offline load test,
+start the local sink and point the worker at it:
+
+    python smtp_sink.py --port 2525
+    SMTP_HOST=127.0.0.1 SMTP_PORT=2525 python email_worker.py
+"""
+
+import asyncio
+import logging
+from motor.motor_asyncio import AsyncIOMotorClient
+import os
+from dotenv import load_dotenv
+from pathlib import Path
+
+from utils.email_outbox import EmailDeliveryWorker
+from utils.indexes import ensure_indexes
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+# MongoDB connection
+mongo_url = os.environ['MONGO_URL']
+client = AsyncIOMotorClient(mongo_url)
+db = client[os.environ['DB_NAME']]
+
+async def main():
+    """Run the delivery worker until interrupted"""
+    await ensure_indexes(db)
+    worker = EmailDeliveryWorker(db)
+    try:
+        await worker.run()
+    finally:
+        await worker.stop()
+        print(f"✓ Email delivery stopped: {worker.stats()}")
+        client.close()
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
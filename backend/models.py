@@ -91,6 +91,9 @@ class Show(BaseModel):
     format: str
     price: int
     available_seats: int
+    hold_minutes: Optional[int] = None  # seat hold duration, defaults to HOLD_MINUTES
+    waiting_room: bool = False  # gate reservations behind the virtual waiting room
+    max_seats_per_session: Optional[int] = None  # defaults to MAX_SEATS_PER_SESSION
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
     class Config:
@@ -100,7 +103,7 @@ class Show(BaseModel):
 # Booking Models
 class BookingCreate(BaseModel):
     show_id: str
-    seats: List[str]
+    seats: List[str] = Field(min_length=1)
     email: EmailStr
     phone: str
     session_id: str
@@ -113,6 +116,7 @@ class Booking(BaseModel):
     seats: List[str]
     email: EmailStr
     phone: str
+    session_id: Optional[str] = None
     total_amount: int
     payment_status: str = "pending"  # pending, success, failed
     payment_id: Optional[str] = None
@@ -125,11 +129,13 @@ class Booking(BaseModel):
 
 # Seat Reservation Models
 class SeatReservation(BaseModel):
-    id: str = Field(default_factory=lambda: str(ObjectId()), alias="_id")
+    id: str = Field(alias="_id")  # "{show_id}:{seat}", one document per seat
     show_id: str
-    seats: List[str]
-    session_id: str
-    expires_at: datetime
+    seat: str
+    session_id: Optional[str] = None
+    status: str = "held"  # held, sold
+    expires_at: Optional[datetime] = None  # unset once sold
+    booking_id: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
     class Config:
@@ -141,9 +147,73 @@ class SeatReserveRequest(BaseModel):
     seats: List[str]
     session_id: str
 
+class BestSeatsRequest(BaseModel):
+    show_id: str
+    count: int = Field(ge=1)
+    session_id: str
+
+# Waiting Room Models
+class QueueJoinRequest(BaseModel):
+    session_id: str
+
 # Payment Models
 class PaymentVerify(BaseModel):
     booking_id: str
     razorpay_payment_id: str
     razorpay_order_id: str
     razorpay_signature: str
+
+# Response Models
+# Documentation only: routes return pre-shaped dicts encoded by orjson
+# (utils/serialization.py) instead of validating every response
+class MovieSummary(BaseModel):
+    id: str
+    title: str
+    poster: str
+    rating: float
+    votes: str
+    genres: List[str]
+    languages: List[str]
+    format: List[str]
+    duration: str
+    release_date: str
+
+class MovieListing(BaseModel):
+    movies: List[MovieSummary]
+
+class MovieDetail(MovieSummary):
+    trailer: str
+    description: str
+
+class SeatMap(BaseModel):
+    version: int
+    rows: List[str]
+    seats_per_row: int
+    booked_seats: List[str]
+    reserved_seats: List[str]
+
+class BookingMovie(BaseModel):
+    id: str
+    title: str
+    poster: str
+    genres: List[str]
+
+class BookingShowtime(BaseModel):
+    time: str
+    format: str
+
+class BookingTheater(BaseModel):
+    name: str
+    location: str
+
+class BookingView(BaseModel):
+    booking_id: str
+    movie: BookingMovie
+    showtime: BookingShowtime
+    theater: BookingTheater
+    seats: List[str]
+    email: str
+    phone: str
+    total_amount: int
+    payment_status: str
+    created_at: datetime
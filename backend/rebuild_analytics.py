@@ -0,0 +1,37 @@
+"""
+Rebuild the pre-aggregated analytics collection from bookings.
+Run after restoring data or whenever the counters need to be recomputed.
+"""
+
+import asyncio
+from motor.motor_asyncio import AsyncIOMotorClient
+import os
+from dotenv import load_dotenv
+from pathlib import Path
+
+from utils.analytics import rebuild_analytics
+from utils.indexes import ensure_indexes
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+# MongoDB connection
+mongo_url = os.environ['MONGO_URL']
+client = AsyncIOMotorClient(mongo_url)
+db = client[os.environ['DB_NAME']]
+
+async def main():
+    """Main rebuild function"""
+    print("Rebuilding analytics...")
+    
+    try:
+        await ensure_indexes(db)
+        await rebuild_analytics(db)
+        print(f"✓ Rebuilt {await db.analytics.count_documents({})} analytics counters")
+    except Exception as e:
+        print(f"\n✗ Error rebuilding analytics: {e}")
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
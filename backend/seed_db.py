@@ -1,15 +1,28 @@
 """
 Database seeding script for TicketHub
 Populates MongoDB with initial movies, theaters, and shows data
+
+    python seed_db.py                  # the sample catalogue
+    python seed_db.py --generate --cities 50 --theaters-per-city 40 --days 14 --bookings 5_000_000
+
+--generate replaces the catalogue with a synthetic dataset of production
+scale (see benchmarks/dataset.py), deterministic for a given --seed and
+--start-date, and reports load throughput.
 """
 
+import argparse
 import asyncio
+import time
 from motor.motor_asyncio import AsyncIOMotorClient
 from datetime import datetime, timedelta
 import os
 from dotenv import load_dotenv
 from pathlib import Path
 
+from benchmarks.dataset import DatasetConfig, generate
+from utils.catalogue_cache import catalogue_changed
+from utils.indexes import ensure_indexes
+
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
@@ -213,13 +226,13 @@ async def seed_shows():
     
     for movie_id in movie_ids:
         for theater_id in theater_ids:
-            for i, time in enumerate(times):
+            for i, show_time in enumerate(times):
                 shows.append({
                     "_id": str(show_id_counter),
                     "movie_id": movie_id,
                     "theater_id": theater_id,
                     "show_date": today,
-                    "show_time": time,
+                    "show_time": show_time,
                     "format": formats[i],
                     "price": prices[i],
                     "available_seats": 200,
@@ -241,6 +254,10 @@ async def main():
         await seed_movies()
         await seed_theaters()
         await seed_shows()
+        await ensure_indexes(db)
+        print("✓ Ensured indexes")
+        await catalogue_changed(db)
+        print("✓ Invalidated running catalogue caches")
         
         print("\n✓ Database seeding completed successfully!")
         print("\nDatabase now contains:")
@@ -253,5 +270,60 @@ async def main():
     finally:
         client.close()
 
+async def generate_dataset(args):
+    """Load a synthetic dataset sized by the command line"""
+    config = DatasetConfig(
+        cities=args.cities, theaters_per_city=args.theaters_per_city, movies=args.movies,
+        days=args.days, shows_per_day=args.shows_per_day, bookings=args.bookings, seed=args.seed,
+        batch_size=args.batch_size, concurrency=args.writers
+    )
+    if args.start_date:
+        config.start_date = datetime.strptime(args.start_date, "%Y-%m-%d")
+    print(f"Generating {args.cities * args.theaters_per_city} theaters, "
+          f"{args.cities * args.theaters_per_city * args.days * args.shows_per_day} shows "
+          f"and up to {args.bookings} bookings (seed {args.seed})...")
+
+    start = time.perf_counter()
+    last_report = [start]
+
+    def progress(inserted):
+        now = time.perf_counter()
+        if now - last_report[0] >= 5:
+            last_report[0] = now
+            total = sum(inserted.values())
+            print(f"  {total:,} documents, {total / (now - start):,.0f} docs/s")
+
+    try:
+        counts = await generate(db, config, progress, build_indexes=False)
+        loaded = time.perf_counter() - start
+        total = sum(counts.values())
+        print(f"✓ Loaded {total:,} documents in {loaded:.1f} s ({total / loaded:,.0f} docs/s)")
+        for collection, count in sorted(counts.items()):
+            print(f"  - {count:,} {collection}")
+
+        start = time.perf_counter()
+        await ensure_indexes(db)
+        print(f"✓ Built indexes in {time.perf_counter() - start:.1f} s")
+    except Exception as e:
+        print(f"\n✗ Error generating dataset: {e}")
+    finally:
+        client.close()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Seed the TicketHub database")
+    parser.add_argument("--generate", action="store_true", help="load a synthetic dataset instead of the sample catalogue")
+    parser.add_argument("--cities", type=int, default=4)
+    parser.add_argument("--theaters-per-city", type=int, default=5)
+    parser.add_argument("--movies", type=int, default=50)
+    parser.add_argument("--days", type=int, default=14)
+    parser.add_argument("--shows-per-day", type=int, default=4, help="shows per theater per day")
+    parser.add_argument("--bookings", type=int, default=10000, help="historical confirmed bookings")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--start-date", help="first show date, YYYY-MM-DD (default today)")
+    parser.add_argument("--batch-size", type=int, default=5000, help="documents per insert_many")
+    parser.add_argument("--writers", type=int, default=8, help="insert_many calls in flight")
+    return parser.parse_args()
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    args = parse_args()
+    asyncio.run(generate_dataset(args) if args.generate else main())
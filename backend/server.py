@@ -1,39 +1,122 @@
-from fastapi import FastAPI, APIRouter, HTTPException, BackgroundTasks
+from fastapi import FastAPI, APIRouter, HTTPException, Header, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from dotenv import load_dotenv
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import DuplicateKeyError, PyMongoError
+from contextlib import asynccontextmanager
+import asyncio
 import os
+import time
 import logging
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import Optional
-import time
+from typing import List, Optional
 
 # Import models
 from models import (
     UserCreate, UserLogin,
     BookingCreate,
-    SeatReserveRequest, PaymentVerify
+    SeatReserveRequest, BestSeatsRequest, PaymentVerify, QueueJoinRequest,
+    MovieListing, MovieDetail, SeatMap, BookingView
 )
 
 # Import utilities
-from utils.auth import get_password_hash, verify_password, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
-from utils.email import send_booking_confirmation_email
-from utils.payment import create_order, verify_payment_signature
+from utils.auth import (
+    hash_password_async, verify_password_async, create_access_token,
+    PasswordPoolFull, ACCESS_TOKEN_EXPIRE_MINUTES, password_pool
+)
+from utils.booking_views import BOOKING_VIEW_PROJECTION, booking_view, load_booking_with_snapshot
+from utils.catalogue_cache import catalogue_cache
+from utils.serialization import (
+    FastJSONResponse, FastJSONRoute, MOVIE_LISTING_FIELDS, MOVIE_DETAIL_FIELDS, id_projection
+)
+from utils.title_search import title_index
+from utils.analytics import get_dashboard
+from utils.indexes import ensure_indexes
+from utils.payment import create_order, verify_payment_signature, payment_client, PaymentUnavailable
+from utils.ids import new_booking_id, booking_ids
+from utils.confirmation import confirm_booking, SeatsUnavailable
+from utils.seat_holds import acquire_holds, release_holds
+from utils.seat_state import seat_state
+from utils.seat_finder import best_available, BEST_SEATS_ATTEMPTS
+from utils.seat_feed import seat_feed
+from utils.hold_expiry import hold_expiry, hold_duration
+from utils.waiting_room import waiting_room, InvalidToken
+from utils.rate_limit import (
+    rate_limiter, RateLimited, RATE_LIMIT_BACKEND, client_ip, max_seats_per_session
+)
+from utils.event_bus import event_bus, backend_from_env as event_bus_backend
+from utils import metrics
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
+# MongoDB connection. The client is created by the lifespan below, on the
+# event loop that serves requests, which then opens and warms the pool
+# before the app takes traffic.
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+# Connections kept open (and opened at startup) so the first requests do not pay for handshakes
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "10"))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+# How long a request waits for a free connection once all MONGO_MAX_POOL_SIZE are busy
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "2000"))
+client: Optional[AsyncIOMotorClient] = None
+db = None
+
+def connect_db():
+    """Create the Mongo client unless this process already has one, and return the database"""
+    global client, db
+    if client is None:
+        client = AsyncIOMotorClient(
+            mongo_url,
+            maxPoolSize=MONGO_MAX_POOL_SIZE,
+            minPoolSize=MONGO_MIN_POOL_SIZE,
+            maxIdleTimeMS=MONGO_MAX_IDLE_TIME_MS,
+            connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+            serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+            waitQueueTimeoutMS=MONGO_WAIT_QUEUE_TIMEOUT_MS,
+            event_listeners=[metrics.MongoCommandMetrics()]
+        )
+        db = client[os.environ['DB_NAME']]
+    return db
+
+def close_db():
+    global client, db
+    if client is not None:
+        client.close()
+        client = db = None
+
+# Confirmation emails are delivered from the outbox by a worker in this process;
+# set EMAIL_WORKER_INLINE=false when email_worker.py runs alongside the API instead
+EMAIL_WORKER_INLINE = os.getenv("EMAIL_WORKER_INLINE", "true").lower() == "true"
+email_worker = None
+
+# Startup warm-up: the default movie listing and title index are always
+# loaded; WARM_SEAT_MAPS is how many of today's shows get their seat maps
+# built too. /api/health/ready fails while warming up, and when a Mongo
+# ping takes longer than READINESS_MAX_PING_MS.
+WARM_SEAT_MAPS = int(os.getenv("WARM_SEAT_MAPS", "50"))
+READINESS_MAX_PING_MS = float(os.getenv("READINESS_MAX_PING_MS", "250"))
+READINESS_TIMEOUT_SECONDS = 2.0
+ready = False
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await startup()
+    try:
+        yield
+    finally:
+        await shutdown_db_client()
 
 # Create the main app
-app = FastAPI()
+app = FastAPI(default_response_class=FastJSONResponse, lifespan=lifespan)
 
-# Create a router with the /api prefix
-api_router = APIRouter(prefix="/api")
+# Create a router with the /api prefix, results are encoded with orjson
+api_router = APIRouter(prefix="/api", route_class=FastJSONRoute)
 
 # Configure logging
 logging.basicConfig(
@@ -42,25 +125,49 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.exception_handler(PasswordPoolFull)
+async def password_pool_full_handler(request, exc: PasswordPoolFull):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server busy, please retry"},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+@app.exception_handler(PaymentUnavailable)
+async def payment_unavailable_handler(request, exc: PaymentUnavailable):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Payments are unavailable, please retry shortly"},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+@app.exception_handler(RateLimited)
+async def rate_limited_handler(request, exc: RateLimited):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "Too many requests, please retry later"},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
 # ============================================
 # AUTHENTICATION ENDPOINTS
 # ============================================
 
 @api_router.post("/auth/register")
-async def register(user_data: UserCreate):
+async def register(user_data: UserCreate, request: Request):
     """Register a new user"""
-    # Check if user already exists
-    existing_user = await db.users.find_one({"email": user_data.email})
-    if existing_user:
-        raise HTTPException(status_code=400, detail="Email already registered")
+    await rate_limiter.check("register_ip", client_ip(request))
     
-    # Create user
+    # Create user, the unique email index rejects duplicates
     user_dict = user_data.dict()
-    user_dict["password_hash"] = get_password_hash(user_dict.pop("password"))
+    user_dict["password_hash"] = await hash_password_async(user_dict.pop("password"))
     user_dict["is_admin"] = False
     user_dict["created_at"] = datetime.utcnow()
     
-    result = await db.users.insert_one(user_dict)
+    try:
+        result = await db.users.insert_one(user_dict)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Email already registered")
     user_id = str(result.inserted_id)
     
     # Create access token
@@ -79,12 +186,24 @@ async def register(user_data: UserCreate):
     }
 
 @api_router.post("/auth/login")
-async def login(credentials: UserLogin):
+async def login(credentials: UserLogin, request: Request):
     """Login user"""
+    # Every attempt costs a bcrypt verify, so throttle before touching the pool
+    await rate_limiter.check("login_ip", client_ip(request))
+    await rate_limiter.check("login_email", credentials.email.lower())
+    
     user = await db.users.find_one({"email": credentials.email})
-    if not user or not verify_password(credentials.password, user["password_hash"]):
+    if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
+    valid, new_hash = await verify_password_async(credentials.password, user["password_hash"])
+    if not valid:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    
+    # Transparently upgrade hashes made with an older cost factor
+    if new_hash:
+        await db.users.update_one({"_id": user["_id"]}, {"$set": {"password_hash": new_hash}})
+    
     # Create access token
     access_token = create_access_token(
         data={"sub": user["email"], "user_id": str(user["_id"])},
@@ -105,13 +224,32 @@ async def login(credentials: UserLogin):
 # MOVIE ENDPOINTS
 # ============================================
 
-@api_router.get("/movies")
+def cached_response(request: Request, entry) -> Response:
+    """Serve a pre-encoded body, or a 304 if the client already has it"""
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if entry.matches(request.headers.get("if-none-match")):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+@api_router.get("/movies", responses={200: {"model": MovieListing}})
 async def get_movies(
+    request: Request,
     genre: Optional[str] = None,
     language: Optional[str] = None,
     search: Optional[str] = None
 ):
     """Get all movies with optional filters"""
+    return cached_response(request, await movie_listing(genre, language, search))
+
+async def movie_listing(genre: Optional[str] = None, language: Optional[str] = None,
+                        search: Optional[str] = None):
+    """The encoded listing for a set of filters, from the catalogue cache or Mongo"""
+    await catalogue_cache.sync(db)
+    cache_key = catalogue_cache.listing_key(genre, language, search)
+    entry = catalogue_cache.get(cache_key)
+    if entry:
+        return entry
+    
     query = {}
     
     if genre and genre != "all":
@@ -120,177 +258,325 @@ async def get_movies(
     if language and language != "all":
         query["languages"] = language
     
+    # Title matching goes through the in-memory index instead of a $regex scan
+    matched_ids = None
+    search = (search or "").strip()
     if search:
-        query["title"] = {"$regex": search, "$options": "i"}
-    
-    movies_cursor = db.movies.find(query)
-    movies = await movies_cursor.to_list(length=100)
-    
-    # Convert ObjectId to string
-    for movie in movies:
-        movie["id"] = str(movie.pop("_id"))
-    
+        await sync_title_index()
+        filters = dict(query)
+
+        def matches_filters(movie: dict) -> bool:
+            return all(value in (movie.get(field) or ()) for field, value in filters.items())
+
+        # Filter before the limit, or popular titles outside the genre would crowd out the matches
+        matched_ids = [m["id"] for m in title_index.search(search, limit=100, where=matches_filters if filters else None)]
+        query["_id"] = {"$in": matched_ids}
+    
+    # Listing cards only need the summary fields, and Mongo renames _id itself
+    pipeline = [
+        {"$match": query},
+        {"$limit": 100},
+        {"$project": id_projection(MOVIE_LISTING_FIELDS)}
+    ]
+    movies = await db.movies.aggregate(pipeline).to_list(length=100)
+    
+    if matched_ids is not None:
+        rank = {movie_id: i for i, movie_id in enumerate(matched_ids)}
+        movies.sort(key=lambda movie: rank[movie["id"]])
+    
+    return catalogue_cache.put(cache_key, {"movies": movies})
+
+async def sync_title_index():
+    """Rebuild the title index when the catalogue version has moved on"""
+    await catalogue_cache.sync(db)
+    if title_index.version != catalogue_cache.version:
+        await title_index.rebuild(db, catalogue_cache.version)
+
+@api_router.get("/movies/search")
+async def search_movies(q: str, limit: int = 10):
+    """Autocomplete movie titles by prefix, tolerating small typos"""
+    await sync_title_index()
+    limit = max(1, min(limit, 50))
+    movies = [
+        {"id": m["id"], "title": m["title"], "poster": m.get("poster"), "rating": m.get("rating")}
+        for m in title_index.search(q, limit=limit)
+    ]
     return {"movies": movies}
 
-@api_router.get("/movies/{movie_id}")
-async def get_movie(movie_id: str):
+@api_router.get("/movies/{movie_id}", responses={200: {"model": MovieDetail}})
+async def get_movie(request: Request, movie_id: str):
     """Get single movie by ID"""
-    movie = await db.movies.find_one({"_id": movie_id})
-    if not movie:
+    await catalogue_cache.sync(db)
+    cache_key = ("movie", movie_id)
+    entry = catalogue_cache.get(cache_key)
+    if entry:
+        return cached_response(request, entry)
+    
+    pipeline = [
+        {"$match": {"_id": movie_id}},
+        {"$project": id_projection(MOVIE_DETAIL_FIELDS)}
+    ]
+    movies = await db.movies.aggregate(pipeline).to_list(length=1)
+    if not movies:
         raise HTTPException(status_code=404, detail="Movie not found")
     
-    movie["id"] = str(movie.pop("_id"))
-    return movie
+    movie = movies[0]
+    entry = catalogue_cache.put(cache_key, movie)
+    return cached_response(request, entry)
 
 @api_router.get("/movies/{movie_id}/shows")
 async def get_movie_shows(movie_id: str, date: Optional[str] = None, city: str = "Mumbai"):
-    """Get shows for a movie"""
-    query = {"movie_id": movie_id}
+    """Get shows for a movie, grouped by theater, in one aggregation"""
+    show_match = {"$expr": {"$eq": ["$theater_id", "$$theater_id"]}, "movie_id": movie_id}
     if date:
-        query["show_date"] = date
-    
-    shows_cursor = db.shows.find(query)
-    shows = await shows_cursor.to_list(length=100)
-    
-    # Group shows by theater
-    theaters_dict = {}
-    for show in shows:
-        theater_id = show["theater_id"]
-        if theater_id not in theaters_dict:
-            theater = await db.theaters.find_one({"_id": theater_id, "city": city})
-            if theater:
-                theaters_dict[theater_id] = {
-                    "id": str(theater["_id"]),
-                    "name": theater["name"],
-                    "location": theater["location"],
-                    "showtimes": []
-                }
-        
-        if theater_id in theaters_dict:
-            theaters_dict[theater_id]["showtimes"].append({
-                "id": str(show["_id"]),
-                "time": show["show_time"],
-                "format": show["format"],
-                "price": show["price"],
-                "available_seats": show["available_seats"]
-            })
-    
-    return {"theaters": list(theaters_dict.values())}
+        show_match["show_date"] = date
+    
+    pipeline = [
+        {"$match": {"city": city}},
+        {"$lookup": {
+            "from": "shows",
+            "let": {"theater_id": "$_id"},
+            "pipeline": [
+                {"$match": show_match},
+                {"$project": {
+                    "_id": 0,
+                    "id": {"$toString": "$_id"},
+                    "time": "$show_time",
+                    "format": 1,
+                    "price": 1,
+                    "available_seats": 1
+                }}
+            ],
+            "as": "showtimes"
+        }},
+        {"$match": {"showtimes.0": {"$exists": True}}},
+        {"$project": {
+            "_id": 0,
+            "id": {"$toString": "$_id"},
+            "name": 1,
+            "location": 1,
+            "showtimes": 1
+        }}
+    ]
+    
+    theaters = await db.theaters.aggregate(pipeline).to_list(length=None)
+    return {"theaters": theaters}
 
 # ============================================
 # BOOKING ENDPOINTS
 # ============================================
 
-@api_router.get("/shows/{show_id}/seats")
-async def get_show_seats(show_id: str):
-    """Get seat availability for a show"""
-    show = await db.shows.find_one({"_id": show_id})
-    if not show:
+@api_router.get("/shows/{show_id}/seats", responses={200: {"model": SeatMap}, 304: {"description": "Not Modified"}})
+async def get_show_seats(request: Request, show_id: str):
+    """Get seat availability for a show, a 304 if the client's If-None-Match version is current"""
+    seat_map = await seat_state.get(db, show_id)
+    if not seat_map:
         raise HTTPException(status_code=404, detail="Show not found")
     
-    theater = await db.theaters.find_one({"_id": show["theater_id"]})
-    if not theater:
-        raise HTTPException(status_code=404, detail="Theater not found")
-    
-    # Get booked seats
-    bookings_cursor = db.bookings.find({"show_id": show_id, "payment_status": "success"})
-    bookings = await bookings_cursor.to_list(length=1000)
-    booked_seats = []
-    for booking in bookings:
-        booked_seats.extend(booking["seats"])
-    
-    # Get reserved seats (not expired)
-    now = datetime.utcnow()
-    reservations_cursor = db.seat_reservations.find({
-        "show_id": show_id,
-        "expires_at": {"$gt": now}
-    })
-    reservations = await reservations_cursor.to_list(length=1000)
-    reserved_seats = []
-    for reservation in reservations:
-        reserved_seats.extend(reservation["seats"])
+    return cached_response(request, seat_map.encoded(datetime.utcnow()))
+
+@api_router.get("/shows/{show_id}/seats/stream")
+async def stream_show_seats(show_id: str, request: Request):
+    """
+    Live seat map as Server-Sent Events: one "snapshot" event, then "delta"
+    events listing seats sold, held and released. Deltas carry the seat-map
+    version; clients ignore any delta not newer than their snapshot.
+    """
+    if not await seat_state.get(db, show_id):
+        raise HTTPException(status_code=404, detail="Show not found")
     
-    return {
-        "rows": theater["seat_layout"]["rows"],
-        "seats_per_row": theater["seat_layout"]["seats_per_row"],
-        "booked_seats": booked_seats,
-        "reserved_seats": reserved_seats
-    }
+    return StreamingResponse(
+        seat_feed.stream(db, show_id, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@api_router.post("/shows/{show_id}/queue")
+async def join_queue(show_id: str, body: QueueJoinRequest, request: Request):
+    """
+    Join a show's waiting room. Returns an admission token straight away
+    if there is room, otherwise a queue token with position and ETA.
+    """
+    await rate_limiter.check("queue_ip", client_ip(request))
+    seat_map = await seat_state.get(db, show_id)
+    if not seat_map:
+        raise HTTPException(status_code=404, detail="Show not found")
+    if not waiting_room.gated(seat_map.show):
+        return {"status": "open"}
+    return waiting_room.join(show_id, body.session_id)
+
+@api_router.get("/shows/{show_id}/queue")
+async def queue_status(show_id: str, token: str):
+    """Current position and ETA for a queue token, or the admission token once it is due"""
+    try:
+        return waiting_room.status(show_id, token)
+    except InvalidToken as e:
+        raise HTTPException(status_code=401, detail=str(e))
+
+def require_admission(show: dict, session_id: str, admission_token: Optional[str]):
+    """Reject requests for waiting-room shows that were not admitted from the queue"""
+    if waiting_room.gated(show) and not waiting_room.check(show["_id"], session_id, admission_token):
+        raise HTTPException(
+            status_code=403,
+            detail=f"Admission required, join the queue at /api/shows/{show['_id']}/queue"
+        )
+
+async def place_hold(seat_map, session_id: str, seats: List[str]):
+    """Hold seats for a session, returning the expiry and any seats Mongo says are taken"""
+    # Claim the seats in memory before the first await so concurrent requests see them
+    expires_at = datetime.utcnow() + hold_duration(seat_map.show)
+    seat_state.hold(seat_map, session_id, seats, expires_at)
+    
+    # One conditional write per seat; the database rejects seats held elsewhere
+    conflicts = await acquire_holds(db, seat_map.show_id, session_id, seats, expires_at)
+    if conflicts:
+        seat_map.release(session_id)
+        hold_expiry.cancel(seat_map.show_id, session_id)
+        # acquire_holds dropped any earlier hold of this session too
+        event_bus.publish("hold_released", show_id=seat_map.show_id, session_id=session_id)
+        return expires_at, conflicts
+    
+    hold_expiry.schedule(seat_map.show_id, session_id, expires_at)
+    metrics.holds_created.inc()
+    event_bus.publish("seat_held", show_id=seat_map.show_id, session_id=session_id,
+                      seats=seats, expires_at=expires_at)
+    return expires_at, []
+
+async def release_hold(seat_map, session_id: str):
+    """Give back everything a session holds on a show"""
+    seat_map.release(session_id)
+    hold_expiry.cancel(seat_map.show_id, session_id)
+    await release_holds(db, seat_map.show_id, session_id)
+    event_bus.publish("hold_released", show_id=seat_map.show_id, session_id=session_id)
+
+async def charge_held_seats(seat_map, session_id: str, ip: str, seats: List[str], previous: List[str]):
+    """Charge a client for the seats it newly holds on a show, whatever session_ids it rotates through"""
+    # Re-selecting or extending seats the session already held costs nothing
+    acquired = set(seats) - set(previous)
+    if not acquired:
+        return
+    try:
+        await rate_limiter.check("reserve_ip_show_seats", f"{ip}:{seat_map.show_id}", cost=len(acquired))
+    except RateLimited:
+        # Over the allowance: the session goes back to the seats it held before
+        if previous:
+            await place_hold(seat_map, session_id, previous)
+        else:
+            await release_hold(seat_map, session_id)
+        raise
 
 @api_router.post("/seats/reserve")
-async def reserve_seats(reservation: SeatReserveRequest):
-    """Reserve seats temporarily for 5 minutes"""
-    show = await db.shows.find_one({"_id": reservation.show_id})
-    if not show:
+async def reserve_seats(
+    reservation: SeatReserveRequest,
+    request: Request,
+    admission_token: Optional[str] = Header(default=None, alias="X-Admission-Token")
+):
+    """Reserve seats temporarily, for the show's hold duration"""
+    ip = client_ip(request)
+    await rate_limiter.check("reserve_ip", ip)
+    await rate_limiter.check("reserve_session", reservation.session_id)
+    
+    seat_map = await seat_state.get(db, reservation.show_id)
+    if not seat_map:
         raise HTTPException(status_code=404, detail="Show not found")
+    require_admission(seat_map.show, reservation.session_id, admission_token)
     
-    # Check if seats are already booked or reserved
-    booked_seats_query = await db.bookings.find({
-        "show_id": reservation.show_id,
-        "payment_status": "success"
-    }).to_list(length=1000)
+    if not reservation.seats:
+        # An empty selection clears the session's hold
+        await release_hold(seat_map, reservation.session_id)
+        return {"success": True, "expires_at": None, "message": "Seats released"}
     
-    booked_seats = []
-    for booking in booked_seats_query:
-        booked_seats.extend(booking["seats"])
+    max_seats = max_seats_per_session(seat_map.show)
+    if len(set(reservation.seats)) > max_seats:
+        raise HTTPException(status_code=400, detail=f"At most {max_seats} seats can be held at once")
     
-    # Check reserved seats
+    # Check for conflicts against the in-memory seat state
     now = datetime.utcnow()
-    reserved_seats_query = await db.seat_reservations.find({
-        "show_id": reservation.show_id,
-        "expires_at": {"$gt": now},
-        "session_id": {"$ne": reservation.session_id}
-    }).to_list(length=1000)
-    
-    reserved_seats = []
-    for res in reserved_seats_query:
-        reserved_seats.extend(res["seats"])
-    
-    # Check for conflicts
-    unavailable = set(reservation.seats) & (set(booked_seats) | set(reserved_seats))
+    unavailable = seat_map.unavailable(reservation.seats, reservation.session_id, now)
     if unavailable:
         raise HTTPException(
             status_code=400,
-            detail=f"Seats {list(unavailable)} are not available"
+            detail=f"Seats {unavailable} are not available"
         )
     
-    # Delete existing reservation for this session
-    await db.seat_reservations.delete_many({"session_id": reservation.session_id})
-    
-    # Create new reservation
-    expires_at = datetime.utcnow() + timedelta(minutes=5)
-    reservation_doc = {
-        "show_id": reservation.show_id,
-        "seats": reservation.seats,
-        "session_id": reservation.session_id,
-        "expires_at": expires_at,
-        "created_at": datetime.utcnow()
-    }
-    
-    await db.seat_reservations.insert_one(reservation_doc)
+    previous = seat_map.held_by(reservation.session_id, now)
+    expires_at, conflicts = await place_hold(seat_map, reservation.session_id, reservation.seats)
+    if conflicts:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Seats {conflicts} are not available"
+        )
+    await charge_held_seats(seat_map, reservation.session_id, ip, reservation.seats, previous)
     
     return {
         "success": True,
         "expires_at": expires_at.isoformat(),
-        "message": "Seats reserved for 5 minutes"
+        "message": f"Seats reserved for {int(hold_duration(seat_map.show).total_seconds() // 60)} minutes"
     }
 
+@api_router.post("/seats/best-available")
+async def reserve_best_seats(
+    reservation: BestSeatsRequest,
+    request: Request,
+    admission_token: Optional[str] = Header(default=None, alias="X-Admission-Token")
+):
+    """Find and hold the best count seats together, contiguous where the show allows"""
+    ip = client_ip(request)
+    await rate_limiter.check("reserve_ip", ip)
+    await rate_limiter.check("reserve_session", reservation.session_id)
+    
+    seat_map = await seat_state.get(db, reservation.show_id)
+    if not seat_map:
+        raise HTTPException(status_code=404, detail="Show not found")
+    require_admission(seat_map.show, reservation.session_id, admission_token)
+    
+    max_seats = max_seats_per_session(seat_map.show)
+    if reservation.count > max_seats:
+        raise HTTPException(status_code=400, detail=f"At most {max_seats} seats can be held at once")
+    
+    previous = seat_map.held_by(reservation.session_id, datetime.utcnow())
+    # Seats another worker holds are only found out from Mongo; skip them and search again
+    exclude = 0
+    for _ in range(BEST_SEATS_ATTEMPTS):
+        seats = best_available(seat_map, reservation.session_id, reservation.count, datetime.utcnow(), exclude)
+        if not seats:
+            raise HTTPException(status_code=400, detail=f"{reservation.count} seats are not available")
+        expires_at, conflicts = await place_hold(seat_map, reservation.session_id, seats)
+        if not conflicts:
+            await charge_held_seats(seat_map, reservation.session_id, ip, seats, previous)
+            return {
+                "success": True,
+                "seats": seats,
+                "expires_at": expires_at.isoformat(),
+                "message": f"Seats reserved for {int(hold_duration(seat_map.show).total_seconds() // 60)} minutes"
+            }
+        exclude |= seat_map.mask(conflicts)
+    raise HTTPException(status_code=409, detail="Seats are changing too quickly, please try again")
+
+
 @api_router.post("/bookings/create")
-async def create_booking(booking_data: BookingCreate):
+async def create_booking(
+    booking_data: BookingCreate,
+    admission_token: Optional[str] = Header(default=None, alias="X-Admission-Token")
+):
     """Create a new booking"""
     show = await db.shows.find_one({"_id": booking_data.show_id})
     if not show:
         raise HTTPException(status_code=404, detail="Show not found")
+    require_admission(show, booking_data.session_id, admission_token)
     
-    # Verify reservation exists
-    reservation = await db.seat_reservations.find_one({
-        "show_id": booking_data.show_id,
-        "session_id": booking_data.session_id,
-        "expires_at": {"$gt": datetime.utcnow()}
-    })
+    # The booking must be for exactly the seats this session holds right now
+    held = await db.seat_reservations.find(
+        {"session_id": booking_data.session_id, "status": "held",
+         "show_id": booking_data.show_id, "expires_at": {"$gt": datetime.utcnow()}},
+        {"seat": 1, "_id": 0}
+    ).to_list(length=None)
     
-    if not reservation:
+    if not held:
         raise HTTPException(status_code=400, detail="Seat reservation expired")
+    if len(set(booking_data.seats)) != len(booking_data.seats) or \
+            set(booking_data.seats) != {doc["seat"] for doc in held}:
+        raise HTTPException(status_code=400, detail="Seats do not match this session's reservation")
     
     # Calculate total amount
     num_seats = len(booking_data.seats)
@@ -298,10 +584,10 @@ async def create_booking(booking_data: BookingCreate):
     total_amount = (show["price"] * num_seats) + convenience_fee
     
     # Create booking
-    booking_id = f"TH{int(time.time())}"
+    booking_id = new_booking_id()
     
     # Create Razorpay order
-    order = create_order(total_amount, receipt=booking_id)
+    order = await create_order(total_amount, receipt=booking_id)
     
     booking_doc = {
         "_id": booking_id,
@@ -310,6 +596,7 @@ async def create_booking(booking_data: BookingCreate):
         "seats": booking_data.seats,
         "email": booking_data.email,
         "phone": booking_data.phone,
+        "session_id": booking_data.session_id,
         "total_amount": total_amount,
         "payment_status": "pending",
         "razorpay_order_id": order["id"],
@@ -326,7 +613,7 @@ async def create_booking(booking_data: BookingCreate):
     }
 
 @api_router.post("/payment/verify")
-async def verify_payment(payment_data: PaymentVerify, background_tasks: BackgroundTasks):
+async def verify_payment(payment_data: PaymentVerify):
     """Verify payment and confirm booking"""
     # Verify signature
     is_valid = verify_payment_signature(
@@ -338,86 +625,65 @@ async def verify_payment(payment_data: PaymentVerify, background_tasks: Backgrou
     if not is_valid:
         raise HTTPException(status_code=400, detail="Invalid payment signature")
     
-    # Update booking
-    result = await db.bookings.update_one(
-        {"booking_id": payment_data.booking_id},
-        {
-            "$set": {
-                "payment_status": "success",
-                "payment_id": payment_data.razorpay_payment_id
-            }
-        }
-    )
-    
-    if result.modified_count == 0:
+    # Join booking, show, movie and theater in one round trip
+    booking = await load_booking_with_snapshot(db, payment_data.booking_id)
+    if not booking:
         raise HTTPException(status_code=404, detail="Booking not found")
     
-    # Get booking details
-    booking = await db.bookings.find_one({"booking_id": payment_data.booking_id})
-    show = await db.shows.find_one({"_id": booking["show_id"]})
-    movie = await db.movies.find_one({"_id": show["movie_id"]})
-    theater = await db.theaters.find_one({"_id": show["theater_id"]})
-    
-    # Delete reservation
-    await db.seat_reservations.delete_many({"show_id": booking["show_id"]})
-    
-    # Send email confirmation in background
-    email_data = {
-        "booking_id": booking["booking_id"],
-        "movie_title": movie["title"],
-        "theater_name": theater["name"],
-        "show_time": show["show_time"],
-        "seats": booking["seats"],
-        "total_amount": booking["total_amount"]
-    }
-    background_tasks.add_task(send_booking_confirmation_email, booking["email"], email_data)
-    
+    if booking["payment_status"] != "success":
+        # Flip the booking, sell the seats and decrement availability as one unit
+        try:
+            confirmed = await confirm_booking(client, db, booking, payment_data.razorpay_payment_id)
+        except SeatsUnavailable as e:
+            seat_map = seat_state.peek(booking["show_id"])
+            if seat_map and booking.get("session_id"):
+                # The buyer has to pick again, free what is left of the hold
+                await release_hold(seat_map, booking.get("session_id"))
+            await db.bookings.update_one(
+                {"booking_id": booking["booking_id"], "payment_status": "pending"},
+                {"$set": {"payment_status": "failed", "payment_id": payment_data.razorpay_payment_id}}
+            )
+            raise HTTPException(status_code=409, detail=f"Seats {e.seats} are no longer available")
+    else:
+        confirmed = False
+    
+    # Duplicate callbacks skip the side effects below
+    if confirmed:
+        metrics.bookings_confirmed.inc()
+        # Release only this buyer's leftover holds
+        await release_holds(db, booking["show_id"], booking.get("session_id"))
+        hold_expiry.cancel(booking["show_id"], booking.get("session_id"))
+        seat_map = seat_state.peek(booking["show_id"])
+        if seat_map:
+            seat_map.book(booking["seats"])
+            seat_map.release(booking.get("session_id"))
+        event_bus.publish("booking_confirmed", show_id=booking["show_id"], session_id=booking.get("session_id"),
+                          seats=booking["seats"], booking_id=booking["booking_id"])
+    
+    view = booking_view(booking)
     return {
         "success": True,
         "booking": {
-            "booking_id": booking["booking_id"],
-            "movie": movie,
-            "showtime": show,
-            "theater": theater,
-            "seats": booking["seats"],
-            "total_amount": booking["total_amount"]
+            "booking_id": view["booking_id"],
+            "movie": view["movie"],
+            "showtime": view["showtime"],
+            "theater": view["theater"],
+            "seats": view["seats"],
+            "total_amount": view["total_amount"]
         }
     }
 
-@api_router.get("/bookings/{booking_id}")
+@api_router.get("/bookings/{booking_id}", responses={200: {"model": BookingView}})
 async def get_booking(booking_id: str):
     """Get booking details"""
-    booking = await db.bookings.find_one({"booking_id": booking_id})
+    booking = await db.bookings.find_one({"booking_id": booking_id}, BOOKING_VIEW_PROJECTION)
+    if booking and "snapshot" not in booking:
+        # Pending or not yet backfilled, join on the fly
+        booking = await load_booking_with_snapshot(db, booking_id)
     if not booking:
         raise HTTPException(status_code=404, detail="Booking not found")
     
-    show = await db.shows.find_one({"_id": booking["show_id"]})
-    movie = await db.movies.find_one({"_id": show["movie_id"]})
-    theater = await db.theaters.find_one({"_id": show["theater_id"]})
-    
-    return {
-        "booking_id": booking["booking_id"],
-        "movie": {
-            "id": str(movie["_id"]),
-            "title": movie["title"],
-            "poster": movie["poster"],
-            "genres": movie["genres"]
-        },
-        "showtime": {
-            "time": show["show_time"],
-            "format": show["format"]
-        },
-        "theater": {
-            "name": theater["name"],
-            "location": theater["location"]
-        },
-        "seats": booking["seats"],
-        "email": booking["email"],
-        "phone": booking["phone"],
-        "total_amount": booking["total_amount"],
-        "payment_status": booking["payment_status"],
-        "created_at": booking["created_at"].isoformat()
-    }
+    return booking_view(booking)
 
 # ============================================
 # ADMIN ENDPOINTS
@@ -425,57 +691,8 @@ async def get_booking(booking_id: str):
 
 @api_router.get("/admin/analytics")
 async def get_analytics():
-    """Get admin analytics"""
-    # Total revenue
-    bookings_cursor = db.bookings.find({"payment_status": "success"})
-    bookings = await bookings_cursor.to_list(length=10000)
-    total_revenue = sum(b["total_amount"] for b in bookings)
-    total_bookings = len(bookings)
-    
-    # Popular movies
-    movie_stats = {}
-    for booking in bookings:
-        show = await db.shows.find_one({"_id": booking["show_id"]})
-        if show:
-            movie_id = show["movie_id"]
-            if movie_id not in movie_stats:
-                movie_stats[movie_id] = {"bookings": 0, "revenue": 0}
-            movie_stats[movie_id]["bookings"] += 1
-            movie_stats[movie_id]["revenue"] += booking["total_amount"]
-    
-    popular_movies = []
-    for movie_id, stats in sorted(movie_stats.items(), key=lambda x: x[1]["bookings"], reverse=True)[:5]:
-        movie = await db.movies.find_one({"_id": movie_id})
-        if movie:
-            popular_movies.append({
-                "title": movie["title"],
-                "bookings": stats["bookings"],
-                "revenue": stats["revenue"]
-            })
-    
-    # Busiest theaters
-    theater_stats = {}
-    for booking in bookings:
-        show = await db.shows.find_one({"_id": booking["show_id"]})
-        if show:
-            theater_id = show["theater_id"]
-            theater_stats[theater_id] = theater_stats.get(theater_id, 0) + 1
-    
-    busiest_theaters = []
-    for theater_id, count in sorted(theater_stats.items(), key=lambda x: x[1], reverse=True)[:5]:
-        theater = await db.theaters.find_one({"_id": theater_id})
-        if theater:
-            busiest_theaters.append({
-                "name": theater["name"],
-                "bookings": count
-            })
-    
-    return {
-        "total_revenue": total_revenue,
-        "total_bookings": total_bookings,
-        "popular_movies": popular_movies,
-        "busiest_theaters": busiest_theaters
-    }
+    """Get admin analytics from the pre-aggregated counters"""
+    return await get_dashboard(db)
 
 # ============================================
 # UTILITY ENDPOINTS
@@ -489,6 +706,78 @@ async def root():
 async def health_check():
     return {"status": "healthy", "timestamp": datetime.utcnow().isoformat()}
 
+@api_router.get("/health/live")
+async def liveness():
+    """The process is up and its event loop is answering; restart it if not"""
+    return {"status": "alive"}
+
+@api_router.get("/health/ready", responses={503: {"description": "Warming up or Mongo is slow"}})
+async def readiness():
+    """Whether to route traffic here: warm-up has finished and Mongo answers a ping in time"""
+    if not ready:
+        return JSONResponse(status_code=503, content={"status": "starting"})
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(db.command("ping"), READINESS_TIMEOUT_SECONDS)
+    except (asyncio.TimeoutError, PyMongoError) as e:
+        logger.warning(f"Readiness ping failed: {e!r}")
+        return JSONResponse(status_code=503, content={"status": "unavailable", "mongo": "unreachable"})
+    ping_ms = round((time.perf_counter() - start) * 1000, 2)
+    if ping_ms > READINESS_MAX_PING_MS:
+        return JSONResponse(status_code=503, content={"status": "degraded", "mongo_ping_ms": ping_ms})
+    return {"status": "ready", "mongo_ping_ms": ping_ms}
+
+# ============================================
+# METRICS
+# ============================================
+
+def seat_holds_by_show():
+    holds = {}
+    for show_id, seat_map in seat_state.items():
+        held = (seat_map.held & ~seat_map.booked).bit_count()
+        if held:
+            holds[(show_id,)] = held
+    return holds
+
+def hold_conversion():
+    created = metrics.holds_created.value()
+    return {(): metrics.bookings_confirmed.value() / created if created else 0.0}
+
+metrics.register_callback(
+    "tickethub_seat_holds_active", "Seats currently held, per loaded show", seat_holds_by_show, ["show_id"]
+)
+metrics.register_callback(
+    "tickethub_hold_conversion_ratio", "Confirmed bookings per successful seat hold since start", hold_conversion
+)
+metrics.register_callback(
+    "tickethub_password_pool_tasks", "bcrypt pool tasks by state",
+    lambda: {(state,): password_pool.stats()[state] for state in ("in_flight", "queued")}, ["state"]
+)
+metrics.register_callback(
+    "tickethub_password_pool_rejected_total", "bcrypt calls shed because the pool queue was full",
+    lambda: {(): password_pool.rejected}, kind="counter"
+)
+metrics.register_callback(
+    "tickethub_waiting_room_queued", "Clients waiting for admission, per loaded show",
+    lambda: {(show_id,): n for show_id, _ in seat_state.items() if (n := waiting_room.queued(show_id))},
+    ["show_id"]
+)
+metrics.register_callback(
+    "tickethub_waiting_room_admissions_total", "Sessions admitted from the queue",
+    lambda: {(): waiting_room.admitted}, kind="counter"
+)
+metrics.register_callback(
+    "tickethub_seat_feed_subscribers", "Open live seat-map streams", lambda: {(): seat_feed.subscriber_count()}
+)
+metrics.register_callback(
+    "tickethub_catalogue_cache_requests_total", "Catalogue cache lookups by result",
+    lambda: {("hit",): catalogue_cache.hits, ("miss",): catalogue_cache.misses}, ["result"], kind="counter"
+)
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    return Response(content=metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
 # Include the router in the main app
 app.include_router(api_router)
 
@@ -500,6 +789,54 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-@app.on_event("shutdown")
+# Outermost, so the timing covers the whole stack
+app.add_middleware(metrics.MetricsMiddleware)
+
+async def warm_up():
+    """Open the Mongo pool and fill the hot caches, so first requests are served warm"""
+    # Concurrent pings each check out a connection, opening MONGO_MIN_POOL_SIZE of them
+    await asyncio.gather(*(db.command("ping") for _ in range(max(1, MONGO_MIN_POOL_SIZE))))
+    await movie_listing()
+    if WARM_SEAT_MAPS > 0:
+        today = datetime.utcnow().strftime("%Y-%m-%d")
+        shows = await db.shows.find({"show_date": today}, {"_id": 1}).sort("show_time", 1).to_list(
+            length=WARM_SEAT_MAPS
+        )
+        await asyncio.gather(*(seat_state.get(db, show["_id"]) for show in shows))
+
+async def startup():
+    global email_worker, ready
+    start = time.perf_counter()
+    connect_db()
+    await ensure_indexes(db)
+    await booking_ids.lease_node(db)
+    await sync_title_index()
+    await hold_expiry.start(db)
+    if RATE_LIMIT_BACKEND == "mongo":
+        rate_limiter.use_shared_backend(db)
+    metrics.event_loop_monitor.start()
+    if EMAIL_WORKER_INLINE:
+        # Only workers that deliver email load the SMTP client
+        from utils.email_outbox import EmailDeliveryWorker
+        email_worker = EmailDeliveryWorker(db)
+        email_worker.start()
+    bus_backend = event_bus_backend(db)
+    if bus_backend is not None:
+        await event_bus.start(bus_backend)
+    await warm_up()
+    ready = True
+    metrics.startup_seconds.set(time.perf_counter() - start)
+    logger.info(f"Ready to serve after {time.perf_counter() - start:.2f} s")
+
 async def shutdown_db_client():
-    client.close()
+    global email_worker, ready
+    # Fail readiness first so the load balancer stops sending requests
+    ready = False
+    await event_bus.stop()
+    await hold_expiry.stop()
+    await metrics.event_loop_monitor.stop()
+    if email_worker:
+        await email_worker.stop()
+        email_worker = None
+    close_db()
+    await payment_client.close()
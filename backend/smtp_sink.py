@@ -0,0 +1,101 @@
+"""
+Local SMTP sink for load-testing email delivery offline.
+
+    python smtp_sink.py --port 2525
+    SMTP_HOST=127.0.0.1 SMTP_PORT=2525 python email_worker.py
+
+Speaks enough ESMTP for the delivery worker (EHLO with PIPELINING, MAIL,
+RCPT, DATA, RSET, NOOP, QUIT), accepts every message and discards it, and
+prints the number of messages received per second. Set --latency-ms to
+simulate a slow relay and --reject-every N to reject every Nth message
+with a transient 451 so retries can be exercised.
+"""
+
+import argparse
+import asyncio
+import time
+
+stats = {"messages": 0, "bytes": 0, "rejected": 0}
+
+
+async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, args):
+    def reply(line: str):
+        writer.write(line.encode() + b"\r\n")
+
+    reply("220 tickethub-sink ESMTP")
+    await writer.drain()
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            verb = line.decode("utf-8", "replace").strip().split(" ", 1)[0].upper()
+            if verb in ("EHLO", "HELO"):
+                reply("250-tickethub-sink")
+                reply("250-PIPELINING")
+                reply("250-8BITMIME")
+                reply("250 SIZE 10485760")
+            elif verb in ("MAIL", "RCPT", "RSET", "NOOP"):
+                reply("250 OK")
+            elif verb == "DATA":
+                reply("354 End data with <CR><LF>.<CR><LF>")
+                await writer.drain()
+                size = 0
+                while True:
+                    data = await reader.readline()
+                    if not data or data == b".\r\n":
+                        break
+                    size += len(data)
+                if args.latency_ms:
+                    await asyncio.sleep(args.latency_ms / 1000)
+                stats["messages"] += 1
+                if args.reject_every and stats["messages"] % args.reject_every == 0:
+                    stats["rejected"] += 1
+                    reply("451 Try again later")
+                else:
+                    stats["bytes"] += size
+                    reply("250 Queued")
+            elif verb == "QUIT":
+                reply("221 Bye")
+                await writer.drain()
+                break
+            else:
+                reply("502 Command not implemented")
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def report():
+    last, last_time = 0, time.monotonic()
+    while True:
+        await asyncio.sleep(1)
+        now = time.monotonic()
+        received = stats["messages"] - last
+        if received:
+            print(f"{received / (now - last_time):8.0f} msg/s  "
+                  f"total {stats['messages']}  rejected {stats['rejected']}  {stats['bytes'] / 1e6:.1f} MB")
+        last, last_time = stats["messages"], now
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=2525)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--reject-every", type=int, default=0)
+    args = parser.parse_args()
+
+    server = await asyncio.start_server(lambda r, w: handle(r, w, args), args.host, args.port)
+    print(f"SMTP sink listening on {args.host}:{args.port}")
+    asyncio.create_task(report())
+    async with server:
+        await server.serve_forever()
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
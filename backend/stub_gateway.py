@@ -0,0 +1,46 @@
+"""
+Local stand-in for the Razorpay orders API, for load-testing booking creation.
+
+    uvicorn stub_gateway:app --port 9100
+    RAZORPAY_BASE_URL=http://127.0.0.1:9100/v1 uvicorn server:app
+
+Set STUB_GATEWAY_LATENCY_MS to simulate gateway round-trip time.
+"""
+
+import asyncio
+import os
+import uuid
+from collections import OrderedDict
+
+from fastapi import FastAPI, Header, Request
+
+STUB_GATEWAY_LATENCY_MS = float(os.getenv("STUB_GATEWAY_LATENCY_MS", "0"))
+MAX_REMEMBERED_ORDERS = 100000
+
+app = FastAPI()
+
+# Idempotency-Key -> order, so retried requests get the original order back
+orders: "OrderedDict[str, dict]" = OrderedDict()
+
+@app.post("/v1/orders")
+async def create_order(request: Request, idempotency_key: str = Header(default="")):
+    if STUB_GATEWAY_LATENCY_MS:
+        await asyncio.sleep(STUB_GATEWAY_LATENCY_MS / 1000)
+    
+    if idempotency_key and idempotency_key in orders:
+        return orders[idempotency_key]
+    
+    data = await request.json()
+    order = {
+        "id": f"order_{uuid.uuid4().hex[:14]}",
+        "entity": "order",
+        "amount": data["amount"],
+        "currency": data.get("currency", "INR"),
+        "receipt": data.get("receipt"),
+        "status": "created"
+    }
+    if idempotency_key:
+        orders[idempotency_key] = order
+        if len(orders) > MAX_REMEMBERED_ORDERS:
+            orders.popitem(last=False)
+    return order
@@ -0,0 +1,135 @@
+"""
+Pre-aggregated booking analytics.
+
+The analytics collection holds one counter document per movie, theater,
+show and day plus a single "totals" document:
+
+    {"_id": "movie:1", "kind": "movie", "key": "1", "title": ..., "bookings": 3, "revenue": 1200}
+
+record_booking() bumps the counters when a booking is confirmed and
+rebuild_analytics() recomputes the whole collection from bookings with a
+single aggregation pipeline, so the admin dashboard only reads the top-k
+counters instead of scanning bookings.
+"""
+
+import asyncio
+from typing import Dict
+
+from pymongo import DESCENDING, UpdateOne
+
+
+def _counter(_id: str, kind: str, key, amount: int, extra: Dict = None) -> UpdateOne:
+    update = {
+        "$inc": {"bookings": 1, "revenue": amount},
+        "$set": {"kind": kind, "key": key, **(extra or {})}
+    }
+    return UpdateOne({"_id": _id}, update, upsert=True)
+
+
+async def record_booking(db, booking: Dict, snapshot: Dict, session=None):
+    """Add one confirmed booking to every counter it contributes to"""
+    amount = booking["total_amount"]
+    day = booking["created_at"].strftime("%Y-%m-%d")
+    movie, theater = snapshot["movie"], snapshot["theater"]
+    show_id = booking["show_id"]
+    operations = [
+        _counter("totals", "totals", None, amount),
+        _counter(f"movie:{movie['id']}", "movie", movie["id"], amount, {"title": movie["title"]}),
+        _counter(f"theater:{theater['id']}", "theater", theater["id"], amount, {"name": theater["name"]}),
+        _counter(f"show:{show_id}", "show", show_id, amount),
+        _counter(f"day:{day}", "day", day, amount),
+    ]
+    await db.analytics.bulk_write(operations, ordered=False, session=session)
+
+
+def _lookup_label(collection: str, kind: str, field: str) -> Dict:
+    return {
+        "$lookup": {
+            "from": collection,
+            "let": {"kind": "$kind", "key": "$key"},
+            "pipeline": [
+                {"$match": {"$expr": {"$and": [
+                    {"$eq": ["$$kind", kind]},
+                    {"$eq": ["$_id", "$$key"]}
+                ]}}},
+                {"$project": {"_id": 0, field: 1}}
+            ],
+            "as": f"_{kind}"
+        }
+    }
+
+
+REBUILD_PIPELINE = [
+    {"$match": {"payment_status": "success"}},
+    {"$lookup": {
+        "from": "shows",
+        "localField": "show_id",
+        "foreignField": "_id",
+        "as": "show"
+    }},
+    {"$unwind": "$show"},
+    # Fan every booking out to the counters it feeds, then group per counter
+    {"$project": {
+        "amount": "$total_amount",
+        "counters": [
+            {"_id": "totals", "kind": "totals", "key": None},
+            {"_id": {"$concat": ["movie:", "$show.movie_id"]}, "kind": "movie", "key": "$show.movie_id"},
+            {"_id": {"$concat": ["theater:", "$show.theater_id"]}, "kind": "theater", "key": "$show.theater_id"},
+            {"_id": {"$concat": ["show:", "$show._id"]}, "kind": "show", "key": "$show._id"},
+            {
+                "_id": {"$concat": ["day:", {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}}]},
+                "kind": "day",
+                "key": {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}}
+            }
+        ]
+    }},
+    {"$unwind": "$counters"},
+    {"$group": {
+        "_id": "$counters._id",
+        "kind": {"$first": "$counters.kind"},
+        "key": {"$first": "$counters.key"},
+        "bookings": {"$sum": 1},
+        "revenue": {"$sum": "$amount"}
+    }},
+    _lookup_label("movies", "movie", "title"),
+    _lookup_label("theaters", "theater", "name"),
+    {"$set": {
+        "title": {"$first": "$_movie.title"},
+        "name": {"$first": "$_theater.name"}
+    }},
+    {"$unset": ["_movie", "_theater"]},
+    # $out swaps the collection in atomically and keeps its indexes
+    {"$out": "analytics"}
+]
+
+
+async def rebuild_analytics(db):
+    """Recompute every counter from the bookings collection"""
+    await db.bookings.aggregate(REBUILD_PIPELINE, allowDiskUse=True).to_list(length=None)
+
+
+async def _top(db, kind: str, top_k: int):
+    cursor = db.analytics.find({"kind": kind}).sort("bookings", DESCENDING).limit(top_k)
+    return await cursor.to_list(length=top_k)
+
+
+async def get_dashboard(db, top_k: int = 5) -> Dict:
+    """Totals plus the top-k movies and theaters by bookings"""
+    totals, movies, theaters = await asyncio.gather(
+        db.analytics.find_one({"_id": "totals"}),
+        _top(db, "movie", top_k),
+        _top(db, "theater", top_k)
+    )
+    totals = totals or {}
+    return {
+        "total_revenue": totals.get("revenue", 0),
+        "total_bookings": totals.get("bookings", 0),
+        "popular_movies": [
+            {"title": m.get("title"), "bookings": m["bookings"], "revenue": m["revenue"]}
+            for m in movies
+        ],
+        "busiest_theaters": [
+            {"name": t.get("name"), "bookings": t["bookings"]}
+            for t in theaters
+        ]
+    }
@@ -0,0 +1,100 @@
+"""
+Denormalized booking snapshots.
+
+When a booking is confirmed, the movie, show and theater fields the
+confirmation page needs are copied into booking["snapshot"]. They are
+never updated afterwards. Reads of a confirmed booking are then one
+indexed find_one on booking_id with a fixed projection, instead of four
+sequential lookups.
+"""
+
+from typing import Dict, List, Optional
+
+BOOKING_VIEW_PROJECTION = {
+    "_id": 0,
+    "booking_id": 1,
+    "show_id": 1,
+    "seats": 1,
+    "email": 1,
+    "phone": 1,
+    "total_amount": 1,
+    "payment_status": 1,
+    "created_at": 1,
+    "snapshot": 1
+}
+
+
+def snapshot_pipeline(match: Dict) -> List[Dict]:
+    """Join bookings to their show, movie and theater and shape the snapshot, in one round trip"""
+    return [
+        {"$match": match},
+        {"$lookup": {"from": "shows", "localField": "show_id", "foreignField": "_id", "as": "show"}},
+        {"$unwind": "$show"},
+        {"$lookup": {"from": "movies", "localField": "show.movie_id", "foreignField": "_id", "as": "movie"}},
+        {"$unwind": "$movie"},
+        {"$lookup": {"from": "theaters", "localField": "show.theater_id", "foreignField": "_id", "as": "theater"}},
+        {"$unwind": "$theater"},
+        {"$project": {
+            **BOOKING_VIEW_PROJECTION,
+            "_id": 1,
+            # Confirmation sells and releases the buyer's holds by session; booking_view leaves it out
+            "session_id": 1,
+            "snapshot": {
+                "movie": {
+                    "id": {"$toString": "$movie._id"},
+                    "title": "$movie.title",
+                    "poster": "$movie.poster",
+                    "genres": "$movie.genres"
+                },
+                "showtime": {
+                    "id": {"$toString": "$show._id"},
+                    "date": "$show.show_date",
+                    "time": "$show.show_time",
+                    "format": "$show.format"
+                },
+                "theater": {
+                    "id": {"$toString": "$theater._id"},
+                    "name": "$theater.name",
+                    "location": "$theater.location"
+                }
+            }
+        }}
+    ]
+
+
+async def load_booking_with_snapshot(db, booking_id: str) -> Optional[Dict]:
+    """Booking document with a freshly joined snapshot, or None"""
+    docs = await db.bookings.aggregate(snapshot_pipeline({"booking_id": booking_id})).to_list(length=1)
+    return docs[0] if docs else None
+
+
+async def backfill_snapshots(db):
+    """Write snapshots for confirmed bookings that predate them"""
+    pipeline = snapshot_pipeline({"payment_status": "success", "snapshot": {"$exists": False}}) + [
+        {"$project": {"_id": 1, "snapshot": 1}},
+        {"$merge": {"into": "bookings", "on": "_id", "whenMatched": "merge", "whenNotMatched": "discard"}}
+    ]
+    await db.bookings.aggregate(pipeline, allowDiskUse=True).to_list(length=None)
+
+
+def booking_view(booking: Dict) -> Dict:
+    """Public booking shape served by /api/bookings/{booking_id}"""
+    snapshot = booking["snapshot"]
+    return {
+        "booking_id": booking["booking_id"],
+        "movie": snapshot["movie"],
+        "showtime": {
+            "time": snapshot["showtime"]["time"],
+            "format": snapshot["showtime"]["format"]
+        },
+        "theater": {
+            "name": snapshot["theater"]["name"],
+            "location": snapshot["theater"]["location"]
+        },
+        "seats": booking["seats"],
+        "email": booking["email"],
+        "phone": booking["phone"],
+        "total_amount": booking["total_amount"],
+        "payment_status": booking["payment_status"],
+        "created_at": booking["created_at"].isoformat()
+    }
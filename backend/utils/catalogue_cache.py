@@ -0,0 +1,125 @@
+"""
+Read-through cache for the movie catalogue endpoints.
+
+Entries hold the already-encoded JSON body and its ETag, so a hit skips both
+Mongo and JSON encoding. Entries are bounded by TTL and an LRU size cap.
+
+Writers invalidate in two ways: invalidate() clears this process' cache,
+and catalogue_changed(db) bumps a version document in Mongo so other
+processes (seed_db.py, sibling workers) drop their entries on the next
+version check. With an event bus running, catalogue_changed also
+publishes an event that makes sibling workers re-check straight away.
+"""
+
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from utils.event_bus import RESYNC, event_bus
+from utils.serialization import dumps
+
+CATALOGUE_CACHE_TTL = float(os.getenv("CATALOGUE_CACHE_TTL", "300"))
+CATALOGUE_CACHE_SIZE = int(os.getenv("CATALOGUE_CACHE_SIZE", "1024"))
+# How often the shared catalogue version in Mongo is re-read
+CATALOGUE_VERSION_CHECK_SECONDS = float(os.getenv("CATALOGUE_VERSION_CHECK_SECONDS", "5"))
+
+
+class CachedBody:
+    __slots__ = ("body", "etag", "expires_at")
+
+    def __init__(self, body: bytes, expires_at: float, etag: Optional[str] = None):
+        self.body = body
+        self.etag = etag or '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+        self.expires_at = expires_at
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        if not if_none_match:
+            return False
+        return if_none_match.strip() == "*" or self.etag in [t.strip() for t in if_none_match.split(",")]
+
+
+class CatalogueCache:
+    def __init__(self, ttl: float = CATALOGUE_CACHE_TTL, max_entries: int = CATALOGUE_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, CachedBody]" = OrderedDict()
+        self.version = None
+        self._version_checked_at = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def listing_key(genre: Optional[str], language: Optional[str], search: Optional[str]) -> Tuple:
+        """Normalize filters so equivalent listing requests share an entry"""
+        def normalize(value: Optional[str]) -> str:
+            value = (value or "").strip()
+            return "" if value == "all" else value
+        # Title search is case-insensitive, genre and language matches are exact
+        return ("movies", normalize(genre), normalize(language), normalize(search).lower())
+
+    async def sync(self, db):
+        """Drop everything if another process bumped the catalogue version"""
+        now = time.monotonic()
+        if now - self._version_checked_at < CATALOGUE_VERSION_CHECK_SECONDS:
+            return
+        self._version_checked_at = now
+        doc = await db.meta.find_one({"_id": "catalogue"}, {"version": 1})
+        version = doc["version"] if doc else 0
+        if version != self.version:
+            self._entries.clear()
+            self.version = version
+
+    def get(self, key: Tuple) -> Optional[CachedBody]:
+        entry = self._entries.get(key)
+        if entry is None or entry.expires_at <= time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: Tuple, payload: Dict) -> CachedBody:
+        body = dumps(payload)
+        entry = CachedBody(body, time.monotonic() + self.ttl)
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self):
+        self._entries.clear()
+
+    def force_sync(self):
+        """Re-read the shared version on the next sync()"""
+        self._version_checked_at = 0.0
+
+
+catalogue_cache = CatalogueCache()
+
+
+async def catalogue_changed(db):
+    """Invalidation hook for anything that writes to the movies collection"""
+    catalogue_cache.invalidate()
+    catalogue_cache.force_sync()
+    await db.meta.update_one(
+        {"_id": "catalogue"},
+        {"$inc": {"version": 1}, "$set": {"updated_at": datetime.utcnow()}},
+        upsert=True
+    )
+    # After the bump, so siblings re-reading the version see the new one
+    event_bus.publish("catalogue_changed")
+
+
+def _catalogue_changed_elsewhere(data: Dict):
+    catalogue_cache.invalidate()
+    catalogue_cache.force_sync()
+
+
+event_bus.subscribe("catalogue_changed", _catalogue_changed_elsewhere)
+event_bus.subscribe(RESYNC, _catalogue_changed_elsewhere)
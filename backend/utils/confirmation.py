@@ -0,0 +1,103 @@
+"""
+Atomic payment confirmation.
+
+Confirming a booking touches three documents: the booking flips to
+success, the buyer's seat holds become sold markers, and the show's
+available_seats counter drops by the seat count. The analytics counters
+and the confirmation email in the outbox are written in the same unit. On a replica set or
+sharded cluster this runs as one multi-document transaction. On a
+standalone mongod, where transactions are unavailable, the same writes
+run in an order that stays safe to retry: seats first (idempotent per
+booking), then the conditional booking flip, and the counter only for
+the caller that won the flip. If some seats went to someone else, the
+ones this booking did sell are deleted again before SeatsUnavailable is
+raised.
+
+The booking flip is conditional on payment_status != "success", so a
+duplicate verify callback confirms nothing twice.
+"""
+
+import logging
+from typing import Dict, List
+
+from utils.analytics import record_booking
+from utils.email_outbox import enqueue_booking_confirmation
+from utils.seat_holds import sell_seats
+
+logger = logging.getLogger(__name__)
+
+_transactions_supported = None
+
+
+class SeatsUnavailable(Exception):
+    def __init__(self, seats: List[str]):
+        super().__init__(f"Seats {seats} are no longer available")
+        self.seats = seats
+
+
+class AlreadyConfirmed(Exception):
+    pass
+
+
+async def transactions_supported(client) -> bool:
+    """Transactions need a replica set member or a mongos"""
+    global _transactions_supported
+    if _transactions_supported is None:
+        hello = await client.admin.command("hello")
+        _transactions_supported = "setName" in hello or hello.get("msg") == "isdbgrid"
+    return _transactions_supported
+
+
+async def _confirm(db, booking: Dict, payment_id: str, session=None):
+    seats = booking["seats"]
+    conflicts = await sell_seats(
+        db, booking["show_id"], booking.get("session_id"), seats, booking["booking_id"], session=session
+    )
+    if conflicts:
+        raise SeatsUnavailable(conflicts)
+
+    result = await db.bookings.update_one(
+        {"booking_id": booking["booking_id"], "payment_status": {"$ne": "success"}},
+        {
+            "$set": {
+                "payment_status": "success",
+                "payment_id": payment_id,
+                "snapshot": booking["snapshot"]
+            }
+        },
+        session=session
+    )
+    if result.modified_count == 0:
+        raise AlreadyConfirmed()
+
+    await db.shows.update_one(
+        {"_id": booking["show_id"]},
+        {"$inc": {"available_seats": -len(seats)}},
+        session=session
+    )
+    await record_booking(db, booking, booking["snapshot"], session=session)
+    await enqueue_booking_confirmation(db, booking, booking["snapshot"], session=session)
+
+
+async def confirm_booking(client, db, booking: Dict, payment_id: str) -> bool:
+    """
+    Confirm a paid booking as one unit.
+    Returns False if the booking had already been confirmed by an earlier call,
+    raises SeatsUnavailable if its seats were sold to someone else.
+    """
+    try:
+        if await transactions_supported(client):
+            async with await client.start_session() as session:
+                await session.with_transaction(lambda s: _confirm(db, booking, payment_id, session=s))
+        else:
+            try:
+                await _confirm(db, booking, payment_id)
+            except SeatsUnavailable:
+                # No transaction to roll back: give back the seats this booking did sell
+                await db.seat_reservations.delete_many(
+                    {"show_id": booking["show_id"], "booking_id": booking["booking_id"], "status": "sold"}
+                )
+                raise
+    except AlreadyConfirmed:
+        return False
+    return True
@@ -1,8 +1,51 @@
 import logging
+import os
+from email.message import EmailMessage
+from email.utils import formatdate, make_msgid
 from typing import Dict
 
 logger = logging.getLogger(__name__)
 
+EMAIL_FROM = os.getenv("EMAIL_FROM", "bookings@tickethub.local")
+
+
+def booking_confirmation_data(booking: Dict, snapshot: Dict) -> Dict:
+    """Fields the confirmation email needs, taken from the booking snapshot"""
+    return {
+        "booking_id": booking["booking_id"],
+        "movie_title": snapshot["movie"]["title"],
+        "theater_name": snapshot["theater"]["name"],
+        "show_time": snapshot["showtime"]["time"],
+        "seats": booking["seats"],
+        "total_amount": booking["total_amount"]
+    }
+
+
+def render_booking_confirmation(email: str, booking_data: Dict) -> bytes:
+    """RFC 5322 message for the SMTP delivery worker"""
+    message = EmailMessage()
+    message["From"] = EMAIL_FROM
+    message["To"] = email
+    message["Subject"] = f"Your TicketHub Booking Confirmation - {booking_data.get('booking_id')}"
+    message["Date"] = formatdate(usegmt=True)
+    message["Message-ID"] = make_msgid(domain=EMAIL_FROM.rpartition("@")[2])
+    message.set_content(
+        "Dear Customer,\n\n"
+        "Your booking has been confirmed!\n\n"
+        "Booking Details:\n"
+        f"- Booking ID: {booking_data.get('booking_id')}\n"
+        f"- Movie: {booking_data.get('movie_title')}\n"
+        f"- Theater: {booking_data.get('theater_name')}\n"
+        f"- Show Time: {booking_data.get('show_time')}\n"
+        f"- Seats: {', '.join(booking_data.get('seats', []))}\n"
+        f"- Total Amount: ₹{booking_data.get('total_amount')}\n\n"
+        "Please show this email or your booking QR code at the cinema entrance.\n\n"
+        "Thank you for choosing TicketHub!\n",
+        cte="quoted-printable"
+    )
+    return message.as_bytes(policy=message.policy.clone(linesep="\r\n"))
+
+
 def send_booking_confirmation_email(email: str, booking_data: Dict):
     """
     Mock email sending function.
@@ -0,0 +1,185 @@
+"""
+Durable email outbox.
+
+Confirmation emails are written to the email_outbox collection in the same
+step that confirms the payment (inside the transaction where available), so
+a crash or restart cannot lose them. EmailDeliveryWorker drains the outbox:
+
+    {"_id": "booking_confirmation:TH...", "to": ..., "data": {...},
+     "status": "pending" | "sending" | "sent" | "failed",
+     "attempts": 0, "next_attempt_at": ..., "claim": ...}
+
+Workers claim due messages in batches by stamping them with a claim id and
+a lease (next_attempt_at moves to the end of the lease), so several workers
+can share the outbox and a worker that dies mid-batch has its messages
+picked up again when the lease runs out. Transient failures are retried
+with exponential backoff; permanent SMTP rejections and messages out of
+attempts are marked failed.
+"""
+
+import asyncio
+import logging
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from pymongo import UpdateOne
+
+from utils.email import (
+    EMAIL_FROM, booking_confirmation_data, render_booking_confirmation, send_booking_confirmation_email
+)
+from utils.smtp_pool import SMTP_HOST, SmtpError, SmtpPool
+
+logger = logging.getLogger(__name__)
+
+EMAIL_BATCH_SIZE = int(os.getenv("EMAIL_BATCH_SIZE", "200"))
+EMAIL_LEASE_SECONDS = float(os.getenv("EMAIL_LEASE_SECONDS", "60"))
+EMAIL_POLL_SECONDS = float(os.getenv("EMAIL_POLL_SECONDS", "1"))
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", "8"))
+EMAIL_BACKOFF_SECONDS = float(os.getenv("EMAIL_BACKOFF_SECONDS", "5"))
+EMAIL_BACKOFF_MAX_SECONDS = float(os.getenv("EMAIL_BACKOFF_MAX_SECONDS", "3600"))
+EMAIL_STATS_INTERVAL_SECONDS = float(os.getenv("EMAIL_STATS_INTERVAL_SECONDS", "60"))
+
+
+async def enqueue_booking_confirmation(db, booking: Dict, snapshot: Dict, session=None):
+    """Queue the confirmation email, once per booking however often this runs"""
+    now = datetime.utcnow()
+    await db.email_outbox.update_one(
+        {"_id": f"booking_confirmation:{booking['booking_id']}"},
+        {
+            "$setOnInsert": {
+                "kind": "booking_confirmation",
+                "to": booking["email"],
+                "data": booking_confirmation_data(booking, snapshot),
+                "status": "pending",
+                "attempts": 0,
+                "next_attempt_at": now,
+                "created_at": now
+            }
+        },
+        upsert=True,
+        session=session
+    )
+
+
+def backoff(attempts: int) -> timedelta:
+    return timedelta(seconds=min(EMAIL_BACKOFF_SECONDS * 2 ** (attempts - 1), EMAIL_BACKOFF_MAX_SECONDS))
+
+
+async def claim_batch(db, limit: int = EMAIL_BATCH_SIZE) -> List[Dict]:
+    """Lease up to limit due messages to this worker"""
+    now = datetime.utcnow()
+    # Pending messages that are due, and "sending" ones whose worker's lease ran out
+    due = {"status": {"$in": ["pending", "sending"]}, "next_attempt_at": {"$lte": now}}
+    ids = [
+        doc["_id"] for doc in
+        await db.email_outbox.find(due, {"_id": 1}).sort("next_attempt_at", 1).limit(limit).to_list(length=limit)
+    ]
+    if not ids:
+        return []
+    claim = uuid.uuid4().hex
+    await db.email_outbox.update_many(
+        {"_id": {"$in": ids}, **due},
+        {"$set": {
+            "status": "sending",
+            "claim": claim,
+            "next_attempt_at": now + timedelta(seconds=EMAIL_LEASE_SECONDS)
+        }}
+    )
+    # Another worker may have claimed some of them in between
+    return await db.email_outbox.find({"_id": {"$in": ids}, "claim": claim}).to_list(length=limit)
+
+
+class EmailDeliveryWorker:
+    def __init__(self, db, pool: Optional[SmtpPool] = None, batch_size: int = EMAIL_BATCH_SIZE):
+        self.db = db
+        self.batch_size = batch_size
+        # Without an SMTP server configured, fall back to logging the email
+        self.pool = pool if pool is not None else (SmtpPool() if SMTP_HOST else None)
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+        self.batches = 0
+        self.started_at = time.monotonic()
+        self._task: Optional[asyncio.Task] = None
+
+    async def deliver(self, message: Dict):
+        if self.pool is None:
+            send_booking_confirmation_email(message["to"], message["data"])
+            return
+        await self.pool.send(EMAIL_FROM, [message["to"]], render_booking_confirmation(message["to"], message["data"]))
+
+    def _outcome(self, message: Dict, error: Optional[Exception]) -> UpdateOne:
+        now = datetime.utcnow()
+        match = {"_id": message["_id"], "claim": message["claim"]}
+        if error is None:
+            self.sent += 1
+            return UpdateOne(match, {"$set": {"status": "sent", "sent_at": now}, "$unset": {"claim": ""}})
+
+        attempts = message.get("attempts", 0) + 1
+        permanent = isinstance(error, SmtpError) and error.permanent
+        if permanent or attempts >= EMAIL_MAX_ATTEMPTS:
+            self.failed += 1
+            logger.error(f"Giving up on email {message['_id']} after {attempts} attempts: {error}")
+            update = {"status": "failed"}
+        else:
+            self.retried += 1
+            update = {"status": "pending", "next_attempt_at": now + backoff(attempts)}
+        update.update({"attempts": attempts, "last_error": str(error)})
+        return UpdateOne(match, {"$set": update, "$unset": {"claim": ""}})
+
+    async def run_once(self) -> int:
+        """Claim, send and settle one batch. Returns the number of messages claimed."""
+        batch = await claim_batch(self.db, self.batch_size)
+        if not batch:
+            return 0
+        # The SMTP pool bounds how many of these are on the wire at once
+        results = await asyncio.gather(*(self.deliver(message) for message in batch), return_exceptions=True)
+        outcomes = [
+            self._outcome(message, result if isinstance(result, Exception) else None)
+            for message, result in zip(batch, results)
+        ]
+        await self.db.email_outbox.bulk_write(outcomes, ordered=False)
+        self.batches += 1
+        return len(batch)
+
+    def stats(self) -> Dict:
+        elapsed = max(time.monotonic() - self.started_at, 1e-9)
+        return {
+            "sent": self.sent,
+            "retried": self.retried,
+            "failed": self.failed,
+            "batches": self.batches,
+            "sent_per_minute": round(self.sent * 60 / elapsed, 1),
+        }
+
+    async def run(self):
+        last_report = time.monotonic()
+        while True:
+            try:
+                claimed = await self.run_once()
+            except Exception as e:
+                logger.error(f"Error delivering emails: {e}")
+                claimed = 0
+            if time.monotonic() - last_report >= EMAIL_STATS_INTERVAL_SECONDS:
+                last_report = time.monotonic()
+                logger.info(f"Email delivery: {self.stats()}")
+            if claimed < self.batch_size:
+                # Outbox drained, wait for more instead of polling in a tight loop
+                await asyncio.sleep(EMAIL_POLL_SECONDS)
+
+    def start(self):
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.pool is not None:
+            await self.pool.close()
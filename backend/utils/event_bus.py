@@ -0,0 +1,307 @@
+"""
+Cross-worker event bus.
+
+Each worker keeps seat state and the catalogue cache in memory, so a write
+handled by one worker has to reach the others. Writers publish small
+domain events and every other worker applies them to its own state:
+
+- seat_held          {show_id, session_id, seats, expires_at}
+- hold_released      {show_id, session_id}, or {show_id, expired: true} from hold expiry
+- booking_confirmed  {show_id, session_id, seats, booking_id}
+- catalogue_changed  {}
+
+publish() only queues the event; one background task sends queued events
+in order, in batches, so request handlers never wait on the bus. Events
+come back to the publishing worker too and are skipped there by origin,
+since it already applied the change. When a backend reconnects after a
+gap, the bus delivers a local "resync" event so subscribers can drop
+state that may have missed changes.
+
+Backends (EVENT_BUS_BACKEND):
+- none (default): single worker, nothing is sent
+- mongo: events are inserted into the events collection and read back by
+  a change stream on every worker. Needs a replica set, like the
+  transactional confirmation path. The TTL index keeps a short history
+  for resuming the stream.
+- unix: a newline-delimited JSON relay over a Unix socket
+  (EVENT_BUS_SOCKET), for workers on one host and for tests. The first
+  worker to start binds the socket and relays for the rest; if it goes
+  away another worker takes over.
+"""
+
+import asyncio
+import fcntl
+import logging
+import os
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Set
+
+import orjson
+from pymongo.errors import OperationFailure, PyMongoError
+
+from utils.metrics import Counter, Histogram, registry
+
+logger = logging.getLogger(__name__)
+
+EVENT_BUS_BACKEND = os.getenv("EVENT_BUS_BACKEND", "none")
+EVENT_BUS_SOCKET = os.getenv("EVENT_BUS_SOCKET", "/tmp/tickethub-events.sock")
+EVENT_BUS_QUEUE_SIZE = 10000
+EVENT_BUS_BATCH_SIZE = 256
+EVENT_BUS_RETRY_SECONDS = 1.0
+EVENT_BUS_LOCK_POLL_SECONDS = 0.05
+# $changeStream on a standalone server
+CHANGE_STREAM_UNSUPPORTED = 40573
+CHANGE_STREAM_HISTORY_LOST = 286
+
+RESYNC = "resync"
+
+events_published = registry.register(Counter(
+    "tickethub_event_bus_published_total", "Events published to other workers", ["type"]
+))
+events_received = registry.register(Counter(
+    "tickethub_event_bus_received_total", "Events received from other workers", ["type"]
+))
+event_lag_seconds = registry.register(Histogram(
+    "tickethub_event_bus_lag_seconds", "Time from publish in one worker to delivery in another",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+))
+
+Deliver = Callable[[Dict], None]
+
+
+class MongoChangeStreamBackend:
+    def __init__(self, db):
+        self.db = db
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, deliver: Deliver):
+        self._task = asyncio.create_task(self._listen(deliver))
+
+    async def _listen(self, deliver: Deliver):
+        token = None
+        opened = False
+        while True:
+            try:
+                async with self.db.events.watch(
+                    [{"$match": {"operationType": "insert"}}], resume_after=token
+                ) as stream:
+                    if opened and token is None:
+                        # Reopened without a resume point, changes in between are lost
+                        deliver({"type": RESYNC})
+                    opened = True
+                    async for change in stream:
+                        token = stream.resume_token
+                        deliver(change["fullDocument"])
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as e:
+                if e.code == CHANGE_STREAM_UNSUPPORTED:
+                    logger.error("Event bus disabled: MongoDB change streams need a replica set")
+                    return
+                if e.code == CHANGE_STREAM_HISTORY_LOST:
+                    token = None
+                logger.error(f"Event bus change stream failed: {e}")
+            except PyMongoError as e:
+                logger.error(f"Event bus change stream failed: {e}")
+            await asyncio.sleep(EVENT_BUS_RETRY_SECONDS)
+
+    async def send(self, events: List[Dict]):
+        now = datetime.utcnow()
+        for event in events:
+            # For the TTL index
+            event["created_at"] = now
+        await self.db.events.insert_many(events, ordered=True)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+class UnixSocketBackend:
+    def __init__(self, path: str = EVENT_BUS_SOCKET):
+        self.path = path
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._peers: List[asyncio.StreamWriter] = []
+        self._relays: Set[asyncio.Task] = set()
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def _relay(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Broker side: forward every line from one worker to all the others"""
+        self._peers.append(writer)
+        self._relays.add(asyncio.current_task())
+        try:
+            while line := await reader.readline():
+                for peer in self._peers:
+                    if peer is not writer:
+                        peer.write(line)
+        except ConnectionError:
+            pass
+        finally:
+            self._peers.remove(writer)
+            self._relays.discard(asyncio.current_task())
+            writer.close()
+
+    async def _open(self) -> asyncio.StreamReader:
+        reader, self._writer = await asyncio.open_unix_connection(self.path)
+        return reader
+
+    async def _connect(self) -> asyncio.StreamReader:
+        try:
+            return await self._open()
+        except (FileNotFoundError, ConnectionRefusedError):
+            pass
+        # Nobody is relaying: become the broker. The lock stops two workers
+        # from each replacing the other's socket.
+        with open(f"{self.path}.lock", "w") as lock:
+            while True:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    # Another worker is taking over; wait without blocking the event loop
+                    await asyncio.sleep(EVENT_BUS_LOCK_POLL_SECONDS)
+            try:
+                return await self._open()
+            except (FileNotFoundError, ConnectionRefusedError):
+                if os.path.exists(self.path):
+                    # Left behind by a broker that exited
+                    os.unlink(self.path)
+                self._server = await asyncio.start_unix_server(self._relay, self.path)
+                logger.info(f"Event bus relaying on {self.path}")
+        return await self._open()
+
+    async def start(self, deliver: Deliver):
+        reader = await self._connect()
+        self._task = asyncio.create_task(self._listen(deliver, reader))
+
+    async def _listen(self, deliver: Deliver, reader: Optional[asyncio.StreamReader]):
+        while True:
+            try:
+                if reader is None:
+                    reader = await self._connect()
+                    deliver({"type": RESYNC})
+                while line := await reader.readline():
+                    deliver(orjson.loads(line))
+                logger.warning("Event bus broker went away, reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except OSError as e:
+                logger.error(f"Event bus socket failed: {e}")
+            self._writer = None
+            reader = None
+            await asyncio.sleep(EVENT_BUS_RETRY_SECONDS)
+
+    async def send(self, events: List[Dict]):
+        if self._writer is None:
+            raise ConnectionError("Event bus socket is not connected")
+        self._writer.write(b"".join(orjson.dumps(event) + b"\n" for event in events))
+        await self._writer.drain()
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._server is not None:
+            self._server.close()
+            for peer in list(self._peers):
+                peer.close()
+            # Let the relays see their connections close and finish
+            await asyncio.gather(*self._relays, return_exceptions=True)
+            self._server = None
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+
+class EventBus:
+    def __init__(self):
+        # Identifies this worker's events when they come back from the backend
+        self.origin = uuid.uuid4().hex
+        self.backend = None
+        self._handlers: Dict[str, List[Callable[[Dict], None]]] = defaultdict(list)
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, event_type: str, handler: Callable[[Dict], None]):
+        """Call handler(data) for events of this type published by other workers"""
+        self._handlers[event_type].append(handler)
+
+    def publish(self, event_type: str, **data):
+        """Queue an event for the other workers, a no-op without a backend"""
+        if self._queue is None:
+            return
+        event = {
+            "type": event_type,
+            "origin": self.origin,
+            # JSON-safe in every backend: datetimes travel as ISO strings
+            "data": orjson.loads(orjson.dumps(data)),
+            "ts": time.time(),
+        }
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            logger.error(f"Event bus queue full, dropped {event_type}")
+
+    def deliver(self, event: Dict):
+        """Backend callback for every event seen, including this worker's own"""
+        event_type = event["type"]
+        if event.get("origin") == self.origin:
+            return
+        if event_type != RESYNC:
+            events_received.inc(event_type)
+            event_lag_seconds.observe(max(0.0, time.time() - event["ts"]))
+        for handler in self._handlers.get(event_type, ()):
+            try:
+                handler(event.get("data", {}))
+            except Exception as e:
+                logger.error(f"Error handling {event_type} event: {e}")
+
+    async def _publisher(self):
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < EVENT_BUS_BATCH_SIZE and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            # Retry until sent so events stay in order; publish() drops them once the queue is full
+            while True:
+                try:
+                    await self.backend.send(batch)
+                    break
+                except (OSError, PyMongoError) as e:
+                    logger.error(f"Error publishing {len(batch)} events: {e}")
+                    await asyncio.sleep(EVENT_BUS_RETRY_SECONDS)
+            for event in batch:
+                events_published.inc(event["type"])
+
+    async def start(self, backend):
+        self.backend = backend
+        self._queue = asyncio.Queue(maxsize=EVENT_BUS_QUEUE_SIZE)
+        await backend.start(self.deliver)
+        self._task = asyncio.create_task(self._publisher())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self.backend is not None:
+            await self.backend.stop()
+            self.backend = None
+        self._queue = None
+
+
+def backend_from_env(db):
+    """The backend selected by EVENT_BUS_BACKEND, or None"""
+    if EVENT_BUS_BACKEND == "mongo":
+        return MongoChangeStreamBackend(db)
+    if EVENT_BUS_BACKEND == "unix":
+        return UnixSocketBackend(EVENT_BUS_SOCKET)
+    return None
+
+
+event_bus = EventBus()
@@ -0,0 +1,100 @@
+"""
+Seat-hold expiry scheduler.
+
+Every live hold is tracked in a TimerWheel keyed by (show_id, session_id).
+A background task advances the wheel once per tick. When holds lapse, it
+releases them in the seat-state store, which emits "released" deltas to
+live subscribers, and deletes the lapsed seat_reservations documents in
+one batch. The TTL index stays as a backstop for holds this process never
+saw.
+
+On startup the wheel is rehydrated from the live holds in Mongo.
+Each expiry is also published on the event bus so sibling workers drop
+the lapsed holds from their seat maps and live feeds.
+"""
+
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from utils.event_bus import event_bus
+from utils.metrics import holds_expired
+from utils.seat_holds import group_holds
+from utils.seat_state import seat_state
+from utils.timer_wheel import TimerWheel
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOLD_MINUTES = int(os.getenv("HOLD_MINUTES", "5"))
+HOLD_EXPIRY_TICK_SECONDS = float(os.getenv("HOLD_EXPIRY_TICK_SECONDS", "1"))
+
+
+def hold_duration(show: Dict) -> timedelta:
+    """Hold length for a show, shows may override the default with hold_minutes"""
+    return timedelta(minutes=show.get("hold_minutes") or DEFAULT_HOLD_MINUTES)
+
+
+def _epoch(moment: datetime) -> float:
+    return moment.replace(tzinfo=timezone.utc).timestamp()
+
+
+class HoldExpiry:
+    def __init__(self, tick_seconds: float = HOLD_EXPIRY_TICK_SECONDS):
+        self.tick_seconds = tick_seconds
+        self.wheel = TimerWheel(_epoch(datetime.utcnow()), tick_seconds)
+        self._task: Optional[asyncio.Task] = None
+
+    def schedule(self, show_id: str, session_id: str, expires_at: datetime):
+        self.wheel.schedule((show_id, session_id), _epoch(expires_at), show_id)
+
+    def cancel(self, show_id: str, session_id: str):
+        self.wheel.cancel((show_id, session_id))
+
+    async def rehydrate(self, db):
+        now = datetime.utcnow()
+        held = await db.seat_reservations.find(
+            {"status": "held", "expires_at": {"$gt": now}},
+            {"show_id": 1, "session_id": 1, "seat": 1, "expires_at": 1, "_id": 0}
+        ).to_list(length=None)
+        by_show: Dict[str, list] = {}
+        for doc in held:
+            by_show.setdefault(doc["show_id"], []).append(doc)
+        for show_id, docs in by_show.items():
+            for session_id, session in group_holds(docs).items():
+                self.schedule(show_id, session_id, session["expires_at"])
+        logger.info(f"Scheduled expiry for {len(self.wheel)} seat holds")
+
+    async def expire_due(self, db):
+        now = datetime.utcnow()
+        fired = self.wheel.advance(_epoch(now))
+        if not fired:
+            return
+        holds_expired.inc(amount=len(fired))
+        for show_id in {show_id for _, show_id in fired}:
+            seat_map = seat_state.peek(show_id)
+            if seat_map is not None:
+                seat_map.expire(now)
+            event_bus.publish("hold_released", show_id=show_id, expired=True)
+        await db.seat_reservations.delete_many({"status": "held", "expires_at": {"$lte": now}})
+
+    async def _run(self, db):
+        while True:
+            await asyncio.sleep(self.tick_seconds)
+            try:
+                await self.expire_due(db)
+            except Exception as e:
+                logger.error(f"Error expiring seat holds: {e}")
+
+    async def start(self, db):
+        await self.rehydrate(db)
+        self._task = asyncio.create_task(self._run(db))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+hold_expiry = HoldExpiry()
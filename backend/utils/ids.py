@@ -0,0 +1,99 @@
+"""
+Booking ID generator.
+
+IDs are Snowflake-style 70-bit integers rendered as 14 Crockford base32
+characters behind the "TH" prefix, e.g. TH01JC3M8ZK4T0A2:
+
+    42 bits  milliseconds since ID_EPOCH (good until ~2163)
+    16 bits  node id, one per process
+    12 bits  sequence within the millisecond (4096 IDs/ms per process)
+
+IDs sort by creation time and need no database round trip. Two processes
+only collide if they share a node id, so each worker leases one at startup
+(lease_node): a single $inc on a counter in Mongo, unique among the last
+65536 processes to start. BOOKING_NODE_ID pins it instead. Until a lease,
+and again after fork, the node id is random; that is only safe for one
+process at a time.
+"""
+
+import os
+import random
+import threading
+import time
+
+from pymongo import ReturnDocument
+
+ID_PREFIX = "TH"
+ID_EPOCH_MS = 1704067200000  # 2024-01-01T00:00:00Z
+
+NODE_COUNTER_ID = "booking_node_id"
+
+NODE_BITS = 16
+SEQUENCE_BITS = 12
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+ID_LENGTH = 14
+
+_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+
+
+_SHIFTS = tuple(range(5 * (ID_LENGTH - 1), -1, -5))
+
+
+def _encode(value: int) -> str:
+    return "".join([_ALPHABET[(value >> shift) & 31] for shift in _SHIFTS])
+
+
+class BookingIdGenerator:
+    def __init__(self, node_id: int = None):
+        self._lock = threading.Lock()
+        self._fixed_node = node_id
+        self._reset()
+
+    def _reset(self):
+        if self._fixed_node is not None:
+            node = self._fixed_node
+        elif os.getenv("BOOKING_NODE_ID"):
+            node = int(os.environ["BOOKING_NODE_ID"])
+        else:
+            node = random.SystemRandom().getrandbits(NODE_BITS)
+        self.node_id = node & ((1 << NODE_BITS) - 1)
+        self._last_ms = 0
+        self._sequence = 0
+
+    async def lease_node(self, db):
+        """Take a node id no other recently started process has, unless one is configured"""
+        if self._fixed_node is not None or os.getenv("BOOKING_NODE_ID"):
+            return
+        counter = await db.counters.find_one_and_update(
+            {"_id": NODE_COUNTER_ID}, {"$inc": {"value": 1}}, upsert=True, return_document=ReturnDocument.AFTER
+        )
+        with self._lock:
+            self.node_id = counter["value"] & ((1 << NODE_BITS) - 1)
+
+    def next_id(self) -> str:
+        with self._lock:
+            now = int(time.time() * 1000) - ID_EPOCH_MS
+            # Never go backwards, even if the wall clock does
+            if now <= self._last_ms:
+                now = self._last_ms
+                self._sequence += 1
+                if self._sequence > MAX_SEQUENCE:
+                    # Sequence exhausted for this millisecond, borrow the next one
+                    now += 1
+                    self._sequence = 0
+            else:
+                self._sequence = 0
+            self._last_ms = now
+            value = (now << (NODE_BITS + SEQUENCE_BITS)) | (self.node_id << SEQUENCE_BITS) | self._sequence
+        return ID_PREFIX + _encode(value)
+
+
+booking_ids = BookingIdGenerator()
+
+# Forked workers must not share the parent's node id and sequence
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=booking_ids._reset)
+
+
+def new_booking_id() -> str:
+    return booking_ids.next_id()
@@ -0,0 +1,100 @@
+"""
+Index manifest for every collection the API queries.
+
+ensure_indexes() is idempotent: create_index is a no-op when an index with
+the same keys and options already exists, so it runs on every app startup
+and at the end of seed_db.py.
+"""
+
+import logging
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+logger = logging.getLogger(__name__)
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+    ],
+    "shows": [
+        IndexModel([("movie_id", ASCENDING), ("show_date", ASCENDING)], name="movie_date"),
+        IndexModel(
+            [("theater_id", ASCENDING), ("movie_id", ASCENDING), ("show_date", ASCENDING)],
+            name="theater_movie_date"
+        ),
+    ],
+    "theaters": [
+        IndexModel([("city", ASCENDING)], name="city"),
+    ],
+    "bookings": [
+        IndexModel([("booking_id", ASCENDING)], name="booking_id_unique", unique=True),
+        IndexModel([("show_id", ASCENDING), ("payment_status", ASCENDING)], name="show_status"),
+        IndexModel([("payment_status", ASCENDING), ("created_at", DESCENDING)], name="status_created"),
+    ],
+    "analytics": [
+        IndexModel([("kind", ASCENDING), ("bookings", DESCENDING)], name="kind_bookings"),
+    ],
+    "seat_reservations": [
+        IndexModel([("show_id", ASCENDING), ("expires_at", ASCENDING)], name="show_expires"),
+        IndexModel([("session_id", ASCENDING), ("status", ASCENDING)], name="session_status"),
+        # Expired holds are purged by the server; sold markers have no expires_at and are kept
+        IndexModel([("expires_at", ASCENDING)], name="expires_ttl", expireAfterSeconds=0),
+    ],
+    "rate_limits": [
+        IndexModel([("expires_at", ASCENDING)], name="expires_ttl", expireAfterSeconds=0),
+    ],
+    "events": [
+        # Cross-worker events only need to outlive a change stream reconnect
+        IndexModel([("created_at", ASCENDING)], name="created_ttl", expireAfterSeconds=3600),
+    ],
+    "email_outbox": [
+        IndexModel([("status", ASCENDING), ("next_attempt_at", ASCENDING)], name="status_next"),
+        # Delivered messages are kept for a week; failed ones have no sent_at and stay for inspection
+        IndexModel([("sent_at", ASCENDING)], name="sent_ttl", expireAfterSeconds=7 * 24 * 3600),
+    ],
+}
+
+# Representative filters for the hot endpoint queries; tests/test_indexes.py
+# fails if any of them is planned as a collection scan
+HOT_QUERIES: List[Tuple[str, Dict]] = [
+    ("users", {"email": "user@example.com"}),
+    ("shows", {"movie_id": "1", "show_date": "2025-01-01"}),
+    ("shows", {"theater_id": "theater1", "movie_id": "1", "show_date": "2025-01-01"}),
+    ("theaters", {"_id": "theater1", "city": "Mumbai"}),
+    ("theaters", {"city": "Mumbai"}),
+    ("bookings", {"booking_id": "TH0"}),
+    ("bookings", {"show_id": "1", "payment_status": "success"}),
+    ("seat_reservations", {"show_id": "1", "expires_at": {"$gt": datetime(2025, 1, 1)}}),
+    ("seat_reservations", {"session_id": "session", "status": "held"}),
+    ("email_outbox", {"status": {"$in": ["pending", "sending"]}, "next_attempt_at": {"$lte": datetime(2025, 1, 1)}}),
+]
+
+
+async def ensure_indexes(db):
+    """Create every index in the manifest"""
+    for collection, indexes in INDEXES.items():
+        await db[collection].create_indexes(indexes)
+    logger.info(f"Ensured indexes on {len(INDEXES)} collections")
+
+
+def _plan_stages(plan: Dict) -> List[str]:
+    stages = [plan.get("stage", "")]
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            stages.extend(_plan_stages(plan[key]))
+    for child in plan.get("inputStages", []):
+        stages.extend(_plan_stages(child))
+    return stages
+
+
+async def collscan_queries(db) -> List[Tuple[str, Dict]]:
+    """Return the hot queries whose winning plan falls back to a collection scan"""
+    regressions = []
+    for collection, query in HOT_QUERIES:
+        explain = await db[collection].find(query).explain()
+        winning_plan = explain["queryPlanner"]["winningPlan"]
+        if "COLLSCAN" in _plan_stages(winning_plan):
+            regressions.append((collection, query))
+    return regressions
@@ -0,0 +1,282 @@
+"""
+Prometheus metrics.
+
+A small in-process registry rendered in the Prometheus text format at
+GET /metrics. Observing a sample is a dict lookup plus a bisect into the
+bucket bounds, about a microsecond, so instrumentation stays cheap on the
+hot path. Values that already live elsewhere (bcrypt pool depth, seat
+holds, live subscribers) are exported by callbacks evaluated at scrape
+time instead of being mirrored on every change.
+
+What is collected:
+- HTTP: latency histogram per route and status, in-flight gauge
+- Event loop: scheduling lag of a periodic probe task
+- Mongo: command count and duration per collection and command, from
+  pymongo command monitoring (see MongoCommandMetrics)
+- Domain: seat holds per show, hold/booking counters, payment gateway
+  latency, bcrypt pool queue depth
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+EVENT_LOOP_PROBE_SECONDS = float(os.getenv("EVENT_LOOP_PROBE_SECONDS", "0.5"))
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MONGO_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_labels(self.labelnames, k)} {_number(v)}" for k, v in list(self._values.items())]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, *labels):
+        self._values[labels] = value
+
+    def dec(self, *labels, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+
+class CallbackMetric(Metric):
+    """Gauge or counter read from a callback at scrape time, returning {label values: value}"""
+
+    def __init__(self, name: str, documentation: str, callback: Callable[[], Dict[Tuple, float]],
+                 labelnames: Iterable[str] = (), kind: str = "gauge"):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+        self.kind = kind
+
+    def samples(self) -> List[str]:
+        try:
+            values = self.callback()
+        except Exception as e:
+            logger.error(f"Error collecting {self.name}: {e}")
+            return []
+        return [f"{self.name}{_labels(self.labelnames, k)} {_number(v)}" for k, v in values.items()]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (last one is +Inf), sum]
+        self._children: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, *labels):
+        child = self._children.get(labels)
+        if child is None:
+            child = self._children[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        child[0][bisect_left(self.buckets, value)] += 1
+        child[1] += value
+
+    def samples(self) -> List[str]:
+        lines = []
+        for labels, (counts, total) in list(self._children.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> bytes:
+        return ("\n".join(metric.render() for metric in self.metrics) + "\n").encode()
+
+
+registry = Registry()
+
+# Request counts by status are the histogram's _count series
+http_request_seconds = registry.register(Histogram(
+    "tickethub_http_request_duration_seconds", "HTTP request latency by route and status",
+    ["method", "route", "status"]
+))
+http_in_flight = registry.register(Gauge(
+    "tickethub_http_requests_in_flight", "HTTP requests currently being served"
+))
+event_loop_lag_seconds = registry.register(Histogram(
+    "tickethub_event_loop_lag_seconds", "Delay between when the loop probe was due and when it ran",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+))
+mongo_command_seconds = registry.register(Histogram(
+    "tickethub_mongo_command_duration_seconds", "MongoDB command latency", ["collection", "command"],
+    buckets=MONGO_BUCKETS
+))
+mongo_command_failures = registry.register(Counter(
+    "tickethub_mongo_command_failures_total", "MongoDB commands that failed", ["collection", "command"]
+))
+holds_created = registry.register(Counter(
+    "tickethub_seat_holds_created_total", "Seat hold requests that succeeded"
+))
+holds_expired = registry.register(Counter(
+    "tickethub_seat_holds_expired_total", "Session holds released by the expiry scheduler"
+))
+bookings_confirmed = registry.register(Counter(
+    "tickethub_bookings_confirmed_total", "Bookings confirmed after payment"
+))
+startup_seconds = registry.register(Gauge(
+    "tickethub_startup_seconds", "Time from startup until the worker was warmed up and ready"
+))
+payment_gateway_seconds = registry.register(Histogram(
+    "tickethub_payment_gateway_duration_seconds", "Payment gateway call latency by outcome", ["outcome"]
+))
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """
+    Command listener for the app's MongoClient (pass it in event_listeners).
+    Callbacks run on driver threads, so the pending map is only touched with
+    single dict operations and histogram updates take a lock.
+    """
+
+    def __init__(self):
+        self._pending: Dict[int, Tuple[str, str]] = {}
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        command = event.command
+        target = command.get("collection") if event.command_name == "getMore" else command.get(event.command_name)
+        collection = target if isinstance(target, str) else "-"
+        self._pending[event.request_id] = (collection, event.command_name)
+
+    def succeeded(self, event):
+        labels = self._pending.pop(event.request_id, None)
+        if labels is not None:
+            with self._lock:
+                mongo_command_seconds.observe(event.duration_micros / 1e6, *labels)
+
+    def failed(self, event):
+        labels = self._pending.pop(event.request_id, None)
+        if labels is not None:
+            with self._lock:
+                mongo_command_seconds.observe(event.duration_micros / 1e6, *labels)
+                mongo_command_failures.inc(*labels)
+
+
+class MetricsMiddleware:
+    """Plain ASGI middleware, BaseHTTPMiddleware would add a task per request"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        http_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_in_flight.dec()
+            # Label by route template so /shows/{show_id}/seats is one series, not one per show
+            route = scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            http_request_seconds.observe(time.perf_counter() - start, scope["method"], path, status[0])
+
+
+class EventLoopMonitor:
+    def __init__(self, interval: float = EVENT_LOOP_PROBE_SECONDS):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            due = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            event_loop_lag_seconds.observe(max(0.0, loop.time() - due))
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+event_loop_monitor = EventLoopMonitor()
+
+
+def register_callback(name: str, documentation: str, callback: Callable[[], Dict[Tuple, float]],
+                      labelnames: Iterable[str] = (), kind: str = "gauge"):
+    registry.register(CallbackMetric(name, documentation, callback, labelnames, kind))
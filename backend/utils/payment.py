@@ -1,15 +1,162 @@
-import razorpay
+import asyncio
 import os
 import hmac
 import hashlib
+import time
+from typing import TYPE_CHECKING
+
+from utils.metrics import payment_gateway_seconds
 
 # Razorpay Test Credentials
 RAZORPAY_KEY_ID = os.getenv("RAZORPAY_KEY_ID", "rzp_test_key")
 RAZORPAY_KEY_SECRET = os.getenv("RAZORPAY_KEY_SECRET", "rzp_test_secret")
+# Point at a local stub gateway (see stub_gateway.py) for load tests
+RAZORPAY_BASE_URL = os.getenv("RAZORPAY_BASE_URL", "https://api.razorpay.com/v1")
+
+if TYPE_CHECKING:
+    import httpx
+
+PAYMENT_TIMEOUT_SECONDS = float(os.getenv("PAYMENT_TIMEOUT_SECONDS", "5"))
+PAYMENT_MAX_RETRIES = int(os.getenv("PAYMENT_MAX_RETRIES", "2"))
+PAYMENT_MAX_CONNECTIONS = int(os.getenv("PAYMENT_MAX_CONNECTIONS", "100"))
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("PAYMENT_CIRCUIT_FAILURES", "5"))
+CIRCUIT_RESET_SECONDS = float(os.getenv("PAYMENT_CIRCUIT_RESET_SECONDS", "30"))
+
+
+class PaymentUnavailable(Exception):
+    """The gateway cannot take orders right now; retry_after is a hint in seconds"""
+
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitOpen(PaymentUnavailable):
+    pass
+
+
+class CircuitBreaker:
+    """
+    Stops calling the gateway after repeated failures, then lets one probe
+    through. Callers that pass check() must call done() when their call
+    ends, however it ends, so a lost probe does not keep the circuit shut.
+    """
+
+    def __init__(self, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 reset_seconds: float = CIRCUIT_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def retry_after(self) -> int:
+        if self.opened_at is None:
+            return 1
+        return max(1, int(self.opened_at + self.reset_seconds - time.monotonic()) + 1)
+
+    def check(self):
+        state = self.state
+        if state == "open":
+            raise CircuitOpen("Payment gateway circuit is open", self.retry_after())
+        if state == "half_open":
+            if self.probing:
+                # Everyone else waits for the probe's verdict
+                raise CircuitOpen("Payment gateway circuit is testing the gateway", 1)
+            self.probing = True
+
+    def done(self):
+        self.probing = False
+
+    def success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def failure(self):
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+
+class PaymentClient:
+    """
+    Async Razorpay client over a pooled keep-alive HTTP connection. httpx is
+    imported with the first order, so workers that never take a payment
+    (and every import of the app) skip loading it.
+    """
+
+    def __init__(self, base_url: str = RAZORPAY_BASE_URL):
+        self.base_url = base_url
+        self.breaker = CircuitBreaker()
+        self._client = None
+
+    @property
+    def client(self) -> "httpx.AsyncClient":
+        if self._client is None:
+            import httpx
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                auth=(RAZORPAY_KEY_ID, RAZORPAY_KEY_SECRET),
+                timeout=PAYMENT_TIMEOUT_SECONDS,
+                limits=httpx.Limits(
+                    max_connections=PAYMENT_MAX_CONNECTIONS,
+                    max_keepalive_connections=PAYMENT_MAX_CONNECTIONS
+                )
+            )
+        return self._client
+
+    async def create_order(self, data: dict) -> dict:
+        self.breaker.check()
+        try:
+            return await self._create_order(data)
+        finally:
+            self.breaker.done()
+
+    async def _create_order(self, data: dict) -> dict:
+        import httpx
+        # The receipt is the booking_id, so retries of the same order share a key
+        headers = {"Idempotency-Key": f"order-{data['receipt']}"}
+        for attempt in range(PAYMENT_MAX_RETRIES + 1):
+            start = time.perf_counter()
+            try:
+                response = await self.client.post("/orders", json=data, headers=headers)
+                payment_gateway_seconds.observe(time.perf_counter() - start, str(response.status_code))
+                if response.status_code < 500:
+                    response.raise_for_status()
+                    self.breaker.success()
+                    return response.json()
+                error = httpx.HTTPStatusError(
+                    f"Gateway error {response.status_code}", request=response.request, response=response
+                )
+            except httpx.TransportError as e:
+                payment_gateway_seconds.observe(time.perf_counter() - start, type(e).__name__)
+                error = e
+            except httpx.HTTPStatusError:
+                # 4xx is a request problem, retrying will not help
+                self.breaker.success()
+                raise
+            if attempt < PAYMENT_MAX_RETRIES:
+                await asyncio.sleep(0.1 * 2 ** attempt)
+        self.breaker.failure()
+        raise PaymentUnavailable(f"Payment gateway unavailable: {error}") from error
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
 
-client = razorpay.Client(auth=(RAZORPAY_KEY_ID, RAZORPAY_KEY_SECRET))
+payment_client = PaymentClient()
 
-def create_order(amount: int, currency: str = "INR", receipt: str = ""):
+async def create_order(amount: int, currency: str = "INR", receipt: str = ""):
     """
     Create a Razorpay order
     """
@@ -20,8 +167,11 @@ def create_order(amount: int, currency: str = "INR", receipt: str = ""):
             "receipt": receipt,
             "payment_capture": 1
         }
-        order = client.order.create(data=data)
+        order = await payment_client.create_order(data)
         return order
+    except PaymentUnavailable:
+        # An order the gateway never saw could not be paid, let the caller report the outage
+        raise
     except Exception as e:
         print(f"Error creating Razorpay order: {e}")
         # Return mock order for development
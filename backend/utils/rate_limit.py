@@ -0,0 +1,163 @@
+"""
+Token-bucket rate limiting.
+
+Each policy is "N requests per S seconds" with a burst of N. Buckets are
+keyed by (policy, key), where the key is an IP, an email or a session. They
+live in one LRU-bounded OrderedDict, so a check is O(1) and memory stays
+bounded however many keys a bot rotates through. A bucket evicted early
+just starts full again.
+
+RATE_LIMIT_BACKEND=mongo adds a shared check so limits hold across
+workers. It uses the same arbiter pattern as seat holds: one conditional
+upsert per check on a fixed _id in rate_limits, where a duplicate key
+error means the bucket is empty. The shared bucket is stored as a GCRA
+"theoretical arrival time", the single-number form of a token bucket.
+The local bucket is checked first, so traffic it already rejects never
+reaches Mongo.
+
+Policies are overridable per deployment, e.g. RATE_LIMIT_LOGIN_EMAIL=5/300.
+
+Per-IP policies need the real client address. The app is deployed behind
+the ingress that routes /api to it, so every connection comes from the
+proxy. RATE_LIMIT_PROXY_HOPS (default 1) is how many proxies in front of
+the app append to X-Forwarded-For. The client is the address the
+outermost of them appended, counted from the right, because entries
+further left are whatever the client sent. Requests without the header,
+such as local runs, use the connection's address. Set
+RATE_LIMIT_PROXY_HOPS=0 when the app takes connections directly. Any
+other value lets clients choose their own address.
+"""
+
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from fastapi import Request
+from pymongo.errors import DuplicateKeyError
+
+from utils.metrics import Counter, registry
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+# Proxies in front of the app that append to X-Forwarded-For, see above
+RATE_LIMIT_PROXY_HOPS = int(os.getenv("RATE_LIMIT_PROXY_HOPS", "1"))
+MAX_SEATS_PER_SESSION = int(os.getenv("MAX_SEATS_PER_SESSION", "10"))
+
+rate_limited = registry.register(Counter(
+    "tickethub_rate_limited_total", "Requests rejected by rate limiting, per policy", ["policy"]
+))
+
+
+class RateLimited(Exception):
+    def __init__(self, policy: str, retry_after: int):
+        super().__init__(f"Rate limit {policy} exceeded")
+        self.policy = policy
+        self.retry_after = retry_after
+
+
+class Policy:
+    __slots__ = ("name", "rate", "burst")
+
+    def __init__(self, name: str, default: str):
+        count, seconds = os.getenv(f"RATE_LIMIT_{name.upper()}", default).split("/")
+        self.name = name
+        self.burst = int(count)
+        self.rate = self.burst / float(seconds)
+
+
+POLICIES: Dict[str, Policy] = {
+    policy.name: policy for policy in [
+        Policy("login_ip", "20/60"),
+        Policy("login_email", "10/300"),
+        Policy("register_ip", "5/300"),
+        Policy("reserve_ip", "60/60"),
+        Policy("reserve_session", "20/60"),
+        # Charged per seat actually held, so rotating session_ids cannot hold a whole theater
+        Policy("reserve_ip_show_seats", "40/600"),
+        Policy("queue_ip", "30/60"),
+    ]
+}
+
+
+def max_seats_per_session(show: Dict) -> int:
+    """Seats one session may hold at once, shows may override the default with max_seats_per_session"""
+    return show.get("max_seats_per_session") or MAX_SEATS_PER_SESSION
+
+
+def client_ip(request: Request) -> str:
+    if RATE_LIMIT_PROXY_HOPS > 0:
+        forwarded = [address.strip() for address in request.headers.get("x-forwarded-for", "").split(",")]
+        if len(forwarded) >= RATE_LIMIT_PROXY_HOPS and forwarded[-RATE_LIMIT_PROXY_HOPS]:
+            return forwarded[-RATE_LIMIT_PROXY_HOPS]
+    return request.client.host if request.client else "unknown"
+
+
+class RateLimiter:
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        # (policy, key) -> [tokens, updated_at]
+        self._buckets: "OrderedDict[Tuple[str, str], list]" = OrderedDict()
+        self.db = None
+
+    def _take_local(self, policy: Policy, key: str, cost: int, now: float) -> float:
+        """Take cost tokens, returning 0 or the seconds until enough have refilled"""
+        bucket_key = (policy.name, key)
+        bucket = self._buckets.get(bucket_key)
+        if bucket is None:
+            bucket = self._buckets[bucket_key] = [float(policy.burst), now]
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(bucket_key)
+            bucket[0] = min(float(policy.burst), bucket[0] + (now - bucket[1]) * policy.rate)
+            bucket[1] = now
+        if cost > policy.burst:
+            return math.inf
+        if bucket[0] < cost:
+            return (cost - bucket[0]) / policy.rate
+        bucket[0] -= cost
+        return 0.0
+
+    async def _take_shared(self, policy: Policy, key: str, cost: int, now: float) -> float:
+        interval = 1 / policy.rate
+        # The bucket has room while the theoretical arrival time is no further ahead than the burst
+        limit = now + (policy.burst - cost) * interval
+        tat = {"$max": [{"$ifNull": ["$tat", now]}, now]}
+        try:
+            await self.db.rate_limits.update_one(
+                {"_id": f"{policy.name}:{key}", "tat": {"$lte": limit}},
+                [
+                    {"$set": {"tat": {"$add": [tat, cost * interval]}}},
+                    # The bucket is full again once tat has passed, the TTL index drops it then
+                    {"$set": {"expires_at": {"$toDate": {"$multiply": ["$tat", 1000]}}}}
+                ],
+                upsert=True
+            )
+        except DuplicateKeyError:
+            doc = await self.db.rate_limits.find_one({"_id": f"{policy.name}:{key}"}, {"tat": 1})
+            return max(interval, doc["tat"] - limit) if doc else interval
+        return 0.0
+
+    async def check(self, policy_name: str, key: Optional[str], cost: int = 1):
+        """Raise RateLimited if key has used up its allowance under the policy"""
+        if not RATE_LIMIT_ENABLED or not key:
+            return
+        policy = POLICIES[policy_name]
+        now = time.time()
+        wait = self._take_local(policy, key, cost, now)
+        if not wait and self.db is not None:
+            wait = await self._take_shared(policy, key, cost, now)
+        if wait:
+            rate_limited.inc(policy.name)
+            retry_after = policy.burst / policy.rate if math.isinf(wait) else wait
+            raise RateLimited(policy.name, max(1, math.ceil(retry_after)))
+
+    def use_shared_backend(self, db):
+        """Also enforce limits across workers through Mongo"""
+        self.db = db
+
+
+rate_limiter = RateLimiter()
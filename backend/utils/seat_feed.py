@@ -0,0 +1,143 @@
+"""
+Live seat-map fan-out.
+
+One ShowChannel per show with subscribers. Seat state changes arrive from
+the seat-state listener, are encoded once as a Server-Sent Event and the
+same bytes are queued for every subscriber. Hold expiry deltas come from
+the hold expiry scheduler releasing seats. Each subscriber has a small
+bounded queue. A slow consumer that overflows it does not get its backlog;
+it is marked for resync and gets one fresh snapshot when it catches up.
+"""
+
+import asyncio
+import logging
+import os
+from datetime import datetime
+from typing import AsyncIterator, Dict, Set
+
+from utils.event_bus import RESYNC as RESYNC_EVENT, event_bus
+from utils.seat_state import ShowSeatMap, seat_state
+from utils.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+SEAT_FEED_QUEUE_SIZE = int(os.getenv("SEAT_FEED_QUEUE_SIZE", "64"))
+SEAT_FEED_HEARTBEAT_SECONDS = float(os.getenv("SEAT_FEED_HEARTBEAT_SECONDS", "15"))
+
+RESYNC = object()
+
+
+def encode_event(event: str, data: Dict, event_id: int) -> bytes:
+    return f"id: {event_id}\nevent: {event}\ndata: ".encode() + dumps(data) + b"\n\n"
+
+
+class Subscriber:
+    __slots__ = ("queue", "resync")
+
+    def __init__(self):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SEAT_FEED_QUEUE_SIZE)
+        self.resync = False
+
+    def offer(self, message: bytes):
+        if self.resync:
+            # A snapshot is already on its way and will include this change
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Too slow to keep up: drop the backlog and resync from a snapshot
+            self.request_resync()
+
+    def request_resync(self):
+        if self.resync:
+            return
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(RESYNC)
+        self.resync = True
+
+
+class ShowChannel:
+    def __init__(self, show_id: str):
+        self.show_id = show_id
+        self.subscribers: Set[Subscriber] = set()
+        self._snapshot = (None, b"")
+
+    def snapshot_event(self, seat_map: ShowSeatMap) -> bytes:
+        """Encoded full snapshot, shared by all subscribers at the same version"""
+        encoded = seat_map.encoded(datetime.utcnow())
+        version, message = self._snapshot
+        if version != seat_map.version:
+            # Reuses the body already encoded for GET /seats at this version
+            message = f"id: {seat_map.version}\nevent: snapshot\ndata: ".encode() + encoded.body + b"\n\n"
+            self._snapshot = (seat_map.version, message)
+        return message
+
+
+class SeatFeed:
+    def __init__(self):
+        self.channels: Dict[str, ShowChannel] = {}
+
+    def publish(self, seat_map: ShowSeatMap, sold: int, held: int, released: int):
+        """Seat-state listener: fan a delta out to the show's subscribers"""
+        channel = self.channels.get(seat_map.show_id)
+        if channel is None or not channel.subscribers:
+            return
+        delta = {
+            "version": seat_map.version,
+            "sold": seat_map.labels(sold),
+            "held": seat_map.labels(held),
+            "released": seat_map.labels(released)
+        }
+        message = encode_event("delta", delta, seat_map.version)
+        for subscriber in channel.subscribers:
+            subscriber.offer(message)
+
+    def resync_all(self):
+        """Send every subscriber a fresh snapshot, after seat state was rebuilt"""
+        for channel in self.channels.values():
+            for subscriber in channel.subscribers:
+                subscriber.request_resync()
+
+    def subscriber_count(self, show_id: str = None) -> int:
+        if show_id is not None:
+            channel = self.channels.get(show_id)
+            return len(channel.subscribers) if channel else 0
+        return sum(len(c.subscribers) for c in self.channels.values())
+
+    async def stream(self, db, show_id: str, is_disconnected) -> AsyncIterator[bytes]:
+        """SSE stream: one snapshot, then deltas, with heartbeats and resyncs"""
+        channel = self.channels.get(show_id)
+        if channel is None:
+            channel = self.channels[show_id] = ShowChannel(show_id)
+        subscriber = Subscriber()
+        channel.subscribers.add(subscriber)
+        try:
+            seat_map = await seat_state.get(db, show_id)
+            if seat_map is None:
+                return
+            yield channel.snapshot_event(seat_map)
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscriber.queue.get(), SEAT_FEED_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await is_disconnected():
+                        return
+                    yield b": heartbeat\n\n"
+                    continue
+                if message is RESYNC:
+                    subscriber.resync = False
+                    seat_map = await seat_state.get(db, show_id)
+                    if seat_map is None:
+                        return
+                    message = channel.snapshot_event(seat_map)
+                yield message
+        finally:
+            channel.subscribers.discard(subscriber)
+            if not channel.subscribers:
+                self.channels.pop(show_id, None)
+
+
+seat_feed = SeatFeed()
+seat_state.listener = seat_feed.publish
+event_bus.subscribe(RESYNC_EVENT, lambda data: seat_feed.resync_all())
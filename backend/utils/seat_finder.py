@@ -0,0 +1,143 @@
+"""
+Best-available seat finder for group bookings.
+
+Free seats come from the show's in-memory seat map, so finding a block is
+pure bit arithmetic with no Mongo reads. A few shifts and ANDs of the
+hall's free mask give every position where the block fits within a row,
+and two more masks per row mark the positions that would strand a single
+free seat. Only the fitting positions nearest the centre of each row are
+scored, so a search costs a handful of big-integer operations per row,
+linear in the seats, whatever the group size or fragmentation. Rows are
+tried best first and the search stops once no remaining row can win.
+
+A block scores better the closer it is to the ideal row (SEAT_FINDER_IDEAL_ROW,
+as a fraction of the way back from the screen; rows[0] is nearest) and to
+the centre of its row. Leaving a single free seat next to the block costs
+ORPHAN_PENALTY, more than any difference in position, so stranded seats are
+only left when the row allows nothing else. When no row has room for the
+whole group it is split into the fewest, largest blocks that fit.
+"""
+
+import functools
+import os
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from utils.seat_state import ShowSeatMap
+
+SEAT_FINDER_IDEAL_ROW = float(os.getenv("SEAT_FINDER_IDEAL_ROW", "0.6"))
+ORPHAN_PENALTY = 2.0
+# Searches per request when Mongo reports seats held by another worker
+BEST_SEATS_ATTEMPTS = 3
+
+
+def block_starts(free: int, size: int) -> int:
+    """Mask of positions where size consecutive bits of free are all set"""
+    starts = free
+    span = 1
+    # After each step a set bit means span free seats starting there
+    while span * 2 <= size:
+        starts &= starts >> span
+        span *= 2
+    if span < size:
+        starts &= starts >> (size - span)
+    return starts
+
+
+def nearest(mask: int, target: int) -> List[int]:
+    """The set bits of mask closest to target from below (or at it) and from above"""
+    result = []
+    below = mask & ((2 << target) - 1)
+    if below:
+        result.append(below.bit_length() - 1)
+    above = mask >> (target + 1)
+    if above:
+        result.append(target + (above & -above).bit_length())
+    return result
+
+
+@functools.lru_cache(maxsize=64)
+def row_order(rows: int) -> List[Tuple[float, int]]:
+    """(row score, row) pairs, best row first"""
+    ideal_row = SEAT_FINDER_IDEAL_ROW * (rows - 1)
+    return sorted((abs(r - ideal_row) / max(1, rows - 1), r) for r in range(rows))
+
+
+@functools.lru_cache(maxsize=256)
+def in_row_starts(rows: int, width: int, size: int) -> int:
+    """Mask of hall positions where a block of size does not run past the end of its row"""
+    row_bits = sum(1 << (r * width) for r in range(rows))
+    # No carries between rows, each row's part is below 1 << width
+    return ((1 << (width - size + 1)) - 1) * row_bits
+
+
+def hall_starts(seat_map: ShowSeatMap, free: int, size: int) -> int:
+    """Mask of hall positions where a block of size free seats fits within one row"""
+    if size > seat_map.seats_per_row:
+        return 0
+    return block_starts(free, size) & in_row_starts(len(seat_map.rows), seat_map.seats_per_row, size)
+
+
+def best_block(seat_map: ShowSeatMap, free: int, size: int) -> Optional[Tuple[float, int, int]]:
+    """Best (score, row, start) for a block of size free seats, or None if no row has room"""
+    fits = hall_starts(seat_map, free, size)
+    if not fits:
+        return None
+    width = seat_map.seats_per_row
+    row_mask = (1 << width) - 1
+    # Start that would centre the block in its row
+    ideal_start = (width - size) / 2
+    best = None
+    for row_score, r in row_order(len(seat_map.rows)):
+        if best is not None and row_score >= best[0]:
+            # Rows come best first, so no later block can win either
+            break
+        starts = (fits >> (r * width)) & row_mask
+        if not starts:
+            continue
+        row_free = (free >> (r * width)) & row_mask
+        # Starts that would strand one free seat just left / just right of the block
+        orphan_left = (row_free << 1) & ~(row_free << 2)
+        orphan_right = (row_free >> size) & ~(row_free >> (size + 1))
+        for orphans, allowed in enumerate((
+            starts & ~(orphan_left | orphan_right),
+            starts & ~(orphan_left & orphan_right),
+            starts,
+        )):
+            if allowed:
+                break
+        for s in nearest(allowed, int(ideal_start)):
+            score = row_score + abs(s - ideal_start) / max(1, width - size) + orphans * ORPHAN_PENALTY
+            if best is None or score < best[0]:
+                best = (score, r, s)
+    return best
+
+
+def best_available(seat_map: ShowSeatMap, session_id: str, count: int, now: datetime,
+                   exclude: int = 0) -> List[str]:
+    """
+    Labels of the best count free seats for a session, contiguous where
+    possible, or [] if the show has fewer than count free seats. Seats the
+    session already holds count as free; seats in exclude do not.
+    """
+    total = len(seat_map.rows) * seat_map.seats_per_row
+    free = ~(seat_map.taken(session_id, now) | exclude) & ((1 << total) - 1)
+    if free.bit_count() < count:
+        return []
+
+    seats = []
+    remaining = count
+    size = count
+    while remaining:
+        size = min(size, remaining)
+        block = best_block(seat_map, free, size)
+        while block is None:
+            # No row fits the rest of the group, take the largest block that does fit
+            size -= 1
+            block = best_block(seat_map, free, size)
+        _, row, start = block
+        first = row * seat_map.seats_per_row + start
+        free &= ~(((1 << size) - 1) << first)
+        seats.extend(seat_map.label(i) for i in range(first, first + size))
+        remaining -= size
+    return seats
@@ -0,0 +1,142 @@
+"""
+Race-free seat holds backed by one seat_reservations document per seat.
+
+Every (show_id, seat) pair has a fixed _id, so the unique _id index makes
+MongoDB the arbiter: a hold is a conditional upsert that only matches a
+free slot (expired, or already held by the same session). If the seat is
+held by someone else or sold, the upsert collides on _id and fails with a
+duplicate key error, all in a single round trip.
+"""
+
+from datetime import datetime
+from typing import Dict, List
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+DUPLICATE_KEY = 11000
+
+
+def hold_key(show_id: str, seat: str) -> str:
+    return f"{show_id}:{seat}"
+
+
+async def acquire_holds(db, show_id: str, session_id: str, seats: List[str], expires_at: datetime) -> List[str]:
+    """
+    Hold all seats for a session or none of them.
+    Returns the seats that could not be held, an empty list means success.
+    An empty selection releases whatever the session held on the show.
+    """
+    if not seats:
+        await release_holds(db, show_id, session_id)
+        return []
+    now = datetime.utcnow()
+    keys = [hold_key(show_id, seat) for seat in seats]
+    operations = [
+        UpdateOne(
+            {
+                "_id": key,
+                "status": "held",
+                "$or": [
+                    {"session_id": session_id},
+                    {"expires_at": {"$lte": now}}
+                ]
+            },
+            {
+                "$set": {
+                    "show_id": show_id,
+                    "seat": seat,
+                    "session_id": session_id,
+                    "status": "held",
+                    "expires_at": expires_at,
+                    "created_at": now
+                }
+            },
+            upsert=True
+        )
+        for key, seat in zip(keys, seats)
+    ]
+
+    try:
+        await db.seat_reservations.bulk_write(operations, ordered=False)
+    except BulkWriteError as e:
+        errors = e.details.get("writeErrors", [])
+        if any(error["code"] != DUPLICATE_KEY for error in errors):
+            raise
+        conflicts = [seats[error["index"]] for error in errors]
+        # All-or-nothing: give back everything this session holds on the show
+        await release_holds(db, show_id, session_id)
+        return conflicts
+
+    # Drop seats from the session's previous selection
+    await db.seat_reservations.delete_many({
+        "session_id": session_id,
+        "status": "held",
+        "_id": {"$nin": keys}
+    })
+    return []
+
+
+async def release_holds(db, show_id: str, session_id: str):
+    """Release every seat a session holds on a show"""
+    await db.seat_reservations.delete_many({
+        "show_id": show_id,
+        "session_id": session_id,
+        "status": "held"
+    })
+
+
+async def sell_seats(db, show_id: str, session_id: str, seats: List[str], booking_id: str,
+                     session=None) -> List[str]:
+    """
+    Turn a session's holds into permanent sold markers that can never be re-held.
+    A seat qualifies if this session holds it, its hold lapsed without anyone
+    else taking it, or this booking already sold it (duplicate callbacks).
+    Returns the seats that went to someone else, an empty list means success.
+    """
+    if not seats:
+        return []
+    now = datetime.utcnow()
+    operations = [
+        UpdateOne(
+            {
+                "_id": hold_key(show_id, seat),
+                "$or": [
+                    {"status": "held", "session_id": session_id},
+                    {"status": "held", "expires_at": {"$lte": now}},
+                    {"status": "sold", "booking_id": booking_id}
+                ]
+            },
+            {
+                "$set": {
+                    "show_id": show_id,
+                    "seat": seat,
+                    "session_id": session_id,
+                    "status": "sold",
+                    "booking_id": booking_id,
+                    "created_at": now
+                },
+                "$unset": {"expires_at": ""}
+            },
+            upsert=True
+        )
+        for seat in seats
+    ]
+    try:
+        await db.seat_reservations.bulk_write(operations, ordered=False, session=session)
+    except BulkWriteError as e:
+        errors = e.details.get("writeErrors", [])
+        if any(error["code"] != DUPLICATE_KEY for error in errors):
+            raise
+        return [seats[error["index"]] for error in errors]
+    return []
+
+
+def group_holds(docs: List[Dict]) -> Dict[str, Dict]:
+    """Group per-seat hold documents by session_id"""
+    sessions: Dict[str, Dict] = {}
+    for doc in docs:
+        session = sessions.setdefault(doc["session_id"], {"seats": [], "expires_at": doc["expires_at"]})
+        session["seats"].append(doc["seat"])
+        session["expires_at"] = min(session["expires_at"], doc["expires_at"])
+    return sessions
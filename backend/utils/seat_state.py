@@ -0,0 +1,344 @@
+"""
+In-memory seat state for hot shows.
+
+Each show keeps two bitmaps (booked and held) sized from the theater's
+seat_layout. A map is built once from Mongo and then updated in place as
+seats are reserved, released and paid for, so seat-map reads and conflict
+checks never touch the bookings / seat_reservations collections.
+
+Every change bumps the map's version and, when a listener is attached,
+reports which seats were sold, newly held or released, so live
+subscribers can be sent deltas instead of polling.
+
+Seat-map reads share one encoded snapshot per version (see encoded), so a
+crowd polling a hot show costs one encode per change rather than one per
+request, and the version doubles as the ETag for conditional requests.
+Concurrent first reads of a show wait on a per-show lock and share a
+single load from Mongo.
+
+With several workers, holds and sales made by siblings arrive over the
+event bus and are applied with the same hold / release / book calls, so
+live subscribers on every worker see them. Events for a show that is
+still loading are replayed once the load finishes; every change is
+idempotent, so replaying one the load already saw is harmless.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from utils.catalogue_cache import CachedBody
+from utils.event_bus import RESYNC, event_bus
+from utils.seat_holds import group_holds
+from utils.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+SEAT_STATE_MAX_SHOWS = int(os.getenv("SEAT_STATE_MAX_SHOWS", "1024"))
+SEAT_STATE_MAX_SESSIONS = 65536
+
+
+class ShowSeatMap:
+    """Booked / held seat bitmaps for a single show"""
+
+    __slots__ = ("show_id", "show", "rows", "seats_per_row", "_row_index",
+                 "booked", "held", "holds", "version", "listener", "_encoded")
+
+    def __init__(self, show_id: str, show: Dict, seat_layout: Dict):
+        self.show_id = show_id
+        self.show = show
+        self.rows: List[str] = list(seat_layout["rows"])
+        self.seats_per_row: int = seat_layout["seats_per_row"]
+        self._row_index = {row: i for i, row in enumerate(self.rows)}
+        self.booked = 0
+        self.held = 0
+        # session_id -> (seat mask, expires_at)
+        self.holds: Dict[str, Tuple[int, datetime]] = {}
+        # Start from the clock so a reloaded map never reuses an earlier version
+        self.version = int(time.time() * 1000)
+        # listener(seat_map, sold_mask, held_mask, released_mask)
+        self.listener: Optional[Callable[["ShowSeatMap", int, int, int], None]] = None
+        self._encoded: Optional[CachedBody] = None
+
+    def index(self, seat: str) -> int:
+        """Bit index for a seat label like "A12", or -1 if it is not in the layout"""
+        for split in (1, 2):
+            row = self._row_index.get(seat[:split])
+            if row is None:
+                continue
+            number = seat[split:]
+            if number.isdigit() and 1 <= int(number) <= self.seats_per_row:
+                return row * self.seats_per_row + int(number) - 1
+        return -1
+
+    def label(self, index: int) -> str:
+        row, col = divmod(index, self.seats_per_row)
+        return f"{self.rows[row]}{col + 1}"
+
+    def mask(self, seats: Iterable[str]) -> int:
+        mask = 0
+        for seat in seats:
+            i = self.index(seat)
+            if i >= 0:
+                mask |= 1 << i
+        return mask
+
+    def labels(self, mask: int) -> List[str]:
+        seats = []
+        while mask:
+            low = mask & -mask
+            seats.append(self.label(low.bit_length() - 1))
+            mask ^= low
+        return seats
+
+    def _changed(self, booked_before: int, held_before: int) -> None:
+        if self.booked == booked_before and self.held == held_before:
+            return
+        self.version += 1
+        if self.listener is not None:
+            reserved_before = held_before & ~booked_before
+            reserved = self.held & ~self.booked
+            self.listener(
+                self,
+                self.booked & ~booked_before,
+                reserved & ~reserved_before,
+                reserved_before & ~reserved & ~self.booked
+            )
+
+    def expire(self, now: datetime) -> None:
+        """Drop holds whose expiry has passed"""
+        expired = [sid for sid, (_, expires_at) in self.holds.items() if expires_at <= now]
+        if expired:
+            held_before = self.held
+            for session_id in expired:
+                del self.holds[session_id]
+            self._recompute_held()
+            self._changed(self.booked, held_before)
+
+    def _recompute_held(self) -> None:
+        held = 0
+        for mask, _ in self.holds.values():
+            held |= mask
+        self.held = held
+
+    def taken(self, session_id: str, now: datetime) -> int:
+        """Mask of seats booked or held by sessions other than session_id"""
+        self.expire(now)
+        if session_id not in self.holds:
+            return self.booked | self.held
+        # A session may re-select seats it already holds
+        others = 0
+        for sid, (mask, _) in self.holds.items():
+            if sid != session_id:
+                others |= mask
+        return self.booked | others
+
+    def unavailable(self, seats: List[str], session_id: str, now: datetime) -> List[str]:
+        """Seats from the request that are invalid, booked or held by another session"""
+        taken = self.taken(session_id, now)
+        result = []
+        for seat in seats:
+            i = self.index(seat)
+            if i < 0 or taken >> i & 1:
+                result.append(seat)
+        return result
+
+    def held_by(self, session_id: str, now: datetime) -> List[str]:
+        """Seats session_id holds right now"""
+        self.expire(now)
+        hold = self.holds.get(session_id)
+        return self.labels(hold[0]) if hold else []
+
+    def hold(self, session_id: str, seats: List[str], expires_at: datetime) -> None:
+        mask = self.mask(seats)
+        held_before = self.held
+        replaced = self.holds.get(session_id)
+        self.holds[session_id] = (mask, expires_at)
+        if replaced is None:
+            self.held |= mask
+        else:
+            self._recompute_held()
+        self._changed(self.booked, held_before)
+
+    def release(self, session_id: str) -> None:
+        if self.holds.pop(session_id, None) is not None:
+            held_before = self.held
+            self._recompute_held()
+            self._changed(self.booked, held_before)
+
+    def book(self, seats: List[str]) -> None:
+        booked_before = self.booked
+        self.booked |= self.mask(seats)
+        self._changed(booked_before, self.held)
+
+    def snapshot(self, now: datetime) -> Dict:
+        self.expire(now)
+        return {
+            "version": self.version,
+            "rows": self.rows,
+            "seats_per_row": self.seats_per_row,
+            "booked_seats": self.labels(self.booked),
+            "reserved_seats": self.labels(self.held & ~self.booked),
+        }
+
+    def encoded(self, now: datetime) -> CachedBody:
+        """JSON snapshot with the version as its ETag, encoded once per version"""
+        self.expire(now)
+        etag = f'"{self.version}"'
+        if self._encoded is None or self._encoded.etag != etag:
+            self._encoded = CachedBody(dumps(self.snapshot(now)), 0, etag)
+        return self._encoded
+
+
+class SeatStateStore:
+    """LRU-bounded registry of ShowSeatMaps, built lazily from Mongo"""
+
+    def __init__(self, max_shows: int = SEAT_STATE_MAX_SHOWS):
+        self.max_shows = max_shows
+        self._maps: "OrderedDict[str, ShowSeatMap]" = OrderedDict()
+        self._locks: Dict[str, asyncio.Lock] = {}
+        # show_id -> changes from other workers that arrived while the map was loading
+        self._pending: Dict[str, List[Callable[[ShowSeatMap], None]]] = {}
+        # session_id -> show_id of its current hold, a session holds seats in one show at a time
+        self._sessions: "OrderedDict[str, str]" = OrderedDict()
+        # Attached to every map once it is loaded, see ShowSeatMap.listener
+        self.listener = None
+
+    def peek(self, show_id: str) -> Optional[ShowSeatMap]:
+        """Return the map for a show only if it is already loaded"""
+        return self._maps.get(show_id)
+
+    async def get(self, db, show_id: str) -> Optional[ShowSeatMap]:
+        """Return the map for a show, building it from Mongo on first use"""
+        seat_map = self._maps.get(show_id)
+        if seat_map is not None:
+            self._maps.move_to_end(show_id)
+            return seat_map
+
+        lock = self._locks.setdefault(show_id, asyncio.Lock())
+        async with lock:
+            seat_map = self._maps.get(show_id)
+            if seat_map is None:
+                self._pending[show_id] = []
+                try:
+                    seat_map = await self._load(db, show_id)
+                finally:
+                    pending = self._pending.pop(show_id)
+                if seat_map is not None:
+                    for change in pending:
+                        change(seat_map)
+                    seat_map.listener = self.listener
+                    self._maps[show_id] = seat_map
+                    while len(self._maps) > self.max_shows:
+                        evicted, _ = self._maps.popitem(last=False)
+                        self._locks.pop(evicted, None)
+        if seat_map is None:
+            self._locks.pop(show_id, None)
+        return seat_map
+
+    async def _load(self, db, show_id: str) -> Optional[ShowSeatMap]:
+        show = await db.shows.find_one({"_id": show_id})
+        if not show:
+            return None
+        theater = await db.theaters.find_one({"_id": show["theater_id"]}, {"seat_layout": 1})
+        if not theater:
+            return None
+
+        seat_map = ShowSeatMap(show_id, show, theater["seat_layout"])
+
+        bookings = db.bookings.find(
+            {"show_id": show_id, "payment_status": "success"}, {"seats": 1, "_id": 0}
+        )
+        async for booking in bookings:
+            seat_map.book(booking["seats"])
+
+        now = datetime.utcnow()
+        held = []
+        reservations = db.seat_reservations.find(
+            {"show_id": show_id},
+            {"seat": 1, "seats": 1, "session_id": 1, "status": 1, "expires_at": 1, "_id": 0}
+        )
+        async for reservation in reservations:
+            status = reservation.get("status")
+            if status == "sold":
+                seat_map.book([reservation["seat"]])
+            elif status is None:
+                # One document per session from before per-seat holds, live until it expires
+                if reservation["expires_at"] > now:
+                    held.extend(
+                        {"seat": seat, "session_id": reservation["session_id"], "expires_at": reservation["expires_at"]}
+                        for seat in reservation["seats"]
+                    )
+            elif reservation["expires_at"] > now:
+                held.append(reservation)
+        for session_id, session in group_holds(held).items():
+            seat_map.hold(session_id, session["seats"], session["expires_at"])
+
+        logger.info(f"Loaded seat state for show {show_id}")
+        return seat_map
+
+    def hold(self, seat_map: ShowSeatMap, session_id: str, seats: List[str], expires_at: datetime) -> None:
+        """Record a session's hold, dropping any hold it had on another show"""
+        previous = self._sessions.pop(session_id, None)
+        if previous is not None and previous != seat_map.show_id:
+            previous_map = self._maps.get(previous)
+            if previous_map is not None:
+                previous_map.release(session_id)
+        seat_map.hold(session_id, seats, expires_at)
+        self._sessions[session_id] = seat_map.show_id
+        if len(self._sessions) > SEAT_STATE_MAX_SESSIONS:
+            self._sessions.popitem(last=False)
+
+    def apply(self, show_id: str, change: Callable[[ShowSeatMap], None]) -> None:
+        """Apply a change made by another worker to the show's map, if this worker has one"""
+        pending = self._pending.get(show_id)
+        if pending is not None:
+            pending.append(change)
+            return
+        seat_map = self._maps.get(show_id)
+        if seat_map is not None:
+            change(seat_map)
+
+    def items(self):
+        """Loaded (show_id, ShowSeatMap) pairs, for metrics"""
+        return list(self._maps.items())
+
+    def invalidate(self, show_id: Optional[str] = None) -> None:
+        if show_id is None:
+            self._maps.clear()
+        else:
+            self._maps.pop(show_id, None)
+
+
+seat_state = SeatStateStore()
+
+
+def _seat_held(data: Dict):
+    expires_at = datetime.fromisoformat(data["expires_at"])
+    seat_state.apply(data["show_id"], lambda m: seat_state.hold(m, data["session_id"], data["seats"], expires_at))
+
+
+def _hold_released(data: Dict):
+    if data.get("expired"):
+        # The session may have re-held on another worker since, only drop holds that really lapsed
+        seat_state.apply(data["show_id"], lambda m: m.expire(datetime.utcnow()))
+    else:
+        seat_state.apply(data["show_id"], lambda m: m.release(data["session_id"]))
+
+
+def _booking_confirmed(data: Dict):
+    def change(seat_map: ShowSeatMap):
+        seat_map.book(data["seats"])
+        seat_map.release(data["session_id"])
+    seat_state.apply(data["show_id"], change)
+
+
+event_bus.subscribe("seat_held", _seat_held)
+event_bus.subscribe("hold_released", _hold_released)
+event_bus.subscribe("booking_confirmed", _booking_confirmed)
+# Changes may have been missed, rebuild maps from Mongo on next use
+event_bus.subscribe(RESYNC, lambda data: seat_state.invalidate())
@@ -0,0 +1,63 @@
+"""
+Response serialization.
+
+Every /api route encodes its result with orjson, which handles datetime
+natively (same ISO format as FastAPI's encoder) and ObjectId through a
+str fallback. FastJSONRoute hands plain dict/list results straight to
+FastJSONResponse, so FastAPI's jsonable_encoder walk over the payload is
+skipped entirely. Routes that declare an explicit response_model keep the
+normal FastAPI path.
+
+The projections below trim Mongo documents to what each endpoint returns,
+so fields the client never shows are not read, shipped or encoded.
+"""
+
+import functools
+from typing import Any, Callable
+
+import orjson
+from bson import ObjectId
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.responses import JSONResponse, Response
+from fastapi.routing import APIRoute
+
+MOVIE_LISTING_FIELDS = ["title", "poster", "rating", "votes", "genres", "languages", "format", "duration", "release_date"]
+MOVIE_DETAIL_FIELDS = MOVIE_LISTING_FIELDS + ["trailer", "description"]
+
+
+def id_projection(fields) -> dict:
+    """$project stage body that renames _id to a string id and keeps fields"""
+    return {"_id": 0, "id": {"$toString": "$_id"}, **{field: 1 for field in fields}}
+
+
+def _default(value: Any):
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(payload: Any) -> bytes:
+    return orjson.dumps(payload, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class FastJSONRoute(APIRoute):
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        if isinstance(kwargs.get("response_model", DefaultPlaceholder(None)), DefaultPlaceholder):
+            endpoint = _encode_result(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+
+def _encode_result(endpoint: Callable) -> Callable:
+    # functools.wraps keeps the signature FastAPI reads for dependency injection
+    @functools.wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        result = await endpoint(*args, **kwargs)
+        if isinstance(result, Response):
+            return result
+        return FastJSONResponse(result)
+    return wrapper
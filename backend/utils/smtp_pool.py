@@ -0,0 +1,169 @@
+"""
+Pooled async SMTP client.
+
+Keeps SMTP_POOL_SIZE persistent connections open and reuses them across
+messages instead of a connect/EHLO/QUIT round per email. When the server
+advertises PIPELINING (RFC 2920), MAIL FROM, RCPT TO and DATA go out in one
+write, so each message costs two round trips: the envelope and the body.
+"""
+
+import asyncio
+import logging
+import os
+import ssl
+from base64 import b64encode
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SMTP_HOST = os.getenv("SMTP_HOST", "")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "25"))
+SMTP_USERNAME = os.getenv("SMTP_USERNAME", "")
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD", "")
+# Implicit TLS (port 465); plain connections are meant for local relays and sinks
+SMTP_USE_TLS = os.getenv("SMTP_USE_TLS", "false").lower() == "true"
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "4"))
+SMTP_TIMEOUT_SECONDS = float(os.getenv("SMTP_TIMEOUT_SECONDS", "10"))
+
+
+class SmtpError(Exception):
+    def __init__(self, code: int, message: str):
+        super().__init__(f"{code} {message}")
+        self.code = code
+        self.message = message
+
+    @property
+    def permanent(self) -> bool:
+        """5xx replies will not succeed on retry, 4xx and connection errors might"""
+        return 500 <= self.code < 600
+
+
+class SmtpConnection:
+    def __init__(self, host: str, port: int, use_tls: bool = False):
+        self.host = host
+        self.port = port
+        self.use_tls = use_tls
+        self.pipelining = False
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def _reply(self) -> Tuple[int, str]:
+        lines = []
+        while True:
+            line = await asyncio.wait_for(self._reader.readline(), SMTP_TIMEOUT_SECONDS)
+            if not line:
+                raise ConnectionError("SMTP server closed the connection")
+            line = line.decode("utf-8", "replace").rstrip("\r\n")
+            lines.append(line[4:])
+            if len(line) < 4 or line[3] != "-":
+                return int(line[:3]), "\n".join(lines)
+
+    async def _expect(self, *codes: int) -> str:
+        code, message = await self._reply()
+        if code not in codes:
+            raise SmtpError(code, message)
+        return message
+
+    async def _command(self, command: str, *codes: int) -> str:
+        self._writer.write(command.encode() + b"\r\n")
+        await self._writer.drain()
+        return await self._expect(*codes)
+
+    async def connect(self):
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(
+                self.host, self.port, ssl=ssl.create_default_context() if self.use_tls else None
+            ),
+            SMTP_TIMEOUT_SECONDS
+        )
+        await self._expect(220)
+        extensions = await self._command("EHLO tickethub", 250)
+        self.pipelining = "PIPELINING" in extensions.upper().split("\n")
+        if SMTP_USERNAME:
+            token = b64encode(f"\0{SMTP_USERNAME}\0{SMTP_PASSWORD}".encode()).decode()
+            await self._command(f"AUTH PLAIN {token}", 235)
+
+    async def send(self, sender: str, recipients: List[str], message: bytes):
+        envelope = [f"MAIL FROM:<{sender}>"] + [f"RCPT TO:<{r}>" for r in recipients] + ["DATA"]
+        if self.pipelining:
+            self._writer.write("".join(f"{line}\r\n" for line in envelope).encode())
+            await self._writer.drain()
+            replies = [await self._reply() for _ in envelope]
+        else:
+            replies = []
+            for line in envelope:
+                self._writer.write(line.encode() + b"\r\n")
+                await self._writer.drain()
+                replies.append(await self._reply())
+                if replies[-1][0] >= 400:
+                    break
+        expected = [250] * (len(envelope) - 1) + [354]
+        for (code, text), want in zip(replies, expected):
+            if code != want:
+                if replies[-1][0] == 354:
+                    # DATA was accepted after a failed RCPT, end it empty
+                    self._writer.write(b".\r\n")
+                    await self._reply()
+                await self._command("RSET", 250)
+                raise SmtpError(code, text)
+
+        # Dot-stuff lines that start with "." and terminate the body
+        body = message.replace(b"\r\n.", b"\r\n..")
+        if body.startswith(b"."):
+            body = b"." + body
+        if not body.endswith(b"\r\n"):
+            body += b"\r\n"
+        self._writer.write(body + b".\r\n")
+        await self._writer.drain()
+        await self._expect(250)
+
+    async def close(self):
+        if self._writer is None:
+            return
+        try:
+            if not self._writer.is_closing():
+                self._writer.write(b"QUIT\r\n")
+                await self._writer.drain()
+            self._writer.close()
+            await self._writer.wait_closed()
+        except (ConnectionError, OSError):
+            pass
+        self._writer = None
+
+
+class SmtpPool:
+    """Fixed set of persistent connections, reconnected lazily after errors"""
+
+    def __init__(self, host: str = SMTP_HOST, port: int = SMTP_PORT, size: int = SMTP_POOL_SIZE,
+                 use_tls: bool = SMTP_USE_TLS):
+        self.size = size
+        self._idle: asyncio.Queue = asyncio.Queue()
+        for _ in range(size):
+            self._idle.put_nowait(SmtpConnection(host, port, use_tls))
+
+    async def send(self, sender: str, recipients: List[str], message: bytes):
+        connection: SmtpConnection = await self._idle.get()
+        try:
+            if not connection.connected:
+                await connection.connect()
+            await connection.send(sender, recipients, message)
+        except SmtpError as e:
+            if e.code == 421:
+                # Server is closing the channel
+                await connection.close()
+            raise
+        except (ConnectionError, OSError, asyncio.TimeoutError):
+            # Idle connections get dropped by servers, the next send reconnects
+            await connection.close()
+            raise
+        finally:
+            self._idle.put_nowait(connection)
+
+    async def close(self):
+        for _ in range(self.size):
+            connection = await self._idle.get()
+            await connection.close()
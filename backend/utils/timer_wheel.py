@@ -0,0 +1,91 @@
+"""
+Hierarchical timer wheel.
+
+Timers live in LEVELS wheels of SLOTS buckets each. Level 0 buckets are
+one tick wide, level 1 buckets SLOTS ticks wide, and so on. With the
+defaults (1 s tick, 64 slots, 4 levels) the wheel spans about 194 days.
+schedule() and cancel() are O(1) dict operations. advance() visits one
+level-0 bucket per tick. When a lower wheel wraps, the matching bucket of
+the level above is redistributed ("cascaded") into finer buckets.
+"""
+
+import math
+from typing import Any, Dict, Hashable, List, Tuple
+
+
+class TimerWheel:
+    def __init__(self, now: float, tick_seconds: float = 1.0, slots: int = 64, levels: int = 4):
+        self.tick_seconds = tick_seconds
+        self.slots = slots
+        self.levels = levels
+        self.current = int(now / tick_seconds)
+        self._wheels: List[List[Dict[Hashable, Tuple[int, Any]]]] = [
+            [dict() for _ in range(slots)] for _ in range(levels)
+        ]
+        # key -> (level, slot) so cancel() can find the bucket directly
+        self._where: Dict[Hashable, Tuple[int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._where
+
+    def _place(self, key: Hashable, tick: int, payload: Any):
+        level = 0
+        span = self.slots
+        # Lowest level whose bucket range contains both now and the deadline
+        while level < self.levels - 1 and tick // span != self.current // span:
+            level += 1
+            span *= self.slots
+        position = tick
+        if tick // span != self.current // span:
+            # Beyond the top wheel: park in the bucket cascaded when the top wheel wraps
+            position = (self.current // span + 1) * span
+        slot = (position // self.slots ** level) % self.slots
+        self._wheels[level][slot][key] = (tick, payload)
+        self._where[key] = (level, slot)
+
+    def schedule(self, key: Hashable, deadline: float, payload: Any = None):
+        """(Re)schedule key to fire at the first tick at or after deadline"""
+        self.cancel(key)
+        tick = max(math.ceil(deadline / self.tick_seconds), self.current + 1)
+        self._place(key, tick, payload)
+
+    def cancel(self, key: Hashable) -> bool:
+        where = self._where.pop(key, None)
+        if where is None:
+            return False
+        level, slot = where
+        del self._wheels[level][slot][key]
+        return True
+
+    def advance(self, now: float) -> List[Tuple[Hashable, Any]]:
+        """Move the wheel up to now and return the (key, payload) pairs that fired"""
+        fired = []
+        target = int(now / self.tick_seconds)
+        while self.current < target:
+            self.current += 1
+            span = 1
+            for level in range(1, self.levels):
+                span *= self.slots
+                if self.current % span:
+                    break
+                bucket = self._wheels[level][(self.current // span) % self.slots]
+                entries = list(bucket.items())
+                bucket.clear()
+                for key, (tick, payload) in entries:
+                    del self._where[key]
+                    self._place(key, max(tick, self.current), payload)
+
+            bucket = self._wheels[0][self.current % self.slots]
+            if bucket:
+                entries = list(bucket.items())
+                bucket.clear()
+                for key, (tick, payload) in entries:
+                    del self._where[key]
+                    if tick > self.current:
+                        self._place(key, tick, payload)
+                    else:
+                        fired.append((key, payload))
+        return fired
@@ -0,0 +1,202 @@
+"""
+In-memory title search for movie autocomplete.
+
+Titles are normalized (accents, punctuation and case folded) and split into
+tokens. Three structures are built once per catalogue version:
+
+- postings: token -> movie indexes, for exact words
+- prefixes: token prefix -> best-ranked movie indexes (capped), for the word being typed
+- sorted tokens: for uncapped prefix matches when results are filtered
+- deletes: every token with one character removed -> tokens, to find close
+  spellings when nothing matches exactly (symmetric-delete lookup)
+
+Results are ranked by match quality first and then by popularity, which
+combines rating and vote count. search() can filter movies (by genre, say)
+before the limit applies, so a filter never drops matches the cap hid.
+"""
+
+import asyncio
+import bisect
+import logging
+import math
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+MAX_PREFIX_LENGTH = 12
+PREFIX_RESULTS = 100
+
+_non_alnum = re.compile(r"[^a-z0-9]+")
+_vote_units = {"K": 1e3, "M": 1e6, "B": 1e9}
+
+
+def normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return _non_alnum.sub(" ", text.lower()).strip()
+
+
+def parse_votes(votes) -> float:
+    """Turn vote strings like "245K" or "2.5M" into numbers"""
+    if isinstance(votes, (int, float)):
+        return float(votes)
+    votes = str(votes or "").strip().upper()
+    if not votes:
+        return 0.0
+    unit = _vote_units.get(votes[-1], 1)
+    try:
+        return float(votes.rstrip("KMB")) * unit
+    except ValueError:
+        return 0.0
+
+
+def popularity(movie: Dict) -> float:
+    return (movie.get("rating") or 0) * math.log10(parse_votes(movie.get("votes")) + 10)
+
+
+def deletes(token: str) -> Set[str]:
+    """The token itself plus every variant with one character removed"""
+    return {token} | {token[:i] + token[i + 1:] for i in range(len(token))}
+
+
+def within_distance(a: str, b: str, limit: int) -> bool:
+    """Levenshtein distance <= limit, with early exit"""
+    if abs(len(a) - len(b)) > limit:
+        return False
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return False
+        previous = current
+    return previous[-1] <= limit
+
+
+class TitleIndex:
+    def __init__(self):
+        self.version = None
+        self.movies: List[Dict] = []
+        self.tokens: List[List[str]] = []
+        self.postings: Dict[str, List[int]] = {}
+        self.prefixes: Dict[str, List[int]] = {}
+        self.sorted_tokens: List[str] = []
+        self.deletes: Dict[str, Set[str]] = {}
+        self._lock = asyncio.Lock()
+
+    def build(self, movies: List[Dict]):
+        # Store movies in popularity order so every posting list is already ranked
+        self.movies = sorted(movies, key=lambda m: -popularity(m))
+        self.tokens = [normalize(m["title"]).split() for m in self.movies]
+
+        postings = defaultdict(list)
+        prefixes = defaultdict(list)
+        variants = defaultdict(set)
+        for i, tokens in enumerate(self.tokens):
+            seen_prefixes = set()
+            for token in dict.fromkeys(tokens):
+                postings[token].append(i)
+                for length in range(1, min(len(token), MAX_PREFIX_LENGTH) + 1):
+                    prefix = token[:length]
+                    if prefix not in seen_prefixes:
+                        seen_prefixes.add(prefix)
+                        bucket = prefixes[prefix]
+                        if len(bucket) < PREFIX_RESULTS:
+                            bucket.append(i)
+        for token in postings:
+            if len(token) >= 3:
+                for variant in deletes(token):
+                    variants[variant].add(token)
+
+        self.postings = dict(postings)
+        self.prefixes = dict(prefixes)
+        self.sorted_tokens = sorted(postings)
+        self.deletes = dict(variants)
+
+    async def rebuild(self, db, version=None):
+        async with self._lock:
+            if version is not None and version == self.version:
+                return
+            projection = {"title": 1, "poster": 1, "rating": 1, "votes": 1, "genres": 1, "languages": 1}
+            movies = await db.movies.find({}, projection).to_list(length=None)
+            for movie in movies:
+                movie["id"] = str(movie.pop("_id"))
+            self.build(movies)
+            self.version = version
+            logger.info(f"Built title index over {len(movies)} movies")
+
+    def _prefix_matches(self, prefix: str) -> List[int]:
+        if len(prefix) <= MAX_PREFIX_LENGTH:
+            return self.prefixes.get(prefix, [])
+        return [i for i in self.prefixes.get(prefix[:MAX_PREFIX_LENGTH], [])
+                if any(t.startswith(prefix) for t in self.tokens[i])]
+
+    def _all_prefix_matches(self, prefix: str) -> List[int]:
+        """Every movie with a token starting with prefix, best-ranked first"""
+        matches = set()
+        start = bisect.bisect_left(self.sorted_tokens, prefix)
+        for token in self.sorted_tokens[start:]:
+            if not token.startswith(prefix):
+                break
+            matches.update(self.postings[token])
+        return sorted(matches)
+
+    def _fuzzy_tokens(self, token: str) -> Set[str]:
+        if len(token) < 3:
+            return set()
+        # Shared one-character deletes cover insertions, deletions, substitutions and swaps
+        candidates = set()
+        for variant in deletes(token):
+            candidates.update(self.deletes.get(variant, ()))
+        limit = 1 if len(token) <= 5 else 2
+        return {c for c in candidates if within_distance(token, c, limit)}
+
+    def _word_matches(self, word: str) -> Optional[Set[int]]:
+        matches = set(self.postings.get(word, ()))
+        if not matches:
+            for token in self._fuzzy_tokens(word):
+                matches.update(self.postings[token])
+        return matches
+
+    def search(self, query: str, limit: int = 10, where: Optional[Callable[[Dict], bool]] = None) -> List[Dict]:
+        """Best matches for query, only among movies where(movie) accepts if given"""
+        def keep(i: int) -> bool:
+            return where is None or where(self.movies[i])
+
+        words = normalize(query).split()
+        if not words:
+            return []
+        *complete, last = words
+
+        candidates: Optional[Set[int]] = None
+        for word in complete:
+            matches = self._word_matches(word)
+            candidates = matches if candidates is None else candidates & matches
+            if not candidates:
+                return []
+
+        if candidates is None and where is None:
+            exact = self._prefix_matches(last)
+        elif candidates is None:
+            # The capped prefix buckets may have cut off the movies the filter keeps
+            exact = [i for i in self._all_prefix_matches(last) if keep(i)]
+        else:
+            exact = sorted(i for i in candidates if keep(i) and any(t.startswith(last) for t in self.tokens[i]))
+        results = exact[:limit]
+
+        # Typo tolerance for the last word when prefix matching comes up short
+        if len(results) < limit:
+            fuzzy = self._word_matches(last) if last not in self.postings else set()
+            if candidates is not None:
+                fuzzy &= candidates
+            seen = set(results)
+            results.extend(sorted(i for i in fuzzy if i not in seen and keep(i))[:limit - len(results)])
+
+        return [self.movies[i] for i in results]
+
+
+title_index = TitleIndex()
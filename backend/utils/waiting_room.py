@@ -0,0 +1,139 @@
+"""
+Virtual waiting room for high-demand shows.
+
+Shows opt in with shows.waiting_room = true (or WAITING_ROOM_ALL_SHOWS=true).
+For those shows, reserving seats and creating bookings need an admission
+token, and admission tokens are handed out at WAITING_ROOM_RATE per second
+per show, however many clients arrive.
+
+Joining the queue assigns an admission time: the next free slot on the
+show's schedule, one slot every 1 / rate seconds. An idle show banks up to
+WAITING_ROOM_BURST slots so small crowds walk straight in. The admission
+time goes into a signed queue token, so position, ETA and the final
+admission can be worked out by any worker from the token alone; the only
+state per show is the next free slot. The schedule is per process, so
+with several workers the rate is per worker.
+
+Clients that give up still use their slot, which keeps the drain rate
+into the booking funnel constant.
+"""
+
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from jose import JWTError, jwt
+
+from utils.auth import ALGORITHM, SECRET_KEY
+
+WAITING_ROOM_ALL_SHOWS = os.getenv("WAITING_ROOM_ALL_SHOWS", "false").lower() == "true"
+WAITING_ROOM_RATE = float(os.getenv("WAITING_ROOM_RATE", "2"))
+WAITING_ROOM_BURST = int(os.getenv("WAITING_ROOM_BURST", "20"))
+ADMISSION_TOKEN_SECONDS = int(os.getenv("ADMISSION_TOKEN_SECONDS", "900"))
+# How long after its admission time a queue token can still be exchanged
+QUEUE_TOKEN_GRACE_SECONDS = int(os.getenv("QUEUE_TOKEN_GRACE_SECONDS", "300"))
+MAX_TRACKED_SESSIONS = 65536
+MAX_TRACKED_SHOWS = 10000
+
+
+class InvalidToken(Exception):
+    pass
+
+
+class WaitingRoom:
+    def __init__(self, rate: float = WAITING_ROOM_RATE, burst: int = WAITING_ROOM_BURST,
+                 clock: Callable[[], float] = time.time):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        # show_id -> next free admission slot (epoch seconds)
+        self._next_slot: Dict[str, float] = {}
+        # (show_id, session_id) -> admission time, so re-joining keeps the original place
+        self._sessions: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        # (show_id, session_id) already counted as admitted; polling again re-issues the token only
+        self._admitted: "OrderedDict[Tuple[str, str], None]" = OrderedDict()
+        self.joined = 0
+        self.admitted = 0
+
+    @staticmethod
+    def gated(show: Dict) -> bool:
+        return WAITING_ROOM_ALL_SHOWS or bool(show.get("waiting_room"))
+
+    def _schedule(self, show_id: str, now: float) -> float:
+        if len(self._next_slot) > MAX_TRACKED_SHOWS:
+            # Shows whose schedule is in the past have nobody waiting
+            self._next_slot = {s: t for s, t in self._next_slot.items() if t > now}
+        # An idle show banks at most `burst` slots
+        slot = max(self._next_slot.get(show_id, 0.0), now - self.burst / self.rate)
+        self._next_slot[show_id] = slot + 1 / self.rate
+        return slot
+
+    def queued(self, show_id: str) -> int:
+        """Clients currently waiting for a show, by this worker's schedule"""
+        return max(0, math.ceil((self._next_slot.get(show_id, 0.0) - self.clock()) * self.rate))
+
+    def join(self, show_id: str, session_id: str) -> Dict:
+        now = self.clock()
+        key = (show_id, session_id)
+        admit_at = self._sessions.get(key)
+        if admit_at is None:
+            admit_at = self._schedule(show_id, now)
+            self.joined += 1
+            self._sessions[key] = admit_at
+            while len(self._sessions) > MAX_TRACKED_SESSIONS:
+                self._sessions.popitem(last=False)
+        self._sessions.move_to_end(key)
+        return self._ticket(show_id, session_id, admit_at, now)
+
+    def status(self, show_id: str, queue_token: str) -> Dict:
+        try:
+            claims = jwt.decode(queue_token, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError:
+            raise InvalidToken("Queue token is invalid or expired")
+        if claims.get("typ") != "queue" or claims.get("show") != show_id:
+            raise InvalidToken("Queue token is for another show")
+        return self._ticket(show_id, claims["sid"], claims["at"], self.clock())
+
+    def _ticket(self, show_id: str, session_id: str, admit_at: float, now: float) -> Dict:
+        if admit_at <= now:
+            key = (show_id, session_id)
+            if key not in self._admitted:
+                self.admitted += 1
+                self._admitted[key] = None
+                while len(self._admitted) > MAX_TRACKED_SESSIONS:
+                    self._admitted.popitem(last=False)
+            expires_at = now + ADMISSION_TOKEN_SECONDS
+            token = jwt.encode(
+                {"typ": "admission", "show": show_id, "sid": session_id, "exp": int(expires_at)},
+                SECRET_KEY, algorithm=ALGORITHM
+            )
+            return {"status": "admitted", "admission_token": token, "expires_in": ADMISSION_TOKEN_SECONDS}
+
+        wait = admit_at - now
+        token = jwt.encode(
+            {"typ": "queue", "show": show_id, "sid": session_id, "at": admit_at,
+             "exp": int(admit_at + QUEUE_TOKEN_GRACE_SECONDS)},
+            SECRET_KEY, algorithm=ALGORITHM
+        )
+        return {
+            "status": "queued",
+            "queue_token": token,
+            "position": math.ceil(wait * self.rate),
+            "eta_seconds": math.ceil(wait),
+            # Poll often near the front, rarely from the back
+            "poll_after_seconds": min(30, max(1, math.ceil(wait / 2)))
+        }
+
+    def check(self, show_id: str, session_id: str, admission_token: Optional[str]) -> bool:
+        if not admission_token:
+            return False
+        try:
+            claims = jwt.decode(admission_token, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError:
+            return False
+        return claims.get("typ") == "admission" and claims.get("show") == show_id and claims.get("sid") == session_id
+
+
+waiting_room = WaitingRoom()
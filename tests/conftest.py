@@ -0,0 +1,82 @@
+"""
+Shared fixtures. Tests that touch the database need a MongoDB server at
+MONGO_URL (default mongodb://localhost:27017) and are skipped without one;
+they use their own database (DB_NAME, default tickethub_test), dropped
+around every test.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+# server.py reads its configuration at import time
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "tickethub_test")
+# Every test client shares one address, per-IP limits would throttle the tests
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def db():
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from pymongo.errors import PyMongoError
+
+    client = AsyncIOMotorClient(os.environ["MONGO_URL"], serverSelectionTimeoutMS=1000)
+    try:
+        await client.admin.command("ping")
+    except PyMongoError:
+        client.close()
+        pytest.skip(f"MongoDB is not reachable at {os.environ['MONGO_URL']}")
+    database = client[os.environ["DB_NAME"]]
+    await client.drop_database(database.name)
+    try:
+        yield database
+    finally:
+        await client.drop_database(database.name)
+        client.close()
+
+
+@pytest.fixture
+async def api(db):
+    """An httpx client for the app, with its lifespan running against the test database and stub gateway"""
+    import httpx
+    import server
+    import stub_gateway
+    from utils.payment import payment_client
+    from utils.seat_state import seat_state
+
+    seat_state.invalidate()
+    # Orders go to the stub gateway in process; shutdown closes this client
+    payment_client._client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=stub_gateway.app), base_url="http://gateway/v1"
+    )
+    async with server.app.router.lifespan_context(server.app):
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://tickethub") as http:
+            yield http
+    seat_state.invalidate()
+
+
+@pytest.fixture
+async def show_seats(db):
+    """A show (show-1) in a 10 x 10 hall, returns its seat labels"""
+    rows = [chr(ord("A") + r) for r in range(10)]
+    await db.theaters.insert_one({
+        "_id": "theater-1", "name": "Test Hall", "city": "Mumbai",
+        "seat_layout": {"rows": rows, "seats_per_row": 10}
+    })
+    await db.shows.insert_one({
+        "_id": "show-1", "theater_id": "theater-1", "movie_id": "movie-1", "show_date": "2099-01-01",
+        "show_time": "19:00", "price": 200, "available_seats": 100
+    })
+    return [f"{row}{n}" for row in rows for n in range(1, 11)]
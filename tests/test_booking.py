@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+def booking_request(seats, session_id="session-1"):
+    return {"show_id": "show-1", "seats": seats, "email": "buyer@example.com", "phone": "9999999999",
+            "session_id": session_id}
+
+
+async def test_booking_must_match_held_seats(api, show_seats):
+    hold = {"show_id": "show-1", "session_id": "session-1", "seats": ["A1"]}
+    assert (await api.post("/api/seats/reserve", json=hold)).status_code == 200
+
+    for seats in (["A1", "A2"], ["A1", "A1"], ["B1"]):
+        response = await api.post("/api/bookings/create", json=booking_request(seats))
+        assert response.status_code == 400, seats
+
+    response = await api.post("/api/bookings/create", json=booking_request(["A1"]))
+    assert response.status_code == 200
+    assert response.json()["amount"] == 220
+
+
+async def test_booking_without_hold_is_rejected(api, show_seats):
+    response = await api.post("/api/bookings/create", json=booking_request(["A1"], session_id="nobody"))
+    assert response.status_code == 400
+
+
+async def test_failed_standalone_confirmation_leaves_no_sold_seats(db, show_seats, monkeypatch):
+    import utils.confirmation as confirmation
+    from utils.seat_holds import acquire_holds
+
+    monkeypatch.setattr(confirmation, "_transactions_supported", False)
+    expires_at = datetime.utcnow() + timedelta(minutes=5)
+    assert await acquire_holds(db, "show-1", "session-1", ["A1"], expires_at) == []
+    assert await acquire_holds(db, "show-1", "session-2", ["A2"], expires_at) == []
+    booking = {"booking_id": "TH1", "show_id": "show-1", "session_id": "session-1", "seats": ["A1", "A2"],
+               "payment_status": "pending", "snapshot": {}}
+    await db.bookings.insert_one({"_id": "TH1", **booking})
+
+    with pytest.raises(confirmation.SeatsUnavailable) as e:
+        await confirmation.confirm_booking(None, db, booking, "pay_1")
+    assert e.value.seats == ["A2"]
+
+    assert await db.seat_reservations.count_documents({"status": "sold"}) == 0
+    assert (await db.seat_reservations.find_one({"seat": "A2"}))["session_id"] == "session-2"
+    assert (await db.shows.find_one({"_id": "show-1"}))["available_seats"] == 100
+
+
+async def test_reserve_book_and_pay(api, db, show_seats):
+    """The whole funnel through the API: the buyer's live hold becomes a sale"""
+    import hashlib
+    import hmac
+
+    from utils.payment import RAZORPAY_KEY_SECRET
+
+    await db.movies.insert_one({"_id": "movie-1", "title": "Test Movie", "poster": "", "genres": ["Drama"]})
+    await db.shows.update_one({"_id": "show-1"}, {"$set": {"format": "2D"}})
+    await db.theaters.update_one({"_id": "theater-1"}, {"$set": {"location": "Andheri"}})
+    hold = {"show_id": "show-1", "session_id": "session-1", "seats": ["A1", "A2"]}
+    assert (await api.post("/api/seats/reserve", json=hold)).status_code == 200
+    response = await api.post("/api/bookings/create", json=booking_request(["A1", "A2"]))
+    assert response.status_code == 200
+    created = response.json()
+
+    payment_id = "pay_1"
+    signature = hmac.new(RAZORPAY_KEY_SECRET.encode(), f"{created['payment_order_id']}|{payment_id}".encode(),
+                         hashlib.sha256).hexdigest()
+    response = await api.post("/api/payment/verify", json={
+        "booking_id": created["booking_id"], "razorpay_order_id": created["payment_order_id"],
+        "razorpay_payment_id": payment_id, "razorpay_signature": signature
+    })
+    assert response.status_code == 200, response.text
+    assert response.json()["booking"]["seats"] == ["A1", "A2"]
+
+    booking = await db.bookings.find_one({"booking_id": created["booking_id"]})
+    assert booking["payment_status"] == "success"
+    docs = await db.seat_reservations.find({"show_id": "show-1"}).to_list(length=None)
+    assert {(doc["seat"], doc["status"]) for doc in docs} == {("A1", "sold"), ("A2", "sold")}
+    assert (await db.shows.find_one({"_id": "show-1"}))["available_seats"] == 98
+    seats = (await api.get("/api/shows/show-1/seats")).json()
+    assert sorted(seats["booked_seats"]) == ["A1", "A2"]
+    assert seats["reserved_seats"] == []
@@ -0,0 +1,22 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_app_delivers_outbox_by_default(api, db):
+    """No separate worker is needed for confirmation emails to go out"""
+    await db.email_outbox.insert_one({
+        "_id": "booking_confirmation:TH1", "kind": "booking_confirmation", "to": "buyer@example.com",
+        "data": {"booking_id": "TH1", "movie_title": "Dune", "theater_name": "Test Hall", "show_time": "19:00",
+                 "seats": ["A1"], "total_amount": 220},
+        "status": "pending", "attempts": 0, "next_attempt_at": datetime.utcnow(), "created_at": datetime.utcnow()
+    })
+    for _ in range(50):
+        message = await db.email_outbox.find_one({"_id": "booking_confirmation:TH1"})
+        if message["status"] == "sent":
+            break
+        await asyncio.sleep(0.1)
+    assert message["status"] == "sent"
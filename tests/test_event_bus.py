@@ -0,0 +1,30 @@
+import asyncio
+import fcntl
+import threading
+
+import pytest
+
+from utils.event_bus import UnixSocketBackend
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_waiting_for_the_broker_lock_keeps_the_loop_running(tmp_path):
+    path = str(tmp_path / "events.sock")
+    backend = UnixSocketBackend(path)
+    with open(f"{path}.lock", "w") as lock:
+        # Another worker is mid-takeover; let go of its lock from outside the loop after a while
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        threading.Timer(1.0, fcntl.flock, (lock, fcntl.LOCK_UN)).start()
+
+        connecting = asyncio.create_task(backend._connect())
+        ticks = 0
+        while not connecting.done():
+            await asyncio.sleep(0.01)
+            ticks += 1
+        await connecting
+
+    # The loop kept serving other tasks while the lock was held
+    assert ticks > 10
+    assert backend._server is not None
+    await backend.stop()
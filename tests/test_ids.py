@@ -0,0 +1,40 @@
+import asyncio
+import multiprocessing
+
+import pytest
+
+from utils.ids import ID_PREFIX, BookingIdGenerator
+
+PROCESSES = 8
+IDS_PER_PROCESS = 50000
+
+
+def generate(node_id, queue):
+    generator = BookingIdGenerator(node_id)
+    queue.put([generator.next_id() for _ in range(IDS_PER_PROCESS)])
+
+
+def test_ids_are_unique_across_processes():
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    processes = [context.Process(target=generate, args=(node, queue)) for node in range(PROCESSES)]
+    for process in processes:
+        process.start()
+    batches = [queue.get(timeout=60) for _ in processes]
+    for process in processes:
+        process.join()
+
+    ids = [booking_id for batch in batches for booking_id in batch]
+    assert len(set(ids)) == PROCESSES * IDS_PER_PROCESS
+    for batch in batches:
+        assert all(booking_id.startswith(ID_PREFIX) for booking_id in batch)
+        # Time-ordered within a process
+        assert batch == sorted(batch)
+
+
+@pytest.mark.anyio
+async def test_workers_lease_distinct_node_ids(db, monkeypatch):
+    monkeypatch.delenv("BOOKING_NODE_ID", raising=False)
+    workers = [BookingIdGenerator() for _ in range(32)]
+    await asyncio.gather(*(worker.lease_node(db) for worker in workers))
+    assert len({worker.node_id for worker in workers}) == len(workers)
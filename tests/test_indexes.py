@@ -0,0 +1,10 @@
+import pytest
+
+from utils.indexes import collscan_queries, ensure_indexes
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_hot_queries_use_indexes(db):
+    await ensure_indexes(db)
+    assert await collscan_queries(db) == []
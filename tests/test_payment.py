@@ -0,0 +1,70 @@
+import asyncio
+
+import httpx
+import pytest
+
+from utils.payment import CircuitBreaker, CircuitOpen, PaymentClient, PaymentUnavailable, create_order
+
+pytestmark = pytest.mark.anyio
+
+
+def gateway_client(handler) -> PaymentClient:
+    client = PaymentClient(base_url="http://gateway/v1")
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="http://gateway/v1")
+    return client
+
+
+def test_half_open_circuit_admits_one_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0)
+    breaker.failure()
+    assert breaker.state == "half_open"
+
+    breaker.check()
+    with pytest.raises(CircuitOpen):
+        breaker.check()
+    breaker.done()
+    # The probe ended without a verdict, the next caller probes instead
+    breaker.check()
+
+
+async def test_concurrent_calls_send_one_probe_while_half_open():
+    calls = 0
+    release = asyncio.Event()
+
+    async def handler(request):
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return httpx.Response(200, json={"id": "order_1"})
+
+    client = gateway_client(handler)
+    client.breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0)
+    client.breaker.failure()
+
+    probe = asyncio.create_task(client.create_order({"receipt": "probe"}))
+    await asyncio.sleep(0)
+    results = await asyncio.gather(
+        *(client.create_order({"receipt": f"b{i}"}) for i in range(20)), return_exceptions=True
+    )
+    assert all(isinstance(result, CircuitOpen) for result in results)
+    release.set()
+    assert (await probe)["id"] == "order_1"
+    assert calls == 1
+    assert client.breaker.state == "closed"
+
+
+async def test_outage_raises_instead_of_mock_order(monkeypatch):
+    import utils.payment as payment
+
+    async def handler(request):
+        return httpx.Response(502)
+
+    monkeypatch.setattr(payment, "PAYMENT_MAX_RETRIES", 0)
+    monkeypatch.setattr(payment, "payment_client", gateway_client(handler))
+    with pytest.raises(PaymentUnavailable):
+        await create_order(100, receipt="TH1")
+
+    payment.payment_client.breaker.opened_at = 0.0
+    payment.payment_client.breaker.reset_seconds = 1e9
+    with pytest.raises(CircuitOpen):
+        await create_order(100, receipt="TH2")
@@ -0,0 +1,88 @@
+from collections import OrderedDict
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def seat_allowance(monkeypatch):
+    """Per-IP seat limits on, at 4 seats per show"""
+    import utils.rate_limit as rate_limit
+
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(rate_limit.rate_limiter, "_buckets", OrderedDict())
+    monkeypatch.setitem(rate_limit.POLICIES, "reserve_ip_show_seats",
+                        rate_limit.Policy("reserve_ip_show_seats", "4/600"))
+    return 4
+
+
+async def held_by(db, session_id):
+    return await db.seat_reservations.count_documents({"session_id": session_id, "status": "held"})
+
+
+async def test_only_held_seats_are_charged(api, db, show_seats, seat_allowance):
+    response = await api.post("/api/seats/reserve", json={"show_id": "show-1", "session_id": "s1", "seats": ["A1", "A2"]})
+    assert response.status_code == 200
+
+    # Losing the race for seats, however often, costs nothing
+    for _ in range(5):
+        response = await api.post("/api/seats/reserve", json={"show_id": "show-1", "session_id": "s2", "seats": ["A1", "A2"]})
+        assert response.status_code == 400
+    response = await api.post("/api/seats/reserve", json={"show_id": "show-1", "session_id": "s2", "seats": ["B1", "B2"]})
+    assert response.status_code == 200
+
+    # The allowance is spent; further holds from this client are given back
+    response = await api.post("/api/seats/reserve", json={"show_id": "show-1", "session_id": "s3", "seats": ["C1"]})
+    assert response.status_code == 429
+    response = await api.post("/api/seats/best-available", json={"show_id": "show-1", "session_id": "s4", "count": 1})
+    assert response.status_code == 429
+    assert await held_by(db, "s3") == 0
+    assert await held_by(db, "s4") == 0
+
+    seats = (await api.get("/api/shows/show-1/seats")).json()
+    assert sorted(seats["reserved_seats"]) == ["A1", "A2", "B1", "B2"]
+
+
+async def test_reselecting_held_seats_is_free(api, db, show_seats, seat_allowance):
+    hold = {"show_id": "show-1", "session_id": "s1", "seats": ["A1", "A2", "A3"]}
+    for _ in range(5):
+        # Refreshing the same hold, or shrinking it, costs nothing after the first time
+        assert (await api.post("/api/seats/reserve", json=hold)).status_code == 200
+    response = await api.post("/api/seats/reserve", json={**hold, "seats": ["A1", "A2"]})
+    assert response.status_code == 200
+    response = await api.post("/api/seats/reserve", json={**hold, "seats": ["A1", "A2", "A4"]})
+    assert response.status_code == 200
+
+    # Two new seats with one left: refused, and the session keeps what it held
+    response = await api.post("/api/seats/reserve", json={**hold, "seats": ["A1", "A2", "A4", "A5", "A6"]})
+    assert response.status_code == 429
+    docs = await db.seat_reservations.find({"session_id": "s1", "status": "held"}).to_list(length=None)
+    assert sorted(doc["seat"] for doc in docs) == ["A1", "A2", "A4"]
+    seats = (await api.get("/api/shows/show-1/seats")).json()
+    assert sorted(seats["reserved_seats"]) == ["A1", "A2", "A4"]
+
+
+async def test_clients_behind_the_proxy_are_told_apart(api, show_seats, seat_allowance):
+    def reserve(session_id, seats, forwarded_for):
+        return api.post("/api/seats/reserve", headers={"X-Forwarded-For": forwarded_for},
+                        json={"show_id": "show-1", "session_id": session_id, "seats": seats})
+
+    assert (await reserve("s1", ["A1", "A2", "A3", "A4"], "203.0.113.1")).status_code == 200
+    assert (await reserve("s2", ["B1"], "203.0.113.1")).status_code == 429
+    # A forged entry in front of the one the proxy appended changes nothing
+    assert (await reserve("s3", ["C1"], "198.51.100.9, 203.0.113.1")).status_code == 429
+    assert (await reserve("s4", ["D1", "D2", "D3", "D4"], "203.0.113.2")).status_code == 200
+
+
+def test_client_ip_counts_proxy_hops_from_the_right(monkeypatch):
+    import utils.rate_limit as rate_limit
+    from starlette.requests import Request
+
+    request = Request({"type": "http", "headers": [(b"x-forwarded-for", b"198.51.100.9")],
+                       "client": ("10.0.0.5", 1234)})
+    assert rate_limit.client_ip(request) == "198.51.100.9"
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_PROXY_HOPS", 0)
+    assert rate_limit.client_ip(request) == "10.0.0.5"
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_PROXY_HOPS", 2)
+    assert rate_limit.client_ip(request) == "10.0.0.5"
@@ -0,0 +1,91 @@
+import asyncio
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+SESSIONS = 2000
+
+
+def random_selection(rng, seats):
+    start = rng.randrange(len(seats) - 4)
+    return seats[start:start + rng.randint(1, 4)]
+
+
+async def test_concurrent_holds_never_overlap(db, show_seats):
+    """Thousands of overlapping hold attempts, as if from many workers: Mongo is the only arbiter"""
+    from utils.seat_holds import acquire_holds
+
+    rng = random.Random(1)
+    expires_at = datetime.utcnow() + timedelta(minutes=5)
+    requests = [(f"session-{i}", random_selection(rng, show_seats)) for i in range(SESSIONS)]
+    results = await asyncio.gather(*(
+        acquire_holds(db, "show-1", session_id, seats, expires_at) for session_id, seats in requests
+    ))
+
+    won = {session_id: seats for (session_id, seats), conflicts in zip(requests, results) if not conflicts}
+    assert won
+    holders = {}
+    for session_id, seats in won.items():
+        for seat in seats:
+            assert seat not in holders, f"{seat} held by {holders[seat]} and {session_id}"
+            holders[seat] = session_id
+
+    docs = await db.seat_reservations.find({"show_id": "show-1"}).to_list(length=None)
+    assert {doc["seat"]: doc["session_id"] for doc in docs} == holders
+
+
+async def test_concurrent_reserve_requests_never_overlap(api, db, show_seats):
+    from utils.seat_state import seat_state
+
+    rng = random.Random(2)
+    requests = [(f"session-{i}", random_selection(rng, show_seats)) for i in range(SESSIONS)]
+    responses = await asyncio.gather(*(
+        api.post("/api/seats/reserve", json={"show_id": "show-1", "session_id": session_id, "seats": seats})
+        for session_id, seats in requests
+    ))
+    assert {r.status_code for r in responses} <= {200, 400}
+
+    won = [(session_id, seats) for (session_id, seats), r in zip(requests, responses) if r.status_code == 200]
+    held = [seat for _, seats in won for seat in seats]
+    assert len(held) == len(set(held))
+
+    docs = await db.seat_reservations.find({"show_id": "show-1"}).to_list(length=None)
+    assert sorted(doc["seat"] for doc in docs) == sorted(held)
+    seat_map = seat_state.peek("show-1")
+    for session_id, seats in won:
+        assert seat_map.unavailable(seats, session_id, datetime.utcnow()) == []
+
+
+async def test_empty_selection_releases_hold(api, db, show_seats):
+    hold = {"show_id": "show-1", "session_id": "session-1", "seats": ["A1", "A2"]}
+    assert (await api.post("/api/seats/reserve", json=hold)).status_code == 200
+
+    response = await api.post("/api/seats/reserve", json={**hold, "seats": []})
+    assert response.status_code == 200
+    assert await db.seat_reservations.count_documents({"session_id": "session-1"}) == 0
+
+    other = {"show_id": "show-1", "session_id": "session-2", "seats": ["A1", "A2"]}
+    assert (await api.post("/api/seats/reserve", json=other)).status_code == 200
+
+
+async def test_booking_needs_seats(api, show_seats):
+    response = await api.post("/api/bookings/create", json={
+        "show_id": "show-1", "seats": [], "email": "a@example.com", "phone": "1", "session_id": "session-1"
+    })
+    assert response.status_code == 422
+
+
+async def test_seat_state_loads_legacy_reservations(db, show_seats):
+    """Per-session reservation documents from before per-seat holds still count until they expire"""
+    from utils.seat_state import seat_state
+
+    now = datetime.utcnow()
+    await db.seat_reservations.insert_many([
+        {"show_id": "show-1", "session_id": "old-1", "seats": ["A1", "A2"], "expires_at": now + timedelta(minutes=5)},
+        {"show_id": "show-1", "session_id": "old-2", "seats": ["B1"], "expires_at": now - timedelta(minutes=5)},
+    ])
+    seat_map = await seat_state._load(db, "show-1")
+    assert seat_map.unavailable(["A1", "A2", "B1"], "someone-else", now) == ["A1", "A2"]
@@ -0,0 +1,49 @@
+from datetime import datetime
+
+import httpx
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def todays_show(db, show_seats):
+    """show-1 moved to today, so warm-up builds its seat map"""
+    from utils.catalogue_cache import catalogue_changed
+
+    await db.shows.update_one({"_id": "show-1"}, {"$set": {"show_date": datetime.utcnow().strftime("%Y-%m-%d")}})
+    await db.movies.insert_one({"_id": "movie-1", "title": "Test Movie", "genres": ["Drama"], "languages": ["Hindi"]})
+    await catalogue_changed(db)
+    return "show-1"
+
+
+async def test_not_ready_before_startup():
+    import server
+
+    # Importing the app opens nothing; the client comes with the lifespan
+    assert server.client is None
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://tickethub") as http:
+        assert (await http.get("/api/health/live")).status_code == 200
+        response = await http.get("/api/health/ready")
+    assert response.status_code == 503
+    assert response.json() == {"status": "starting"}
+
+
+async def test_ready_and_warm_after_startup(todays_show, api):
+    from utils.catalogue_cache import catalogue_cache
+    from utils.seat_state import seat_state
+
+    response = await api.get("/api/health/ready")
+    assert response.status_code == 200
+    assert response.json()["status"] == "ready"
+
+    # The first requests are served from what warm-up loaded
+    assert seat_state.peek(todays_show) is not None
+    misses = catalogue_cache.misses
+    response = await api.get("/api/movies")
+    assert response.status_code == 200
+    assert [movie["id"] for movie in response.json()["movies"]] == ["movie-1"]
+    assert catalogue_cache.misses == misses
+    assert (await api.get(f"/api/shows/{todays_show}/seats")).status_code == 200
+
@@ -0,0 +1,49 @@
+import pytest
+
+from utils.title_search import PREFIX_RESULTS, TitleIndex
+
+pytestmark = pytest.mark.anyio
+
+POPULAR = PREFIX_RESULTS + 50
+
+
+def catalogue():
+    """Many popular "Star" action titles and one obscure drama that shares the word"""
+    movies = [
+        {"id": f"action-{i}", "title": f"Star Raiders {i}", "rating": 9.0, "votes": "900K",
+         "genres": ["Action"], "languages": ["English"]}
+        for i in range(POPULAR)
+    ]
+    movies.append({"id": "drama", "title": "Star of the Village", "rating": 4.0, "votes": "12",
+                   "genres": ["Drama"], "languages": ["Hindi"]})
+    return movies
+
+
+def test_filter_applies_before_the_limit():
+    index = TitleIndex()
+    index.build(catalogue())
+
+    def is_drama(movie):
+        return "Drama" in movie["genres"]
+
+    for query in ("st", "star", "star vil", "vilage", "star vilage"):
+        assert [m["id"] for m in index.search(query, limit=100, where=is_drama)] == ["drama"], query
+    # Unfiltered, the obscure title is ranked out of the first hundred
+    assert "drama" not in [m["id"] for m in index.search("star", limit=100)]
+
+
+async def test_filtered_search_finds_low_popularity_match(api, db, monkeypatch):
+    from utils.catalogue_cache import catalogue_changed
+    from utils.title_search import title_index
+
+    await db.movies.insert_many([{"_id": m.pop("id"), **m} for m in catalogue()])
+    await catalogue_changed(db)
+    # The index outlives the previous test's database
+    monkeypatch.setattr(title_index, "version", None)
+
+    response = await api.get("/api/movies", params={"search": "star", "genre": "Drama"})
+    assert response.status_code == 200
+    assert [movie["id"] for movie in response.json()["movies"]] == ["drama"]
+
+    response = await api.get("/api/movies", params={"search": "star", "language": "English"})
+    assert len(response.json()["movies"]) == 100
@@ -0,0 +1,45 @@
+import argparse
+import time
+
+from benchmarks.waiting_room import simulate
+from utils.waiting_room import WaitingRoom
+
+
+class Clock:
+    def __init__(self, now: float):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_admission_counted_once_per_session():
+    clock = Clock(time.time())
+    room = WaitingRoom(rate=1, burst=0, clock=clock)
+    assert room.join("show-1", "s0")["status"] == "admitted"
+    queued = room.join("show-1", "s1")
+    assert queued["status"] == "queued"
+
+    clock.now += queued["eta_seconds"]
+    assert room.status("show-1", queued["queue_token"])["status"] == "admitted"
+    # Polling with the old queue token and joining again hand out tokens, not new admissions
+    assert room.status("show-1", queued["queue_token"])["status"] == "admitted"
+    assert room.join("show-1", "s1")["status"] == "admitted"
+    assert room.admitted == 2
+
+
+def test_spike_admissions_stay_at_drain_rate():
+    args = argparse.Namespace(
+        rate=20, burst=20, base_rate=2, spike=100, warmup_seconds=60, spike_seconds=30,
+        cooldown_seconds=60, window=1, seed=42, json=False
+    )
+    result = simulate(args)
+
+    assert result["admitted"] == result["clients"]
+    assert result["admitted_counter"] == result["clients"]
+    # However the spike arrives, admissions by any time never exceed the banked burst plus the drain rate
+    admitted = 0
+    for window in result["windows"]:
+        admitted += window["admissions_per_s"] * args.window
+        assert admitted <= args.burst + args.rate * (window["from_s"] + args.window)
+    assert max(w["arrivals_per_s"] for w in result["windows"]) > args.rate